@@ -0,0 +1,105 @@
+"""
+Compares request throughput of the sync helpers against the asyncio API
+under many concurrent clients.
+
+Each simulated request performs the lookups of the enrollment flow: the
+course and instructor (fanned out concurrently in async mode) and the
+student's enrollments. In sync mode the requests are served one at a time,
+as they would be if an asyncio service called the blocking helpers.
+
+The first run measures the local SQLite file as it is. --latency-ms adds
+a second, separately reported run with a per-statement delay standing in
+for the network round trip to a database server (blocking in sync mode,
+awaited in async mode).
+
+    python benchmarks/async_throughput.py --requests 2000 --clients 50
+    python benchmarks/async_throughput.py --requests 2000 --clients 50 --latency-ms 1
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, select, func
+from sqlalchemy.util import await_only
+from lib.database import engine, get_session
+from lib.async_database import async_engine, AsyncSessionLocal
+from lib import helpers, async_helpers
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+
+def sample_requests(count: int, seed: int) -> list[tuple[int, int, str]]:
+    with get_session() as session:
+        course_ids = session.scalars(select(Course.id)).all()
+        instructor_ids = session.scalars(select(Instructor.id)).all()
+        emails = session.scalars(select(Enrollment.student_email).order_by(func.random()).limit(count)).all()
+    if not course_ids or not instructor_ids or not emails:
+        sys.exit("The database needs instructors, courses and enrollments; import some data first.")
+    rng = random.Random(seed)
+    return [(rng.choice(course_ids), rng.choice(instructor_ids), rng.choice(emails)) for _ in range(count)]
+
+def add_latency(latency_ms: float):
+    delay = latency_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _blocking_round_trip(*args):
+        time.sleep(delay)
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _awaited_round_trip(*args):
+        await_only(asyncio.sleep(delay))
+
+def run_sync(requests) -> float:
+    started = time.perf_counter()
+    for course_id, instructor_id, email in requests:
+        with get_session() as session:
+            helpers.get_course_by_id(session, course_id)
+            helpers.get_instructor_by_id(session, instructor_id)
+            helpers.get_enrollments_by_student_email(session, email)
+    return time.perf_counter() - started
+
+async def run_async(requests, clients: int) -> float:
+    limit = asyncio.Semaphore(clients)
+
+    async def handle(course_id, instructor_id, email):
+        async with limit:
+            await async_helpers.lookup_enrollment_targets(course_id, instructor_id)
+            async with AsyncSessionLocal() as session:
+                await async_helpers.get_enrollments_by_student_email(session, email)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handle(*request) for request in requests))
+    elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+    return elapsed
+
+def report(label: str, requests, clients: int):
+    sync_seconds = run_sync(requests)
+    async_seconds = asyncio.run(run_async(requests, clients))
+    print(f"{label}:")
+    print(f"  sync:  {len(requests) / sync_seconds:10.1f} req/s  ({sync_seconds:.2f}s)")
+    print(f"  async: {len(requests) / async_seconds:10.1f} req/s  ({async_seconds:.2f}s)")
+    print(f"  speedup: {sync_seconds / async_seconds:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Also run with this much simulated round-trip time per statement.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    requests = sample_requests(args.requests, args.seed)
+    print(f"{args.requests} requests, {args.clients} concurrent clients")
+    report("local SQLite, no added latency", requests, args.clients)
+    if args.latency_ms:
+        add_latency(args.latency_ms)
+        report(f"injected latency, {args.latency_ms:g} ms per statement", requests, args.clients)
+
+if __name__ == "__main__":
+    main()
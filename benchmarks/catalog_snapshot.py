@@ -0,0 +1,81 @@
+"""
+Compares the memory-mapped catalog snapshot with the ORM and SQL paths.
+
+Against the data in DATABASE_URL (fill it with python main.py generate
+first): loads every course with its enrollments as ORM objects, writes and
+opens a snapshot, walks every course's enrollments from the snapshot, then
+times --lookups random lookups by ID and email through the snapshot and
+through SqlCatalog. Reports time for each step and peak Python memory for the full-catalog ones.
+
+    python benchmarks/catalog_snapshot.py --lookups 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def measure(label: str, work, memory: bool = False):
+    # Timed without tracing; peak Python memory comes from a second, traced
+    # run, since tracemalloc slows allocation-heavy code several times over.
+    started = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - started
+    peak = ""
+    if memory:
+        tracemalloc.start()
+        work()
+        peak = f"{tracemalloc.get_traced_memory()[1] / 1e6:>8.1f} MB peak"
+        tracemalloc.stop()
+    print(f"  {label:<40} {elapsed * 1000:>10.1f} ms  {peak}")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from lib.database import create_db_tables, get_read_session, engine
+    from lib.models.course import Course
+    from lib.models.student import Student
+    from lib.snapshot import CatalogSnapshot, SqlCatalog, write_snapshot
+
+    create_db_tables(verbose=False)
+    path = os.path.join(tempfile.mkdtemp(prefix="virtulearn-snapshot-"), "catalog.snap")
+
+    def orm_load():
+        with get_read_session() as session:
+            courses = session.query(Course).options(selectinload(Course.enrollments)).all()
+            return sum(len(course.enrollments) for course in courses)
+
+    print("Full catalog:")
+    enrollments = measure("ORM: courses with enrollments", orm_load, memory=True)
+    result = measure("write snapshot", lambda: write_snapshot(path), memory=True)
+    snapshot = measure("open snapshot", lambda: CatalogSnapshot(path))
+    with engine.connect() as conn:
+        course_ids = conn.execute(select(Course.id)).scalars().all()
+        emails = conn.execute(select(Student.email)).scalars().all()
+    walked = measure("snapshot: every course's enrollments", lambda: sum(len(snapshot.course_enrollments(course_id)) for course_id in course_ids), memory=True)
+    print(f"  {enrollments} enrollments via ORM, {walked} via snapshot; snapshot file {result.bytes / 1e6:.1f} MB")
+
+    rng = random.Random(args.seed)
+    enrollment_ids = [rng.randint(1, max(result.rows["enrollments"], 1)) for _ in range(args.lookups)]
+    student_emails = [rng.choice(emails) for _ in range(args.lookups)] if emails else []
+    sql = SqlCatalog()
+    print(f"{args.lookups} lookups:")
+    for label, catalog in (("snapshot", snapshot), ("SQL", sql)):
+        measure(f"{label}: enrollment by ID", lambda: [catalog.enrollment(i) for i in enrollment_ids])
+        measure(f"{label}: student enrollments by email", lambda: [catalog.student_enrollments(e) for e in student_emails])
+    snapshot.close()
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmarks the co-enrollment index ("students who took this also took").
+
+Generates --enrollments synthetic enrollments into a fresh database (or
+reuses --keep), then reports:
+  - building the index with NumPy from every (student, course) pair;
+  - the naive alternative, walking course.enrollments and each student's
+    enrollments through the ORM, for the --naive busiest courses;
+  - lookups from the index, each including its change log check;
+  - --arrivals new enrollments applied one at a time as incremental
+    refreshes, compared with a full rebuild, and checked against one.
+
+    python benchmarks/co_enrollment.py --enrollments 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def naive_also_took(session, course_id: int, limit: int) -> list[tuple[int, int]]:
+    from lib.models.course import Course
+    counts = Counter()
+    for enrollment in session.get(Course, course_id).enrollments:
+        if enrollment.student is None:
+            continue
+        for other in enrollment.student.enrollments:
+            if other.course_id != course_id:
+                counts[other.course_id] += 1
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--enrollments", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--arrivals", type=int, default=200)
+    parser.add_argument("--naive", type=int, default=1, help="Courses to time the ORM walk on; about a minute each at 1M.")
+    parser.add_argument("--keep", help="Database file to create, or reuse if it exists.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(prefix="virtulearn-coenroll-"), "coenroll.db")
+    reuse = os.path.exists(path)
+    # Set before lib is imported.
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("VIRTULEARN_DB_PROFILE", "production")
+    from sqlalchemy import select, func
+    from lib.database import create_db_tables, engine, get_read_session, run_transaction
+    from lib.datagen import generate
+    from lib.models.course import Course
+    from lib.models.student import Student
+    from lib.operations import enroll_student, AlreadyEnrolledError, CourseFullError
+    from lib.analytics import CoEnrollmentIndex, co_enrollment
+
+    create_db_tables(verbose=False)
+    if not reuse:
+        result = generate(max(10, args.enrollments // 1000), max(50, args.enrollments // 200), args.enrollments, args.seed)
+        print(f"Generated {result.enrollments} enrollments in {result.courses} courses for {result.students} students ({result.seconds:.1f}s).")
+
+    with engine.connect() as conn:
+        build = co_enrollment.build(conn)
+        course_ids = conn.execute(select(Course.id).order_by(Course.enrollment_count.desc())).scalars().all()
+        # Existing students, so new enrollments add co-enrolled pairs.
+        students = conn.execute(select(Student.email, Student.name).order_by(func.random()).limit(args.arrivals)).all()
+    print(f"Index build: {build.enrollments} enrollments, {build.courses} courses, {build.pairs} co-enrolled course pairs in {build.seconds:.2f}s")
+
+    with get_read_session() as session:
+        for course_id in course_ids[:args.naive]:
+            started = time.perf_counter()
+            naive = naive_also_took(session, course_id, co_enrollment.top_k)
+            elapsed = time.perf_counter() - started
+            indexed = [(n.course_id, n.shared) for n in co_enrollment.also_took(course_id, co_enrollment.top_k)]
+            print(f"ORM walk for course {course_id}: {elapsed:.2f}s ({'same' if naive == indexed else 'DIFFERENT'} top {co_enrollment.top_k} as the index)")
+
+    rng = random.Random(args.seed)
+    timings = []
+    for _ in range(args.lookups):
+        course_id = rng.choice(course_ids)
+        started = time.perf_counter()
+        co_enrollment.also_took(course_id)
+        timings.append(time.perf_counter() - started)
+    print(f"Index lookups: median {statistics.median(timings) * 1000:.2f} ms over {args.lookups}")
+
+    timings = []
+    applied = 0
+    for email, name in students:
+        course_id = rng.choice(course_ids)
+        try:
+            run_transaction(lambda session: enroll_student(session, name, email, course_id))
+        except (AlreadyEnrolledError, CourseFullError):
+            continue
+        applied += 1
+        started = time.perf_counter()
+        co_enrollment.ensure_current()
+        timings.append(time.perf_counter() - started)
+    rebuilt = CoEnrollmentIndex()
+    with engine.connect() as conn:
+        rebuild = rebuilt.build(conn)
+    same = rebuilt.rows == co_enrollment.rows and rebuilt.top == co_enrollment.top
+    print(f"Incremental refresh: median {statistics.median(timings) * 1000:.2f} ms per new enrollment over {applied}, "
+          f"vs {rebuild.seconds:.2f}s full rebuild; {'matches' if same else 'DIFFERS FROM'} the rebuild")
+    sys.exit(0 if same else 1)
+
+if __name__ == "__main__":
+    main()
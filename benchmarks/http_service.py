@@ -0,0 +1,89 @@
+"""
+Measures read throughput of the JSON service (python main.py serve).
+
+Starts the service on a free local port against DATABASE_URL, then has
+--clients keep-alive connections fetch instructors and courses by ID for
+--seconds, first with the response cache disabled (TTL 0), then cached, then
+revalidating with If-None-Match (304 responses).
+
+    python benchmarks/http_service.py --clients 8 --seconds 5
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_service(port: int, cache_ttl: str) -> subprocess.Popen:
+    env = dict(os.environ, VIRTULEARN_HTTP_CACHE_TTL=cache_ttl)
+    process = subprocess.Popen([sys.executable, "main.py", "serve", "--port", str(port)], cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit("The service did not start.")
+
+def client(port: int, paths: list[str], seconds: float, revalidate: bool, seed: int, counts: list):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    etags = {}
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths)
+        headers = {"If-None-Match": etags[path]} if revalidate and path in etags else {}
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status not in (200, 304):
+            raise RuntimeError(f"GET {path} returned {response.status}")
+        if revalidate and response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+        done += 1
+    conn.close()
+    counts[seed] = done
+
+def measure(port: int, paths: list[str], clients: int, seconds: float, revalidate: bool = False) -> float:
+    counts = [0] * clients
+    threads = [threading.Thread(target=client, args=(port, paths, seconds, revalidate, seed, counts)) for seed in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--ids", type=int, default=200, help="Distinct instructor and course IDs requested.")
+    args = parser.parse_args()
+
+    paths = [f"/{kind}/{item_id}" for kind in ("instructors", "courses") for item_id in range(1, args.ids + 1)]
+    for label, cache_ttl, revalidate in (("uncached", "0", False), ("cached", "60", False), ("revalidated (304)", "60", True)):
+        port = free_port()
+        service = start_service(port, cache_ttl)
+        try:
+            rate = measure(port, paths, args.clients, args.seconds, revalidate)
+        finally:
+            service.terminate()
+            service.wait()
+        print(f"{label:<18} {rate:10,.0f} req/s")
+
+if __name__ == "__main__":
+    main()
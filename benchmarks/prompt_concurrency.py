@@ -0,0 +1,152 @@
+"""
+Checks that writers are never blocked by a user sitting at a prompt.
+
+Each case runs an interactive command in a thread with scripted answers
+and holds it at one prompt (a delete confirmation, or the next-page prompt
+of a listing) for --seconds, while the main thread keeps enrolling
+students through lib.services. Every write's latency is recorded; on a WAL
+database a checkpoint is also attempted while the user waits. The control
+case keeps a read transaction open across its prompt, as the commands used
+to, and is expected to stall writers (or, in WAL mode, the checkpoint).
+Exits with status 1 if any command case delays a write by more than
+--threshold-ms, makes one fail, or leaves WAL frames it could not
+checkpoint.
+
+    python benchmarks/prompt_concurrency.py --profile default
+    python benchmarks/prompt_concurrency.py --profile production
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAUSE = object()
+
+class ScriptedStdin:
+    """
+    Stands in for sys.stdin: answers prompts from a script, and at PAUSE
+    signals that the user has reached the prompt and waits to be released.
+    """
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.waiting = threading.Event()
+        self.release = threading.Event()
+
+    def readline(self):
+        answer = self.answers.pop(0)
+        if answer is PAUSE:
+            self.waiting.set()
+            self.release.wait()
+            answer = self.answers.pop(0)
+        return f"{answer}\n"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profile", default="default", help="Engine profile: default (rollback journal) or production (WAL).")
+    parser.add_argument("--seconds", type=float, default=2.0, help="How long the user sits at each prompt.")
+    parser.add_argument("--threshold-ms", type=float, default=500.0, help="Longest acceptable write while a user waits.")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="virtulearn-prompt-")
+    # Set before lib is imported; small pages so the listing reaches its prompt.
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'prompt.db')}"
+    os.environ["VIRTULEARN_DB_PROFILE"] = args.profile
+    os.environ["VIRTULEARN_PAGE_SIZE"] = "5"
+    from lib.database import create_db_tables, engine, get_read_session
+    from lib.helpers import validate_input, get_course_by_id
+    from lib import cli, services
+
+    create_db_tables(verbose=False)
+    instructor = services.add_instructor("Prompt Instructor", "prompt@faculty.example.com")
+    target = services.add_course("Writers' Course", 30, instructor.id)
+    courses = [services.add_course(f"Prompt Course {number}", 30, instructor.id).id for number in range(12)]
+    enrollments = [services.enroll_student(f"Student {number}", f"student{number}@example.com", courses[number % 3]).id for number in range(6)]
+    doomed = services.add_instructor("Leaving Instructor", "leaving@faculty.example.com")
+    with engine.connect() as conn:
+        wal = conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+    def held_transaction():
+        # The old shape: look the row up, then ask with the session still open.
+        with get_read_session() as session:
+            course_id = validate_input("Enter course ID to delete: ", type_func=int)
+            course = get_course_by_id(session, course_id)
+            input(f"Are you sure you want to delete course '{course.title}'? (yes/no): ")
+
+    cases = [
+        ("control: transaction held at prompt", held_transaction, [courses[0], PAUSE, "no"], True),
+        ("delete_instructor_cli", cli.delete_instructor_cli, [doomed.id, PAUSE, "yes"], False),
+        ("delete_course_cli", cli.delete_course_cli, [courses[-1], PAUSE, "yes"], False),
+        ("delete_enrollment_cli", cli.delete_enrollment_cli, [enrollments[0], PAUSE, "yes"], False),
+        ("bulk_delete_enrollments_cli", cli.bulk_delete_enrollments_cli, ["2", courses[1], PAUSE, "yes"], False),
+        ("list_courses_cli (next page)", cli.list_courses_cli, [PAUSE, "q"], False),
+    ]
+
+    failed = False
+    student = 0
+    print(f"{args.profile} profile ({'WAL' if wal else 'rollback journal'}), user waits {args.seconds:.1f}s at each prompt")
+    for label, command, answers, control in cases:
+        stdin = ScriptedStdin(answers)
+        errors = []
+
+        def user():
+            try:
+                command()
+            except Exception as e:
+                errors.append(e)
+
+        original, sys.stdin = sys.stdin, stdin
+        # Releases the user even if a write is stuck behind their transaction.
+        timer = threading.Timer(args.seconds + 1, stdin.release.set)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                thread = threading.Thread(target=user)
+                thread.start()
+                stdin.waiting.wait()
+                timer.start()
+                latencies = []
+                write_errors = []
+                deadline = time.perf_counter() + args.seconds
+                while time.perf_counter() < deadline:
+                    student += 1
+                    started = time.perf_counter()
+                    try:
+                        services.enroll_student(f"Writer {student}", f"writer{student}@example.com", target.id)
+                    except Exception as e:
+                        write_errors.append(str(e).splitlines()[0])
+                    latencies.append(time.perf_counter() - started)
+                checkpoint = ""
+                if wal:
+                    with engine.connect() as conn:
+                        busy, frames, moved = conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").one()
+                    checkpoint = f", checkpointed {moved}/{frames} WAL frames"
+                    stuck = moved < frames
+                else:
+                    stuck = False
+                stdin.release.set()
+                thread.join()
+        finally:
+            timer.cancel()
+            sys.stdin = original
+        slowest = max(latencies) * 1000
+        blocked = slowest > args.threshold_ms or bool(write_errors) or stuck
+        verdict = ("blocked, as expected" if blocked else "NOT blocked (control should be)") if control else ("FAIL" if blocked else "ok")
+        if not control and (blocked or errors):
+            failed = True
+        print(f"  {label:<38} {len(latencies):>5} writes, median {statistics.median(latencies) * 1000:7.2f} ms, "
+              f"max {slowest:8.2f} ms, {len(write_errors)} failed{checkpoint}: {verdict}")
+        for error in errors:
+            print(f"    command raised: {error}")
+        for error in sorted(set(write_errors)):
+            print(f"    write failed: {error}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Registration-open stress test for concurrent enrollment.
+
+Creates a fresh database with --courses courses of --capacity seats each,
+then has --processes processes with --threads threads each enroll random
+students from a pool of --students into random courses at the same time,
+with far more demand than seats. Afterwards every course is checked for
+oversubscription, duplicate enrollments and counter drift, and the
+sustained enrollment rate is reported. Exits with status 1 on any
+violation.
+
+    python benchmarks/registration_stress.py --processes 8 --threads 4 --attempts 200
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def setup(courses: int, capacity: int) -> list[int]:
+    from lib.database import create_db_tables, run_transaction
+    from lib.operations import add_instructor, add_course
+
+    def work(session):
+        instructor = add_instructor(session, "Stress Instructor", "stress@faculty.example.com")
+        return [add_course(session, f"Stress Course {number}", 30, instructor.id, capacity).id for number in range(courses)]
+
+    create_db_tables(verbose=False)
+    return run_transaction(work)
+
+def worker(course_ids, students: int, threads: int, attempts: int, seed: int, start, results):
+    from sqlalchemy.exc import IntegrityError, OperationalError
+    from lib.database import run_transaction
+    from lib.operations import enroll_student, CourseFullError, AlreadyEnrolledError
+
+    def enroll(session, student: int, course_id: int) -> int:
+        return enroll_student(session, f"Student {student}", f"student{student}@example.com", course_id).id
+
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def run(thread_seed: int):
+        rng = random.Random(thread_seed)
+        local = Counter()
+        for _ in range(attempts):
+            try:
+                run_transaction(enroll, rng.randrange(students), rng.choice(course_ids))
+                local["enrolled"] += 1
+            except CourseFullError:
+                local["course full"] += 1
+            except AlreadyEnrolledError:
+                local["already enrolled"] += 1
+            except IntegrityError:
+                local["unique index conflict"] += 1
+            except OperationalError:
+                local["busy after retries"] += 1
+        with lock:
+            outcomes.update(local)
+
+    pool = [threading.Thread(target=run, args=(seed * 1000 + number,)) for number in range(threads)]
+    start.wait()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(dict(outcomes))
+
+def check(course_ids) -> list[str]:
+    from sqlalchemy import select, func
+    from lib.database import engine
+    from lib.models.course import Course
+    from lib.models.enrollment import Enrollment
+
+    problems = []
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Course.id, Course.capacity, Course.enrollment_count, func.count(Enrollment.id))
+            .outerjoin(Enrollment, Enrollment.course_id == Course.id)
+            .where(Course.id.in_(course_ids))
+            .group_by(Course.id, Course.capacity, Course.enrollment_count)
+        ).all()
+        duplicates = conn.execute(
+            select(func.count()).select_from(
+                select(Enrollment.student_id).group_by(Enrollment.student_id, Enrollment.course_id).having(func.count() > 1).subquery()
+            )
+        ).scalar()
+    for course_id, capacity, counter, enrolled in rows:
+        if enrolled > capacity:
+            problems.append(f"course {course_id}: {enrolled} enrollments for {capacity} seats")
+        if counter != enrolled:
+            problems.append(f"course {course_id}: enrollment_count {counter}, actual {enrolled}")
+    if duplicates:
+        problems.append(f"{duplicates} students enrolled in the same course more than once")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--attempts", type=int, default=200, help="Enrollment attempts per thread.")
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--profile", default="production", help="Engine profile for the test database.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="virtulearn-stress-")
+    # Set before lib is imported here or in the spawned workers.
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'stress.db')}"
+    os.environ["VIRTULEARN_DB_PROFILE"] = args.profile
+    course_ids = setup(args.courses, args.capacity)
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(course_ids, args.students, args.threads, args.attempts, args.seed + number, start, results))
+        for number in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    # Let the workers finish importing before the clock starts.
+    time.sleep(3)
+    started = time.perf_counter()
+    start.set()
+    outcomes = Counter()
+    for _ in processes:
+        outcomes.update(results.get())
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    attempts = sum(outcomes.values())
+    seats = args.courses * args.capacity
+    print(f"{args.processes} processes x {args.threads} threads, {attempts} attempts for {seats} seats in {args.courses} courses ({args.profile} profile)")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:>22}: {count}")
+    print(f"  {outcomes['enrolled'] / elapsed:.1f} enrollments/s, {attempts / elapsed:.1f} attempts/s ({elapsed:.2f}s)")
+    problems = check(course_ids)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if not problems:
+        print("OK: no course oversubscribed, no duplicate enrollments, counters match.")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Checks that a lagging read replica never feeds the lookup or response caches.
+
+Sets up a primary and a replica SQLite file, copies the primary with the
+stand-in replicator (lib.replica), then changes the primary without
+copying again, so the replica lags. Each case reads the stale row through
+the replica, as a command or GET request would, and then checks that a
+later write or read is not answered from a cached copy of it:
+
+- enrolling in a course deleted on the primary raises NotFoundError, not
+  CourseFullError from the replica's full course;
+- adding an instructor whose email was freed on the primary succeeds;
+- a GET after a write, once the replica has caught up, shows the write.
+
+Runs with VIRTULEARN_CACHE=1 and exits with status 1 if any case fails.
+
+    python benchmarks/replica_cache.py
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def main():
+    directory = tempfile.mkdtemp(prefix="virtulearn-replica-")
+    # Set before lib is imported.
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'primary.db')}"
+    os.environ["DATABASE_READ_URL"] = f"sqlite:///{os.path.join(directory, 'replica.db')}"
+    os.environ["VIRTULEARN_CACHE"] = "1"
+    from lib.database import create_db_tables, read_your_writes, get_read_session
+    from lib.helpers import get_instructor_by_email
+    from lib.replica import replicate_once
+    from lib.operations import OperationError, NotFoundError
+    from lib.server import make_server
+    from lib import services
+
+    # Every step is its own command, as in the menu, so a write only pins
+    # the reads of the step that made it to the primary.
+    def step(action, *args):
+        with read_your_writes():
+            return action(*args)
+
+    create_db_tables(verbose=False)
+    instructor = step(services.add_instructor, "Leaving Instructor", "leaving@faculty.example.com")
+    course = step(services.add_course, "Full Course", 6, instructor.id, 1)
+    step(services.enroll_student, "First Student", "first@example.com", course.id)
+    replicate_once()
+    step(services.delete_course, course.id)
+    step(services.delete_instructor, instructor.id)
+
+    failed = False
+
+    def check(label: str, ok: bool, detail: str):
+        nonlocal failed
+        failed |= not ok
+        print(f"  {label:<48} {'ok' if ok else 'FAIL'}: {detail}")
+
+    print("replica lags the primary by one delete_course and one delete_instructor")
+    stale = step(services.get_course, course.id)
+    check("replica still has the deleted course", stale is not None, "read through the replica")
+    try:
+        step(services.enroll_student, "Late Student", "late@example.com", course.id)
+        check("enroll in the deleted course", False, "enrolled")
+    except NotFoundError as e:
+        check("enroll in the deleted course", True, f"NotFoundError: {e}")
+    except OperationError as e:
+        check("enroll in the deleted course", False, f"{type(e).__name__}: {e}")
+
+    def find_instructor_by_email(email):
+        with get_read_session() as session:
+            return get_instructor_by_email(session, email) is not None
+
+    found = step(find_instructor_by_email, "leaving@faculty.example.com")
+    check("replica still has the deleted instructor", found, "read through the replica")
+    try:
+        again = step(services.add_instructor, "Returning Instructor", "leaving@faculty.example.com")
+        check("re-add the deleted instructor's email", True, f"instructor {again.id} added")
+    except OperationError as e:
+        check("re-add the deleted instructor's email", False, str(e))
+
+    replicate_once()
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def request(method: str, path: str, body: dict | None = None):
+        data = json.dumps(body).encode() if body is not None else None
+        with urllib.request.urlopen(urllib.request.Request(base + path, data, method=method)) as response:
+            return json.loads(response.read() or b"null")
+
+    try:
+        created = request("POST", "/courses", {"title": "Served Course", "capacity": 10})
+        request("PUT", f"/courses/{created['id']}/capacity", {"capacity": 20})
+        replicate_once()
+        request("PUT", f"/courses/{created['id']}/capacity", {"capacity": 30})
+        lagging = request("GET", f"/courses/{created['id']}")
+        replicate_once()
+        caught_up = request("GET", f"/courses/{created['id']}")
+        check("GET while the replica lags", lagging["capacity"] == 20, f"capacity {lagging['capacity']}")
+        check("GET once the replica caught up", caught_up["capacity"] == 30, f"capacity {caught_up['capacity']}")
+    finally:
+        server.shutdown()
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Times the helpers, reports, search and the CLI list/find/delete paths on
+synthetic databases of increasing size and checks each operation against a
+statement budget, so N+1 query regressions fail loudly.
+
+For every scale a fresh SQLite database is generated with lib.datagen (in a
+subprocess, since the engine is bound at import time). Results are written
+as JSON; pass a previous results file as --baseline to flag slowdowns.
+
+    python benchmarks/suite.py --scales 10000,100000,1000000 --output results.json
+    python benchmarks/suite.py --baseline results.json
+
+Exits with status 1 if any operation exceeds its statement budget or, with
+--baseline, is more than --tolerance times slower than the baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SCALES = "10000,100000"
+DEFAULT_REPEAT = 5
+# Timings below this are too noisy to compare against a baseline.
+MIN_COMPARABLE_MS = 5
+
+# Maximum statements per operation, independent of data size. BEGIN is not
+# counted. Eager-loaded views cost one statement per relationship level;
+# co-enrollment suggestions cost one change log read.
+BUDGETS = {
+    "get_instructor_by_id": 1,
+    "get_instructor_by_email": 1,
+    "get_course_by_id": 1,
+    "get_enrollment_by_id": 1,
+    "get_enrollments_by_student_email": 1,
+    "get_instructor_details_by_id": 3,
+    "get_instructor_details_by_email": 3,
+    "get_course_details_by_id": 2,
+    "get_enrollment_details_by_id": 1,
+    "get_instructors_page": 1,
+    "get_courses_page": 2,
+    "get_enrollments_page": 1,
+    "stream_courses (last 1000)": 3,
+    "stream_enrollments (last 10000)": 1,
+    "list_instructors_with_details": 3,
+    "list_courses_with_details": 2,
+    "list_enrollments_with_details": 1,
+    "report enrollments_per_course": 1,
+    "report enrollments_per_instructor": 1,
+    "report enrollments_per_month": 1,
+    "course_summary": 2,
+    "instructor_summary": 2,
+    "search_instructors": 1,
+    "search_courses": 1,
+    "search_students": 1,
+    "list_instructors_cli": 3,
+    "list_courses_cli (first page)": 2,
+    "list_enrollments_cli (first page)": 1,
+    "find_instructor_cli": 3,
+    "find_instructor_by_email_cli": 3,
+    "find_course_cli": 3,
+    "find_enrollment_cli": 1,
+    "find_enrollments_by_email_cli": 2,
+    "delete_enrollment": 4,
+    "delete_course": 6,
+    "delete_instructor": 4,
+    "delete_enrollments_for_course": 6,
+}
+
+def dataset_shape(enrollments: int) -> tuple[int, int, int]:
+    """
+    Returns (instructors, courses, enrollments) for a scale.
+    """
+    return max(10, enrollments // 1000), max(50, enrollments // 200), enrollments
+
+# --- worker: runs inside a process whose DATABASE_URL points at the scale's database
+
+def run_scale(scale: int, repeat: int) -> dict:
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import event, select, func
+    from lib.database import engine, get_session, create_db_tables
+    from lib import helpers, reports, search, cli, operations
+    from lib.analytics import co_enrollment
+    from lib.datagen import generate
+    from lib.models.instructor import Instructor
+    from lib.models.course import Course
+    from lib.models.enrollment import Enrollment
+
+    create_db_tables(verbose=False)
+    shape = dataset_shape(scale)
+    generated = generate(*shape)
+
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if statement != "BEGIN":
+            statements[0] += 1
+
+    with get_session() as session:
+        busiest_instructor = session.scalars(select(Instructor).order_by(Instructor.student_count.desc()).limit(1)).one()
+        busiest_course = session.scalars(select(Course).order_by(Course.enrollment_count.desc()).limit(1)).one()
+        busiest_student = session.execute(
+            select(Enrollment.student_email).group_by(Enrollment.student_email).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        max_enrollment = session.execute(select(func.max(Enrollment.id))).scalar()
+        max_course = session.execute(select(func.max(Course.id))).scalar()
+        # Delete targets: typical rows, one per repetition, never the ones read above.
+        delete_enrollments = session.scalars(select(Enrollment.id).where(Enrollment.course_id != busiest_course.id).order_by(Enrollment.id).limit(repeat)).all()
+        delete_courses = session.scalars(
+            select(Course.id).where(Course.id != busiest_course.id, Course.instructor_id != busiest_instructor.id)
+            .order_by(Course.enrollment_count.desc()).offset(shape[1] // 2).limit(repeat)
+        ).all()
+        clear_courses = session.scalars(
+            select(Course.id).where(Course.id != busiest_course.id, Course.id.not_in(delete_courses))
+            .order_by(Course.enrollment_count.desc()).offset(shape[1] // 4).limit(repeat)
+        ).all()
+        delete_instructors = session.scalars(
+            select(Instructor.id).where(Instructor.id != busiest_instructor.id)
+            .order_by(Instructor.student_count.desc()).offset(shape[0] // 4).limit(repeat)
+        ).all()
+        instructor_id, instructor_email, course_id = busiest_instructor.id, busiest_instructor.email, busiest_course.id
+        search_term = busiest_instructor.name.split()[0][:3]
+    enrollment_id = max_enrollment // 2
+    # Built once per process like the other caches; each lookup after that
+    # costs one change log read.
+    co_enrollment.ensure_current()
+
+    def in_session(helper, *args):
+        def run():
+            with get_session() as session:
+                result = helper(session, *args)
+                if hasattr(result, "__iter__") and not isinstance(result, (str, bytes)):
+                    for _ in result:
+                        pass
+        return run
+
+    def cli_run(command, *answers):
+        def run():
+            stdin = sys.stdin
+            sys.stdin = io.StringIO("".join(f"{answer}\n" for answer in answers))
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    command()
+            finally:
+                sys.stdin = stdin
+        return run
+
+    def deleting(operation, targets):
+        remaining = list(targets)
+        def run():
+            with get_session() as session:
+                operation(session, remaining.pop(0))
+        return run
+
+    cases = [
+        ("get_instructor_by_id", in_session(helpers.get_instructor_by_id, instructor_id)),
+        ("get_instructor_by_email", in_session(helpers.get_instructor_by_email, instructor_email)),
+        ("get_course_by_id", in_session(helpers.get_course_by_id, course_id)),
+        ("get_enrollment_by_id", in_session(helpers.get_enrollment_by_id, enrollment_id)),
+        ("get_enrollments_by_student_email", in_session(helpers.get_enrollments_by_student_email, busiest_student)),
+        ("get_instructor_details_by_id", in_session(helpers.get_instructor_details_by_id, instructor_id)),
+        ("get_instructor_details_by_email", in_session(helpers.get_instructor_details_by_email, instructor_email)),
+        ("get_course_details_by_id", in_session(helpers.get_course_details_by_id, course_id)),
+        ("get_enrollment_details_by_id", in_session(helpers.get_enrollment_details_by_id, enrollment_id)),
+        ("get_instructors_page", in_session(helpers.get_instructors_page, 0)),
+        ("get_courses_page", in_session(helpers.get_courses_page, 0)),
+        ("get_enrollments_page", in_session(helpers.get_enrollments_page, enrollment_id)),
+        ("stream_courses (last 1000)", in_session(helpers.stream_courses, max(0, max_course - 1000))),
+        ("stream_enrollments (last 10000)", in_session(helpers.stream_enrollments, max(0, max_enrollment - 10000))),
+        ("list_instructors_with_details", in_session(helpers.list_instructors_with_details)),
+        ("list_courses_with_details", in_session(helpers.list_courses_with_details)),
+        ("list_enrollments_with_details", in_session(helpers.list_enrollments_with_details)),
+        ("report enrollments_per_course", reports.enrollments_per_course),
+        ("report enrollments_per_instructor", reports.enrollments_per_instructor),
+        ("report enrollments_per_month", reports.enrollments_per_month),
+        ("course_summary", reports.course_summary),
+        ("instructor_summary", reports.instructor_summary),
+        ("search_instructors", lambda: search.search_instructors(search_term)),
+        ("search_courses", lambda: search.search_courses("data")),
+        ("search_students", lambda: search.search_students(search_term)),
+        ("list_instructors_cli", cli_run(cli.list_instructors_cli)),
+        ("list_courses_cli (first page)", cli_run(cli.list_courses_cli, "q")),
+        ("list_enrollments_cli (first page)", cli_run(cli.list_enrollments_cli, "q")),
+        ("find_instructor_cli", cli_run(cli.find_instructor_cli, instructor_id)),
+        ("find_instructor_by_email_cli", cli_run(cli.find_instructor_by_email_cli, instructor_email)),
+        ("find_course_cli", cli_run(cli.find_course_cli, course_id)),
+        ("find_enrollment_cli", cli_run(cli.find_enrollment_cli, enrollment_id)),
+        ("find_enrollments_by_email_cli", cli_run(cli.find_enrollments_by_email_cli, busiest_student, "no")),
+        ("delete_enrollment", deleting(operations.delete_enrollment, delete_enrollments)),
+        ("delete_course", deleting(operations.delete_course, delete_courses)),
+        ("delete_instructor", deleting(operations.delete_instructor, delete_instructors)),
+        ("delete_enrollments_for_course", deleting(operations.delete_enrollments_for_course, clear_courses)),
+    ]
+
+    results = {}
+    for name, run in cases:
+        timings = []
+        counts = []
+        for _ in range(repeat):
+            statements[0] = 0
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+            counts.append(statements[0])
+        results[name] = {
+            "median_ms": round(statistics.median(timings) * 1000, 3),
+            "min_ms": round(min(timings) * 1000, 3),
+            "statements": max(counts),
+            "budget": BUDGETS.get(name),
+        }
+    return {
+        "instructors": shape[0],
+        "courses": shape[1],
+        "enrollments": shape[2],
+        "students": generated.students,
+        "generate_seconds": round(generated.seconds, 2),
+        "operations": results,
+    }
+
+# --- orchestrator
+
+def measure_scale(scale: int, repeat: int, keep: str | None) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(keep or directory, f"bench-{scale}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", VIRTULEARN_CACHE="0", VIRTULEARN_PROFILE="0")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(scale), "--repeat", str(repeat)],
+            cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+def compare(results: dict, baseline: dict | None, tolerance: float) -> list[str]:
+    problems = []
+    for scale, data in results["scales"].items():
+        base_operations = (baseline or {}).get("scales", {}).get(scale, {}).get("operations", {})
+        for name, result in data["operations"].items():
+            if result["budget"] is not None and result["statements"] > result["budget"]:
+                problems.append(f"{scale}: {name} issued {result['statements']} statements (budget {result['budget']})")
+            base = base_operations.get(name)
+            if base and base["median_ms"] >= MIN_COMPARABLE_MS and result["median_ms"] > base["median_ms"] * tolerance:
+                problems.append(f"{scale}: {name} took {result['median_ms']:.1f} ms (baseline {base['median_ms']:.1f} ms)")
+    return problems
+
+def print_table(results: dict, baseline: dict | None):
+    for scale, data in results["scales"].items():
+        print(f"\n{int(scale):,} enrollments ({data['instructors']:,} instructors, {data['courses']:,} courses, {data['students']:,} students; generated in {data['generate_seconds']}s)")
+        base_operations = (baseline or {}).get("scales", {}).get(scale, {}).get("operations", {})
+        for name, result in data["operations"].items():
+            line = f"  {name:<36} {result['median_ms']:>10.2f} ms  {result['statements']:>3}/{result['budget']} stmts"
+            base = base_operations.get(name)
+            if base and base["median_ms"]:
+                line += f"  {result['median_ms'] / base['median_ms']:5.2f}x baseline"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated enrollment counts.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed slowdown factor against the baseline.")
+    parser.add_argument("--keep-databases", metavar="DIR", help="Keep the generated databases in DIR.")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scale(args.worker, args.repeat)))
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for scale in (int(value) for value in args.scales.split(",")):
+        print(f"Generating and measuring {scale:,} enrollments...", flush=True)
+        results["scales"][str(scale)] = measure_scale(scale, args.repeat, args.keep_databases)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print_table(results, baseline)
+    problems = compare(results, baseline, args.tolerance)
+    print(f"\nResults written to {args.output}")
+    if problems:
+        print("\nFAILED:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from datetime import datetime
+from sqlalchemy import select, update, delete
+from lib.database import engine
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.models.student import Student
+
+def cli_queries():
+    """
+    Returns (label, statement) pairs mirroring the lookups, eager loads,
+    pagination and cascades the CLI issues. Whole-table listings are left
+    out because they scan by design.
+    """
+    return [
+        ("instructor by email", select(Instructor).where(Instructor.email == "someone@example.com")),
+        ("student by email", select(Student).where(Student.email == "student@example.com")),
+        ("enrollments by student", select(Enrollment).where(Enrollment.student_id == 1)),
+        ("student enrolled in course", select(Enrollment.id).where(Enrollment.student_id == 1, Enrollment.course_id == 1)),
+        ("instructor.courses (lazy/selectin load)", select(Course).where(Course.instructor_id.in_([1, 2, 3]))),
+        ("instructor.enrollments (lazy/selectin load)", select(Enrollment).where(Enrollment.instructor_id.in_([1, 2, 3]))),
+        ("course.enrollments (lazy/selectin load)", select(Enrollment).where(Enrollment.course_id.in_([1, 2, 3]))),
+        ("enrollments page (keyset)", select(Enrollment).where(Enrollment.id > 1000).order_by(Enrollment.id).limit(50)),
+        ("courses page (keyset)", select(Course).where(Course.id > 1000).order_by(Course.id).limit(50)),
+        ("enrollments before date", select(Enrollment.id).where(Enrollment.enrollment_date < datetime(2024, 1, 1))),
+        ("delete course cascade", delete(Enrollment).where(Enrollment.course_id == 1)),
+        ("delete instructor nullify courses", update(Course).where(Course.instructor_id == 1).values(instructor_id=None)),
+        ("delete instructor nullify enrollments", update(Enrollment).where(Enrollment.instructor_id == 1).values(instructor_id=None)),
+    ]
+
+def _is_scan(detail: str) -> bool:
+    # SQLite reports full table scans as "SCAN <table>"; "SCAN <table> USING
+    # (COVERING) INDEX" still visits every index entry, so flag it too.
+    # Scans of temporary B-trees and constant rows are harmless.
+    return detail.startswith("SCAN") and "CONSTANT ROW" not in detail
+
+def explain_cli_queries() -> list[dict]:
+    """
+    Runs EXPLAIN QUERY PLAN for every query in cli_queries() and returns
+    one report per query with its plan lines and any scans found.
+    """
+    if engine.dialect.name != "sqlite":
+        raise RuntimeError("The index advisor currently supports SQLite only.")
+    reports = []
+    with engine.connect() as conn:
+        for label, statement in cli_queries():
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+            reports.append({
+                "query": label,
+                "sql": " ".join(sql.split()),
+                "plan": plan,
+                "scans": [detail for detail in plan if _is_scan(detail)],
+            })
+    return reports
@@ -0,0 +1,293 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+import numpy as np
+from sqlalchemy import select, func
+from lib.database import engine
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.models.change import Change
+from lib.changes import ordered_log
+
+TOP_K = int(os.environ.get("VIRTULEARN_RECOMMEND_TOP_K", "10"))
+LOAD_CHUNK_SIZE = 100000
+# A refresh that has to apply more changes than this rebuilds instead.
+REBUILD_CHANGES = 20000
+
+# "Students who took this course also took ...". CoEnrollmentIndex loads
+# every (student, course) pair of the linked enrollments into NumPy arrays
+# and counts, for each pair of courses, the students they share, by
+# expanding each student's courses into all ordered pairs and counting
+# equal keys, which costs O(sum of courses per student squared) instead of a
+# Python walk over every course's enrollments. It keeps the full sparse
+# co-occurrence rows plus the top TOP_K neighbours of each course, ranked
+# by shared students; cosine similarity is worked out when read.
+#
+# The index lives in the process and follows the change log (lib.changes):
+# each lookup first reads the log after the index's cursor, which is one
+# statement when nothing changed. Changed enrollments are applied as exact
+# count deltas from their students' course sets, and only the courses whose
+# counts moved are re-ranked. Reads go to the primary, whose log and tables
+# match the cursor. Where the log can commit out of order (anything but
+# SQLite, see lib.changes.ordered_log) each lookup rebuilds the index instead.
+
+@dataclass
+class Neighbour:
+    course_id: int
+    title: str | None
+    shared: int  # students who took both courses
+    similarity: float  # shared / sqrt(students in one course * students in the other)
+
+@dataclass
+class IndexResult:
+    enrollments: int
+    courses: int
+    pairs: int
+    seconds: float
+
+def co_occurrence(students: np.ndarray, courses: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Counts the students shared by every pair of distinct courses, given one
+    (student, course) pair per enrollment. Returns (course, other course,
+    shared) arrays, ordered by course then other course, with both
+    orderings of each pair.
+    """
+    if len(courses) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    order = np.lexsort((courses, students))
+    students, courses = students[order], courses[order]
+    starts = np.flatnonzero(np.r_[True, students[1:] != students[:-1]])
+    sizes = np.diff(np.r_[starts, len(students)])
+    # Pair every enrollment with each enrollment of the same student.
+    group_size = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(len(courses)), group_size)
+    pair_start = np.repeat(np.cumsum(group_size) - group_size, group_size)
+    right = np.repeat(np.repeat(starts, sizes), group_size) + (np.arange(len(left)) - pair_start)
+    keep = left != right
+    base = int(courses.max()) + 1
+    keys, shared = np.unique(courses[left[keep]] * base + courses[right[keep]], return_counts=True)
+    return keys // base, keys % base, shared
+
+def _load_pairs(conn) -> np.ndarray:
+    # (enrollment ID, student ID, course ID) rows; fromiter over the flattened
+    # rows is far faster than building an array from Row objects.
+    result = conn.execute(
+        select(Enrollment.id, Enrollment.student_id, Enrollment.course_id)
+        .where(Enrollment.student_id.is_not(None), Enrollment.course_id.is_not(None))
+    )
+    chunks = [np.empty((0, 3), dtype=np.int64)]
+    while rows := result.fetchmany(LOAD_CHUNK_SIZE):
+        chunks.append(np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64, count=3 * len(rows)).reshape(-1, 3))
+    return np.concatenate(chunks)
+
+class CoEnrollmentIndex:
+    """
+    Top-K co-enrolled courses per course, built from every linked
+    enrollment and kept current from the change log.
+    """
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.cursor = None  # change log ID the index reflects; None until built
+        self.rows = {}  # course ID -> {other course ID: shared students}
+        self.popularity = {}  # course ID -> linked enrollments
+        self.titles = {}
+        self.top = {}  # course ID -> [(other course ID, shared)]
+        # Enrollment ID -> course and student ID (-1 if none), to undo changes.
+        self._course_of = np.empty(0, dtype=np.int32)
+        self._student_of = np.empty(0, dtype=np.int32)
+        self._lock = threading.Lock()
+
+    def _similarity(self, course_id: int, other_id: int, shared: int) -> float:
+        return shared / math.sqrt(self.popularity[course_id] * self.popularity[other_id])
+
+    def build(self, conn) -> IndexResult:
+        """
+        Rebuilds the whole index from the enrollments table.
+        """
+        started = time.perf_counter()
+        self.cursor = conn.execute(select(func.coalesce(func.max(Change.id), 0))).scalar()
+        self.titles = dict(conn.execute(select(Course.id, Course.title)).all())
+        pairs = _load_pairs(conn)
+        enrollment_ids, students, courses = pairs[:, 0], pairs[:, 1], pairs[:, 2]
+        size = int(enrollment_ids.max()) + 1 if len(pairs) else 0
+        self._course_of = np.full(size, -1, dtype=np.int32)
+        self._course_of[enrollment_ids] = courses
+        self._student_of = np.full(size, -1, dtype=np.int32)
+        self._student_of[enrollment_ids] = students
+
+        popular, counts = np.unique(courses, return_counts=True)
+        self.popularity = dict(zip(popular.tolist(), counts.tolist()))
+        rows, others, shared = co_occurrence(students, courses)
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype=np.int64)
+        self.rows = {
+            int(rows[start]): dict(zip(row_others.tolist(), row_shared.tolist()))
+            for start, row_others, row_shared in zip(starts, np.split(others, starts[1:]), np.split(shared, starts[1:]))
+        }
+        # Top K per course: sort by course, then most shared students first
+        # (ties by course ID), and keep each course's first K entries.
+        order = np.lexsort((others, -shared, rows))
+        rows, others, shared = rows[order], others[order], shared[order]
+        positions = np.arange(len(rows))
+        first = np.r_[True, rows[1:] != rows[:-1]] if len(rows) else np.empty(0, dtype=bool)
+        rank = positions - np.maximum.accumulate(np.where(first, positions, 0))
+        keep = rank < self.top_k
+        self.top = {}
+        for course_id, other_id, count in zip(rows[keep].tolist(), others[keep].tolist(), shared[keep].tolist()):
+            self.top.setdefault(course_id, []).append((other_id, count))
+        return IndexResult(len(pairs), len(self.popularity), int(len(rows)), time.perf_counter() - started)
+
+    def refresh(self, conn) -> int:
+        """
+        Applies the changes logged since the index's cursor, rebuilding if
+        there are more than REBUILD_CHANGES. Where the log is not ordered it
+        always rebuilds, without reading the log. Returns how many changes
+        were read.
+        """
+        if not ordered_log(conn):
+            self.build(conn)
+            return 0
+        changes = conn.execute(
+            select(Change.id, Change.table_name, Change.row_id)
+            .where(Change.id > self.cursor)
+            .order_by(Change.id)
+            .limit(REBUILD_CHANGES + 1)
+        ).all()
+        if len(changes) > REBUILD_CHANGES:
+            self.build(conn)
+            return len(changes)
+        if not changes:
+            return 0
+        changed = {"enrollments": set(), "courses": set()}
+        for _, table_name, row_id in changes:
+            if table_name in changed:
+                changed[table_name].add(row_id)
+        if changed["courses"]:
+            titles = dict(conn.execute(select(Course.id, Course.title).where(Course.id.in_(list(changed["courses"])))).all())
+            for course_id in changed["courses"]:
+                if course_id in titles:
+                    self.titles[course_id] = titles[course_id]
+                else:
+                    self.titles.pop(course_id, None)
+        if changed["enrollments"]:
+            self._apply_enrollments(conn, changed["enrollments"])
+        self.cursor = changes[-1].id
+        return len(changes)
+
+    def _grow(self, highest: int):
+        if highest >= len(self._course_of):
+            extra = max(highest + 1 - len(self._course_of), len(self._course_of) // 4)
+            self._course_of = np.concatenate([self._course_of, np.full(extra, -1, dtype=np.int32)])
+            self._student_of = np.concatenate([self._student_of, np.full(extra, -1, dtype=np.int32)])
+
+    def _apply_enrollments(self, conn, enrollment_ids: set[int]):
+        # For each student with a changed enrollment: their courses now come
+        # from the database, their courses before from undoing the changed
+        # enrollments. The old set's course pairs are subtracted from the
+        # counts and the new set's added, so each change costs O(courses
+        # per student squared), however popular the course.
+        before, after = {}, {}  # student -> courses of their changed enrollments
+        known = [eid for eid in enrollment_ids if eid < len(self._course_of)]
+        for eid in known:
+            if self._course_of[eid] >= 0:
+                before.setdefault(int(self._student_of[eid]), set()).add(int(self._course_of[eid]))
+        self._course_of[known] = -1
+        current = conn.execute(
+            select(Enrollment.id, Enrollment.student_id, Enrollment.course_id)
+            .where(Enrollment.id.in_(list(enrollment_ids)), Enrollment.student_id.is_not(None), Enrollment.course_id.is_not(None))
+        ).all()
+        if current:
+            self._grow(max(eid for eid, _, _ in current))
+        for eid, student_id, course_id in current:
+            self._course_of[eid] = course_id
+            self._student_of[eid] = student_id
+            after.setdefault(student_id, set()).add(course_id)
+        students = before.keys() | after.keys()
+        if not students:
+            return
+        courses_now = {}
+        for student_id, course_id in conn.execute(
+            select(Enrollment.student_id, Enrollment.course_id)
+            .where(Enrollment.student_id.in_(list(students)), Enrollment.course_id.is_not(None))
+        ):
+            courses_now.setdefault(student_id, set()).add(course_id)
+
+        pairs, popularity = Counter(), Counter()
+        for student_id in students:
+            new = courses_now.get(student_id, set())
+            old = (new - after.get(student_id, set())) | before.get(student_id, set())
+            popularity.update(new - old)
+            popularity.subtract(old - new)
+            pairs.update((a, b) for a in new for b in new if a != b)
+            pairs.subtract((a, b) for a in old for b in old if a != b)
+        touched = set()
+        for (course_id, other_id), delta in pairs.items():
+            if delta:
+                row = self.rows.setdefault(course_id, {})
+                row[other_id] = row.get(other_id, 0) + delta
+                if not row[other_id]:
+                    del row[other_id]
+                touched.add(course_id)
+        for course_id, delta in popularity.items():
+            self.popularity[course_id] = self.popularity.get(course_id, 0) + delta
+            if not self.popularity[course_id]:
+                del self.popularity[course_id]
+        for course_id in touched:
+            self._rank(course_id)
+
+    def _rank(self, course_id: int):
+        row = self.rows.get(course_id)
+        if not row:
+            self.rows.pop(course_id, None)
+            self.top.pop(course_id, None)
+            return
+        self.top[course_id] = heapq.nsmallest(self.top_k, row.items(), key=lambda item: (-item[1], item[0]))
+
+    def ensure_current(self):
+        """
+        Builds the index on first use, then brings it up to date.
+        """
+        with self._lock, engine.connect() as conn:
+            if self.cursor is None:
+                self.build(conn)
+            else:
+                self.refresh(conn)
+
+    def also_took(self, course_id: int, limit: int = 5) -> list[Neighbour]:
+        """
+        Courses most often taken by the students of course_id.
+        """
+        self.ensure_current()
+        return [
+            Neighbour(other_id, self.titles.get(other_id), shared, self._similarity(course_id, other_id, shared))
+            for other_id, shared in self.top.get(course_id, [])[:limit]
+        ]
+
+    def recommend(self, course_ids, limit: int = 5) -> list[Neighbour]:
+        """
+        Courses most often taken alongside any of course_ids, excluding
+        those; shared and similarity are summed over course_ids.
+        """
+        self.ensure_current()
+        taken = set(course_ids)
+        shared, similarity = {}, {}
+        for course_id in taken:
+            for other_id, count in self.rows.get(course_id, {}).items():
+                if other_id not in taken:
+                    shared[other_id] = shared.get(other_id, 0) + count
+                    similarity[other_id] = similarity.get(other_id, 0.0) + self._similarity(course_id, other_id, count)
+        best = heapq.nlargest(limit, shared, key=lambda other_id: (shared[other_id], similarity[other_id]))
+        return [Neighbour(other_id, self.titles.get(other_id), shared[other_id], similarity[other_id]) for other_id in best]
+
+co_enrollment = CoEnrollmentIndex()
+
+def also_took(course_id: int, limit: int = 5) -> list[Neighbour]:
+    return co_enrollment.also_took(course_id, limit)
+
+def recommend_courses(course_ids, limit: int = 5) -> list[Neighbour]:
+    return co_enrollment.recommend(course_ids, limit)
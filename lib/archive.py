@@ -0,0 +1,96 @@
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select, insert, delete, func, union_all, literal
+from sqlalchemy.orm import Session
+from lib.database import get_session, read_engine
+from lib.models.enrollment import Enrollment
+from lib.models.archived_enrollment import ArchivedEnrollment
+from lib.counters import subtract_enrollments
+from lib.operations import parse_cutoff
+
+ARCHIVE_CHUNK_SIZE = int(os.environ.get("VIRTULEARN_ARCHIVE_CHUNK_SIZE", "5000"))
+
+# Enrollments from past terms are moved to enrollments_archive so listings,
+# lookups and counters only deal with the active table. Rows move in chunks
+# of ARCHIVE_CHUNK_SIZE, each in its own short transaction, so other writers
+# only ever wait for one chunk. Readers that want the full history opt in
+# with include_history, which unions the archive back in.
+
+enrollments = Enrollment.__table__
+archive = ArchivedEnrollment.__table__
+COLUMNS = ("id", "student_name", "student_email", "student_id", "course_id", "instructor_id", "enrollment_date")
+
+@dataclass
+class ArchiveResult:
+    archived: int
+    chunks: int
+    seconds: float
+
+def move_to_archive(session: Session, *criteria) -> int:
+    """
+    Moves the enrollments matching criteria into the archive and takes them
+    off the counters, in session's transaction. Returns how many moved.
+    """
+    conn = session.connection()
+    columns = [enrollments.c[name] for name in COLUMNS]
+    conn.execute(insert(archive).from_select(
+        [*COLUMNS, "archived_at"],
+        select(*columns, literal(datetime.now(), archive.c.archived_at.type)).where(*criteria),
+    ))
+    subtract_enrollments(session, *criteria)
+    return conn.execute(delete(enrollments).where(*criteria)).rowcount
+
+def archive_enrollments(before, chunk_size: int = ARCHIVE_CHUNK_SIZE, progress=None) -> ArchiveResult:
+    """
+    Moves every enrollment dated before the cutoff (YYYY-MM-DD) into the
+    archive, oldest IDs first, and takes it off the enrollment counters.
+    progress, if given, is called with the running total after each chunk.
+    """
+    cutoff = parse_cutoff(before)
+    started = time.perf_counter()
+    archived = chunks = 0
+    while True:
+        with get_session() as session:
+            first_ids = (
+                select(enrollments.c.id)
+                .where(enrollments.c.enrollment_date < cutoff)
+                .order_by(enrollments.c.id)
+                .limit(chunk_size)
+                .subquery()
+            )
+            last_id = session.execute(select(func.max(first_ids.c.id))).scalar()
+            if last_id is None:
+                break
+            archived += move_to_archive(session, enrollments.c.enrollment_date < cutoff, enrollments.c.id <= last_id)
+        chunks += 1
+        if progress:
+            progress(archived)
+    return ArchiveResult(archived, chunks, time.perf_counter() - started)
+
+def enrollment_rows(include_history: bool = False):
+    """
+    Returns a selectable with the enrollment columns (COLUMNS): the active
+    enrollments table, or active and archived enrollments combined.
+    """
+    if not include_history:
+        return enrollments
+    return union_all(
+        select(*(enrollments.c[name] for name in COLUMNS)),
+        select(*(archive.c[name] for name in COLUMNS)),
+    ).subquery("all_enrollments")
+
+def archive_status() -> dict:
+    """
+    Returns row counts and the date range of the active and archived
+    enrollments.
+    """
+    status = {}
+    with read_engine().connect() as conn:
+        for label, table in (("active", enrollments), ("archived", archive)):
+            count, oldest, newest = conn.execute(
+                select(func.count(), func.min(table.c.enrollment_date), func.max(table.c.enrollment_date))
+            ).one()
+            status[label] = {"enrollments": count, "oldest": oldest, "newest": newest}
+    return status
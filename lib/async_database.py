@@ -0,0 +1,86 @@
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from lib import instrumentation
+from lib.database import DATABASE_URL, DB_PROFILE, BUSY_RETRIES, BUSY_BACKOFF_MS, resolve_profile, is_busy_error, _configure_sqlite
+
+# Async counterpart of lib.database for embedding VirtuLearn in asyncio
+# services. The engine points at the same database as the sync engine, with
+# the driver swapped for an asyncio one, and uses the same engine profile.
+# ORM session hooks (lookup cache, enrollment counters) apply unchanged.
+# Call `await async_engine.dispose()` before the event loop shuts down;
+# aiosqlite connections each run on a thread that keeps the process alive.
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_url(url: str) -> str:
+    """
+    Returns url with its driver replaced by the asyncio driver for its
+    database, e.g. sqlite:///virtulearn.db -> sqlite+aiosqlite:///virtulearn.db.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for '{backend}' databases.")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.environ.get("VIRTULEARN_ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+
+def build_async_engine(url: str, profile_name: str = DB_PROFILE):
+    """
+    Creates an AsyncEngine for url configured according to the given profile.
+    Pool options apply to SQLite files too, since every concurrent session
+    needs its own connection.
+    """
+    profile = resolve_profile(profile_name)
+    new_engine = create_async_engine(url, **profile["pool"])
+    if new_engine.dialect.name == "sqlite":
+        _configure_sqlite(new_engine.sync_engine, profile["sqlite_pragmas"])
+    new_engine.sync_engine.virtulearn_profile = profile
+    instrumentation.attach(new_engine.sync_engine)
+    return new_engine
+
+async_engine = build_async_engine(ASYNC_DATABASE_URL)
+# Objects stay usable after commit, so results can be handed back to callers
+# once their session is closed.
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+@asynccontextmanager
+async def get_async_session():
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+# Writes, as in lib.database.run_transaction(): BEGIN IMMEDIATE on SQLite, so
+# concurrent writers queue on the lock instead of failing to upgrade a read
+# lock, and the whole transaction is run again while the database is busy.
+_AsyncWriteSession = async_sessionmaker(async_engine.execution_options(virtulearn_begin_immediate=True), expire_on_commit=False)
+
+async def run_async_transaction(work, *args, retries: int = BUSY_RETRIES, **kwargs):
+    """
+    Runs await work(session, *args, **kwargs) in its own transaction and
+    returns its result. When the database is busy the whole transaction is
+    run again, up to retries times, after a random exponential backoff.
+    """
+    for attempt in range(retries + 1):
+        try:
+            async with _AsyncWriteSession() as session:
+                result = await work(session, *args, **kwargs)
+                await session.commit()
+                return result
+        except DBAPIError as e:
+            if attempt == retries or not is_busy_error(e):
+                raise
+        await asyncio.sleep(random.uniform(0, BUSY_BACKOFF_MS * 2 ** attempt) / 1000)
@@ -0,0 +1,161 @@
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from lib.async_database import AsyncSessionLocal, run_async_transaction
+from lib import helpers, operations
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.models.archived_enrollment import ArchivedEnrollment
+from lib.models.student import Student
+
+# Async versions of the helpers in lib.helpers and the operations in
+# lib.operations. Each one runs the sync implementation on the session's
+# greenlet via AsyncSession.run_sync, so queries, eager loading, caching and
+# counter maintenance behave exactly as in the CLI while database I/O awaits
+# instead of blocking the event loop.
+#
+# An AsyncSession must not be shared by concurrent tasks; use fan_out() to
+# run independent lookups in parallel, each in a session of its own.
+
+async def get_instructor_by_id(session: AsyncSession, instructor_id: int) -> Instructor | None:
+    return await session.run_sync(helpers.get_instructor_by_id, instructor_id)
+
+async def get_course_by_id(session: AsyncSession, course_id: int) -> Course | None:
+    return await session.run_sync(helpers.get_course_by_id, course_id)
+
+async def get_enrollment_by_id(session: AsyncSession, enrollment_id: int) -> Enrollment | None:
+    return await session.run_sync(helpers.get_enrollment_by_id, enrollment_id)
+
+async def get_instructor_by_email(session: AsyncSession, email: str) -> Instructor | None:
+    return await session.run_sync(helpers.get_instructor_by_email, email)
+
+async def get_student_by_email(session: AsyncSession, email: str) -> Student | None:
+    return await session.run_sync(helpers.get_student_by_email, email)
+
+async def get_enrollments_by_student_email(session: AsyncSession, email: str, include_history: bool = False) -> list[Enrollment | ArchivedEnrollment]:
+    return await session.run_sync(helpers.get_enrollments_by_student_email, email, include_history)
+
+async def list_instructors_with_details(session: AsyncSession) -> list[Instructor]:
+    return await session.run_sync(helpers.list_instructors_with_details)
+
+async def list_courses_with_details(session: AsyncSession) -> list[Course]:
+    return await session.run_sync(helpers.list_courses_with_details)
+
+async def list_enrollments_with_details(session: AsyncSession) -> list[Enrollment]:
+    return await session.run_sync(helpers.list_enrollments_with_details)
+
+async def get_instructor_details_by_id(session: AsyncSession, instructor_id: int) -> Instructor | None:
+    return await session.run_sync(helpers.get_instructor_details_by_id, instructor_id)
+
+async def get_instructor_details_by_email(session: AsyncSession, email: str) -> Instructor | None:
+    return await session.run_sync(helpers.get_instructor_details_by_email, email)
+
+async def get_course_details_by_id(session: AsyncSession, course_id: int) -> Course | None:
+    return await session.run_sync(helpers.get_course_details_by_id, course_id)
+
+async def get_enrollment_details_by_id(session: AsyncSession, enrollment_id: int) -> Enrollment | None:
+    return await session.run_sync(helpers.get_enrollment_details_by_id, enrollment_id)
+
+async def get_instructors_page(session: AsyncSession, after_id: int = 0, page_size: int = helpers.PAGE_SIZE) -> list[Instructor]:
+    return await session.run_sync(helpers.get_instructors_page, after_id, page_size)
+
+async def get_courses_page(session: AsyncSession, after_id: int = 0, page_size: int = helpers.PAGE_SIZE) -> list[Course]:
+    return await session.run_sync(helpers.get_courses_page, after_id, page_size)
+
+async def get_enrollments_page(session: AsyncSession, after_id: int = 0, page_size: int = helpers.PAGE_SIZE) -> list[Enrollment]:
+    return await session.run_sync(helpers.get_enrollments_page, after_id, page_size)
+
+async def stream_courses(session: AsyncSession, after_id: int = 0, batch_size: int = helpers.STREAM_BATCH_SIZE):
+    """
+    Async iterator over all courses with id greater than after_id, fetching
+    batch_size courses per keyset page.
+    """
+    while True:
+        page = await get_courses_page(session, after_id, batch_size)
+        for course in page:
+            yield course
+        if len(page) < batch_size:
+            return
+        after_id = page[-1].id
+
+async def stream_enrollments(session: AsyncSession, after_id: int = 0, batch_size: int = helpers.STREAM_BATCH_SIZE):
+    """
+    Async iterator over all enrollments with id greater than after_id,
+    fetching batch_size rows at a time.
+    """
+    stmt = (
+        select(Enrollment)
+        .options(*helpers.ENROLLMENT_DETAIL_OPTIONS)
+        .where(Enrollment.id > after_id)
+        .order_by(Enrollment.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for enrollment in await session.stream_scalars(stmt):
+        yield enrollment
+
+# Operations flush only, like their sync counterparts; commit by leaving
+# get_async_session() or calling session.commit(), or run them through
+# run_async_transaction(), which retries while SQLite is busy. Enrollment is
+# the contended write, so enroll_student() always runs in a retried
+# transaction of its own.
+
+async def add_instructor(session: AsyncSession, name: str, email: str, expertise: str | None = None) -> Instructor:
+    return await session.run_sync(operations.add_instructor, name, email, expertise)
+
+async def add_course(session: AsyncSession, title: str, duration=None, instructor_id=None, capacity=None) -> Course:
+    return await session.run_sync(operations.add_course, title, duration, instructor_id, capacity)
+
+async def set_course_capacity(session: AsyncSession, course_id, capacity=None) -> Course:
+    return await session.run_sync(operations.set_course_capacity, course_id, capacity)
+
+async def assign_course(session: AsyncSession, course_id, instructor_id) -> Course:
+    return await session.run_sync(operations.assign_course, course_id, instructor_id)
+
+async def enroll_student(student_name: str, student_email: str, course_id, instructor_id=None, enrollment_date=None) -> Enrollment:
+    """
+    Enrolls a student and commits, like lib.services.enroll_student: one
+    BEGIN IMMEDIATE transaction, run again while the database is busy.
+    """
+    async def work(session: AsyncSession):
+        return await session.run_sync(operations.enroll_student, student_name, student_email, course_id, instructor_id, enrollment_date)
+    return await run_async_transaction(work)
+
+async def delete_instructor(session: AsyncSession, instructor_id) -> dict:
+    return await session.run_sync(operations.delete_instructor, instructor_id)
+
+async def delete_course(session: AsyncSession, course_id) -> dict:
+    return await session.run_sync(operations.delete_course, course_id)
+
+async def delete_enrollment(session: AsyncSession, enrollment_id) -> dict:
+    return await session.run_sync(operations.delete_enrollment, enrollment_id)
+
+async def delete_enrollments_before(session: AsyncSession, before) -> dict:
+    return await session.run_sync(operations.delete_enrollments_before, before)
+
+async def delete_enrollments_for_course(session: AsyncSession, course_id) -> dict:
+    return await session.run_sync(operations.delete_enrollments_for_course, course_id)
+
+async def _lookup(helper, *args):
+    async with AsyncSessionLocal() as session:
+        return await helper(session, *args)
+
+async def fan_out(*lookups) -> list:
+    """
+    Runs independent (async helper, *args) lookups concurrently, each in its
+    own session, and returns their results in order. Returned objects are
+    detached: their loaded attributes are readable, unloaded relationships
+    are not.
+    """
+    return list(await asyncio.gather(*(_lookup(helper, *args) for helper, *args in lookups)))
+
+async def lookup_enrollment_targets(course_id: int, instructor_id: int | None = None) -> tuple[Course | None, Instructor | None]:
+    """
+    Fetches the course and instructor an enrollment would reference (the
+    lookups add_enrollment_cli makes one after the other) concurrently.
+    """
+    if instructor_id is None:
+        (course,) = await fan_out((get_course_by_id, course_id))
+        return course, None
+    course, instructor = await fan_out((get_course_by_id, course_id), (get_instructor_by_id, instructor_id))
+    return course, instructor
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.database import reads_replica
+
+CACHE_ENABLED = os.environ.get("VIRTULEARN_CACHE", "").strip().lower() in ("1", "true", "yes", "on")
+CACHE_SIZE = int(os.environ.get("VIRTULEARN_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.environ.get("VIRTULEARN_CACHE_TTL", "60"))
+
+CACHED_MODELS = (Instructor, Course)
+
+class LRUCache:
+    """
+    Thread-safe LRU cache whose entries also expire ttl seconds after they
+    were stored. Keeps hit/miss/eviction counters for sizing.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation, so a lookup that started before one
+        # does not store what it read (see put()).
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation: int | None = None):
+        """
+        Stores value under key, unless generation is given and an
+        invalidation has happened since it was read.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_model(self, model_name: str):
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if key[0] == model_name]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": CACHE_ENABLED,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+entity_cache = LRUCache(CACHE_SIZE, CACHE_TTL)
+
+def _snapshot(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+def _attach(session: Session, model, snapshot: dict):
+    # Rebuild a detached instance from plain column values and merge it
+    # without loading, so a cache hit costs no SQL. Relationships are left
+    # unloaded and lazy-load on access as usual.
+    obj = model(**snapshot)
+    make_transient_to_detached(obj)
+    return session.merge(obj, load=False)
+
+def _has_writes(session: Session) -> bool:
+    return bool(session.new or session.dirty or session.deleted) or _PENDING in session.info
+
+def cached_get(session: Session, model, field: str, value, loader):
+    """
+    Read-through lookup of a single model instance by a unique field
+    ("id" or "email"). Entries keyed by a non-id field store only the id
+    and resolve through the id entry, so invalidating the id is enough.
+    Misses are not cached, and neither is anything a session reads once
+    it has written in its current transaction, or reads from a replica.
+    """
+    if not CACHE_ENABLED:
+        return loader()
+    if _has_writes(session):
+        # The cache holds committed rows; this transaction may see others.
+        return loader()
+    name = model.__name__
+    if field == "id":
+        snapshot = entity_cache.get((name, "id", value))
+    else:
+        cached_id = entity_cache.get((name, field, value))
+        snapshot = entity_cache.get((name, "id", cached_id)) if cached_id is not None else None
+        if snapshot is not None and snapshot[field] != value:
+            snapshot = None
+    if snapshot is not None:
+        return _attach(session, model, snapshot)
+    generation = session.info.get(_GENERATION, entity_cache.generation)
+    obj = loader()
+    if obj is not None and not reads_replica(session):
+        snapshot = _snapshot(obj)
+        entity_cache.put((name, "id", obj.id), snapshot, generation)
+        if field != "id":
+            entity_cache.put((name, field, value), obj.id, generation)
+    return obj
+
+def cache_stats() -> dict:
+    return entity_cache.stats()
+
+# Writes are invalidated when their transaction ends, not when they are
+# flushed: until the commit, other sessions still read (and may cache) the
+# old committed row, which the invalidation at commit then drops. A lookup
+# whose transaction began before an invalidation is not stored (see put()),
+# since its snapshot may predate the commit. A session that has written
+# bypasses the cache until its transaction ends, so nothing uncommitted is
+# ever cached, and a rollback invalidates the same entries in case the
+# writes were seen elsewhere.
+_PENDING = "virtulearn_cache_pending"
+_GENERATION = "virtulearn_cache_generation"
+
+def _mark_written(session: Session) -> set:
+    return session.info.setdefault(_PENDING, set())
+
+def invalidate_on_commit(session: Session, model_name: str, key=None):
+    """
+    Marks session as having written, and the cached entry for key (or,
+    with no key, every entry of model_name) for invalidation when its
+    transaction commits or rolls back.
+    """
+    if CACHE_ENABLED:
+        _mark_written(session).add((model_name, key))
+
+def _invalidate_pending(session):
+    for model_name, key in session.info.pop(_PENDING, ()):
+        if key is None:
+            entity_cache.invalidate_model(model_name)
+        else:
+            entity_cache.invalidate((model_name, "id", key))
+
+@event.listens_for(Session, "after_begin")
+def _remember_generation(session, transaction, connection):
+    session.info[_GENERATION] = entity_cache.generation
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    _invalidate_pending(session)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _invalidate_rolled_back(session, previous_transaction):
+    # A savepoint rollback leaves the outer transaction, and its writes, open.
+    if not previous_transaction.nested:
+        _invalidate_pending(session)
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed(session, flush_context):
+    if not CACHE_ENABLED:
+        return
+    pending = _mark_written(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CACHED_MODELS):
+            pending.add((type(obj).__name__, obj.id))
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush; updates and
+    # deletes of a cached model drop every entry for it.
+    if not CACHE_ENABLED or not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    pending = _mark_written(orm_execute_state.session)
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, CACHED_MODELS) and not orm_execute_state.is_insert:
+        pending.add((mapper.class_.__name__, None))
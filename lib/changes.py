@@ -0,0 +1,217 @@
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from sqlalchemy import select, delete, exists, func
+from lib.database import Base, engine, read_engine
+from lib.models.change import Change
+
+CHANGE_BATCH_SIZE = int(os.environ.get("VIRTULEARN_CHANGE_BATCH_SIZE", "1000"))
+COMPACT_CHUNK_SIZE = int(os.environ.get("VIRTULEARN_COMPACT_CHUNK_SIZE", "50000"))
+
+# Change data capture. Triggers append a row to change_log for every insert,
+# delete and update of a logged column, in the same transaction as the write,
+# so ORM flushes, Core and bulk writes, database cascades and archive moves
+# are all captured and a rolled-back write leaves no entry. The log records
+# which row changed, not its values: changes_since() reads the current values
+# of the rows in a batch, so a sync costs O(changes), and an entry for a row
+# that has since been deleted comes back without values (its delete follows).
+#
+# Syncing from cursor 0 replays the whole log, which starts with an insert for
+# every row that existed when the log was added, so it also serves as the
+# initial copy. compact_changes() keeps only the newest entry per row; that is
+# safe while consumers are mid-sync, because a dropped entry always has a
+# newer one for the same row further along.
+#
+# Cursors rely on entries becoming visible in ID order, which only holds on
+# SQLite, where one writer at a time appends to the log. On PostgreSQL a
+# SERIAL ID is handed out when the row is inserted and transactions commit in
+# any order, so a consumer could pass an ID whose transaction commits later
+# and never see that change. Cursor-based reads are therefore SQLite-only.
+
+# Logged tables: table -> columns whose updates are logged. The counters are
+# derived from enrollments and left out, so an enrollment logs one change,
+# not three.
+CHANGE_TABLES = {
+    "instructors": ("name", "email", "expertise"),
+    "courses": ("title", "duration", "instructor_id", "capacity"),
+    "enrollments": ("student_name", "student_email", "student_id", "course_id", "instructor_id", "enrollment_date"),
+}
+
+change_log = Change.__table__
+
+def change_log_statements(dialect: str, table: str, columns: tuple[str, ...]) -> list[str]:
+    """
+    Returns the DDL for table's change-logging triggers. The UPDATE trigger
+    only fires when a logged column actually changes value.
+    """
+    cols = ", ".join(columns)
+    if dialect == "sqlite":
+        changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+        log = "INSERT INTO change_log (table_name, row_id, operation, changed_at) VALUES ('{table}', {row}.id, '{op}', CURRENT_TIMESTAMP)"
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_cdc_ai AFTER INSERT ON {table} BEGIN "
+            f"{log.format(table=table, row='new', op='insert')}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_cdc_ad AFTER DELETE ON {table} BEGIN "
+            f"{log.format(table=table, row='old', op='delete')}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_cdc_au AFTER UPDATE OF {cols} ON {table} WHEN {changed} BEGIN "
+            f"{log.format(table=table, row='new', op='update')}; END",
+        ]
+    changed = " OR ".join(f"OLD.{column} IS DISTINCT FROM NEW.{column}" for column in columns)
+    return [
+        f"DROP TRIGGER IF EXISTS {table}_cdc_ai ON {table}",
+        f"CREATE TRIGGER {table}_cdc_ai AFTER INSERT ON {table} FOR EACH ROW EXECUTE FUNCTION virtulearn_log_change()",
+        f"DROP TRIGGER IF EXISTS {table}_cdc_ad ON {table}",
+        f"CREATE TRIGGER {table}_cdc_ad AFTER DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION virtulearn_log_change()",
+        f"DROP TRIGGER IF EXISTS {table}_cdc_au ON {table}",
+        f"CREATE TRIGGER {table}_cdc_au AFTER UPDATE OF {cols} ON {table} FOR EACH ROW "
+        f"WHEN ({changed}) EXECUTE FUNCTION virtulearn_log_change()",
+    ]
+
+# Shared by every PostgreSQL trigger; TG_OP is INSERT, UPDATE or DELETE.
+LOG_CHANGE_FUNCTION = """CREATE OR REPLACE FUNCTION virtulearn_log_change() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, changed_at)
+    VALUES (TG_TABLE_NAME, CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END, lower(TG_OP), now());
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql"""
+
+def install_change_log(conn):
+    """
+    Creates the change-logging triggers on every logged table.
+    """
+    dialect = conn.dialect.name
+    if dialect != "sqlite":
+        conn.exec_driver_sql(LOG_CHANGE_FUNCTION)
+    for table, columns in CHANGE_TABLES.items():
+        for statement in change_log_statements(dialect, table, columns):
+            conn.exec_driver_sql(statement)
+
+@contextmanager
+def deferred_change_log(conn, table: str):
+    """
+    For bulk inserts into table within the caller's transaction: suspends
+    the per-row insert trigger, then logs all new rows with one INSERT ...
+    SELECT and restores the trigger before the transaction ends, as
+    lib.search.deferred_indexing does for the search index.
+    """
+    if conn.dialect.name != "sqlite" or table not in CHANGE_TABLES:
+        yield
+        return
+    last_id = conn.exec_driver_sql(f"SELECT coalesce(max(id), 0) FROM {table}").scalar()
+    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_cdc_ai")
+    yield
+    conn.exec_driver_sql(
+        "INSERT INTO change_log (table_name, row_id, operation, changed_at) "
+        f"SELECT '{table}', id, 'insert', CURRENT_TIMESTAMP FROM {table} WHERE id > ? ORDER BY id",
+        (last_id,),
+    )
+    conn.exec_driver_sql(change_log_statements("sqlite", table, CHANGE_TABLES[table])[0])
+
+def ordered_log(conn) -> bool:
+    """
+    True if change_log IDs become visible in order on conn's database, so
+    a cursor never passes a change that is still to commit (SQLite only).
+    """
+    return conn.dialect.name == "sqlite"
+
+@dataclass
+class ChangeBatch:
+    changes: list[dict]
+    cursor: int
+    has_more: bool
+
+@dataclass
+class CompactResult:
+    removed: int
+    remaining: int
+    seconds: float
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+def _current_rows(conn, entries) -> dict[tuple[str, int], dict]:
+    # One query per logged table for the rows still present.
+    wanted = {}
+    for entry in entries:
+        if entry.operation != "delete":
+            wanted.setdefault(entry.table_name, set()).add(entry.row_id)
+    rows = {}
+    for table_name, ids in wanted.items():
+        table = Base.metadata.tables[table_name]
+        for row in conn.execute(select(table).where(table.c.id.in_(ids))).mappings():
+            rows[table_name, row["id"]] = {name: _plain(value) for name, value in row.items()}
+    return rows
+
+def changes_since(conn, cursor: int = 0, limit: int = CHANGE_BATCH_SIZE) -> ChangeBatch:
+    """
+    Returns up to limit changes after cursor, oldest first, each with the
+    row's current values (None for deletes and rows since deleted), plus
+    the cursor to pass next time. SQLite only: raises ValueError on other
+    databases, where a cursor could skip a change (see ordered_log()).
+    """
+    if not ordered_log(conn):
+        raise ValueError(f"Cursor-based change sync needs SQLite; change_log IDs on {conn.dialect.name} can commit out of order.")
+    entries = conn.execute(
+        select(change_log.c.id, change_log.c.table_name, change_log.c.row_id, change_log.c.operation, change_log.c.changed_at)
+        .where(change_log.c.id > cursor)
+        .order_by(change_log.c.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    rows = _current_rows(conn, entries)
+    changes = [
+        {
+            "cursor": entry.id,
+            "table": entry.table_name,
+            "id": entry.row_id,
+            "op": entry.operation,
+            "changed_at": _plain(entry.changed_at),
+            "row": rows.get((entry.table_name, entry.row_id)),
+        }
+        for entry in entries
+    ]
+    return ChangeBatch(changes, entries[-1].id if entries else cursor, has_more)
+
+def iter_changes(cursor: int = 0, batch_size: int = CHANGE_BATCH_SIZE):
+    """
+    Yields ChangeBatch objects from cursor until the log is exhausted, each
+    read in its own short transaction. SQLite only, like changes_since().
+    """
+    while True:
+        with read_engine().connect() as conn:
+            batch = changes_since(conn, cursor, batch_size)
+        if batch.changes:
+            yield batch
+        if not batch.has_more:
+            return
+        cursor = batch.cursor
+
+def compact_changes(before: int | None = None, chunk_size: int = COMPACT_CHUNK_SIZE) -> CompactResult:
+    """
+    Removes every entry below cursor before (default: the whole log) that
+    has a newer entry for the same row, chunk_size IDs per transaction.
+    """
+    started = time.perf_counter()
+    newer = change_log.alias("newer")
+    superseded = exists().where(
+        newer.c.table_name == change_log.c.table_name,
+        newer.c.row_id == change_log.c.row_id,
+        newer.c.id > change_log.c.id,
+    )
+    with engine.connect() as conn:
+        low, high = conn.execute(select(func.min(change_log.c.id), func.max(change_log.c.id))).one()
+    removed = 0
+    if low is not None:
+        end = high + 1 if before is None else min(before, high + 1)
+        for start in range(low, end, chunk_size):
+            with engine.begin() as conn:
+                removed += conn.execute(
+                    delete(change_log).where(change_log.c.id >= start, change_log.c.id < min(start + chunk_size, end), superseded)
+                ).rowcount
+    with engine.connect() as conn:
+        remaining = conn.execute(select(func.count()).select_from(change_log)).scalar()
+    return CompactResult(removed, remaining, time.perf_counter() - started)
@@ -1,14 +1,54 @@
-from sqlalchemy.exc import IntegrityError
-from lib.database import get_session, create_db_tables, drop_db_tables
-from lib.models.instructor import Instructor
-from lib.models.course import Course
-from lib.models.enrollment import Enrollment
-from lib.helpers import validate_input, get_instructor_by_id, get_course_by_id, get_enrollment_by_id, get_instructor_by_email, get_enrollments_by_student_email
+from lib.database import get_read_session, drop_db_tables
+from lib.models.archived_enrollment import ArchivedEnrollment
+from lib.helpers import validate_input, get_enrollments_by_student_email, list_instructors_with_details, get_instructor_details_by_id, get_instructor_details_by_email, get_course_details_by_id, get_enrollment_details_by_id, get_courses_page, get_enrollments_page, stream_courses, stream_enrollments, prompt_next_page, PAGE_SIZE
+from lib.search import search_instructors, search_courses, search_students
+from lib.reports import course_summary, instructor_summary
+from lib.operations import OperationError
+from lib.services import get_instructor, get_course, get_enrollment, add_instructor, add_course, assign_course, enroll_student, delete_instructor, delete_course, delete_enrollment, delete_enrollments_before, delete_enrollments_for_course
 from datetime import datetime
 
-def perform_initdb():
-    create_db_tables()
-    print("Database tables created/checked successfully.")
+# Interactive commands collect their input first and then call lib.services,
+# which runs each lookup and write in its own short transaction. No session
+# is open while a prompt waits for the user: an open transaction would pin
+# its snapshot (and, on SQLite, a lock that stops writers from committing or
+# checkpoints from running) for as long as the user takes to answer.
+
+def paginate(fetch_page, stream_from, print_row, header: str):
+    """
+    Prints rows one keyset page at a time, under header once there is a row
+    to show, asking the user before fetching the next page. Each page is
+    read in its own session, closed before the prompt. Choosing 'all'
+    streams the remaining rows without further prompts. Returns the number
+    of rows printed.
+    """
+    after_id = 0
+    shown = 0
+    while True:
+        with get_read_session() as session:
+            page = fetch_page(session, after_id)
+            if page and not shown:
+                print(header)
+            for row in page:
+                print_row(row)
+        shown += len(page)
+        if len(page) < PAGE_SIZE:
+            return shown
+        after_id = page[-1].id
+        choice = prompt_next_page()
+        if choice == 'quit':
+            return shown
+        if choice == 'all':
+            with get_read_session() as session:
+                for row in stream_from(session, after_id):
+                    print_row(row)
+                    shown += 1
+            return shown
+
+def ask_include_history() -> bool:
+    return input("Include archived enrollments? (yes/no): ").strip().lower() == 'yes'
+
+def print_affected(affected: dict):
+    print("Rows affected: " + ", ".join(f"{label.replace('_', ' ')}: {count}" for label, count in affected.items()))
 
 def perform_dropdb():
     confirm = input("Are you sure you want to drop all database tables? (yes/no): ").lower()
@@ -19,25 +59,22 @@ def perform_dropdb():
         print("Operation cancelled.")
 
 def add_instructor_cli():
-    with get_session() as session:
-        name = validate_input("Enter instructor name: ")
-        expertise = validate_input("Enter instructor expertise: ")
-        email = validate_input("Enter instructor email: ")
-        try:
-            instructor = Instructor(name=name, expertise=expertise, email=email)
-            session.add(instructor)
-            session.commit()
-            print(f"Instructor '{name}' added successfully with ID: {instructor.id}")
-        except IntegrityError:
-            session.rollback()
-            print(f"Error: An instructor with the name '{name}' or email '{email}' already exists.")
-        except Exception as e:
-            session.rollback()
-            print(f"An unexpected error occurred: {e}")
+    name = validate_input("Enter instructor name: ")
+    expertise = validate_input("Enter instructor expertise: ")
+    email = validate_input("Enter instructor email: ")
+    try:
+        instructor = add_instructor(name, email, expertise)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return
+    print(f"Instructor '{name}' added successfully with ID: {instructor.id}")
 
 def list_instructors_cli():
-    with get_session() as session:
-        instructors = session.query(Instructor).all()
+    with get_read_session() as session:
+        instructors = list_instructors_with_details(session)
         if instructors:
             print("\n--- All Instructors ---")
             for instr in instructors:
@@ -59,14 +96,15 @@ def list_instructors_cli():
             print("No instructors found.")
 
 def find_instructor_cli():
-    with get_session() as session:
-        instructor_id = validate_input("Enter instructor ID: ", type_func=int)
-        instructor = get_instructor_by_id(session, instructor_id)
+    instructor_id = validate_input("Enter instructor ID: ", type_func=int)
+    with get_read_session() as session:
+        instructor = get_instructor_details_by_id(session, instructor_id)
         if instructor:
             print(f"\n--- Instructor Details (ID: {instructor_id}) ---")
             print(f"Name: {instructor.name}") 
             print(f"Expertise: {instructor.expertise}") 
             print(f"Email: {instructor.email}")
+            print(f"Enrollments: {instructor.student_count}")
             if instructor.courses:
                 print("Courses Taught:")
                 for course in instructor.courses:
@@ -81,14 +119,15 @@ def find_instructor_cli():
             print(f"Instructor with ID {instructor_id} not found.")
 
 def find_instructor_by_email_cli():
-    with get_session() as session:
-        email = validate_input("Enter instructor email: ")
-        instructor = get_instructor_by_email(session, email)
+    email = validate_input("Enter instructor email: ")
+    with get_read_session() as session:
+        instructor = get_instructor_details_by_email(session, email)
         if instructor:
             print(f"\n--- Instructor Details (Email: {email}) ---")
             print(f"ID: {instructor.id}")
             print(f"Name: {instructor.name}") 
             print(f"Expertise: {instructor.expertise}")
+            print(f"Enrollments: {instructor.student_count}")
             if instructor.courses:
                 print("Courses Taught:")
                 for course in instructor.courses:
@@ -103,213 +142,198 @@ def find_instructor_by_email_cli():
             print(f"No instructor found with email: {email}")
 
 def find_enrollments_by_email_cli():
-    with get_session() as session:
-        email = validate_input("Enter student email: ")
-        enrollments = get_enrollments_by_student_email(session, email)
+    from lib.analytics import recommend_courses
+    email = validate_input("Enter student email: ")
+    include_history = ask_include_history()
+    with get_read_session() as session:
+        enrollments = get_enrollments_by_student_email(session, email, include_history)
         if enrollments:
             print(f"\n--- Enrollments for Email: {email} ---")
             for enroll in enrollments:
                 course_title = enroll.course.title if enroll.course else "N/A (Course Deleted)"
                 instructor_name = enroll.instructor.name if enroll.instructor else "N/A (No Instructor)"
                 enrollment_date_str = enroll.enrollment_date.strftime('%Y-%m-%d') if enroll.enrollment_date else 'N/A'
-                print(f"ID: {enroll.id}, Student: {enroll.student_name}, Email: {enroll.student_email}, Course: {course_title}, Instructor: {instructor_name}, Date: {enrollment_date_str}")
+                archived = " (archived)" if isinstance(enroll, ArchivedEnrollment) else ""
+                print(f"ID: {enroll.id}, Student: {enroll.student_name}, Email: {enroll.student_email}, Course: {course_title}, Instructor: {instructor_name}, Date: {enrollment_date_str}{archived}")
+            recommendations = recommend_courses({enroll.course_id for enroll in enrollments if enroll.course_id is not None})
+            if recommendations:
+                print("Students who took these courses also took:")
+                for recommendation in recommendations:
+                    print(f"  - {recommendation.title} ({recommendation.shared} shared students)")
         else:
             print(f"No enrollments found for email: {email}")
 
 def delete_instructor_cli():
-    with get_session() as session:
-        instructor_id = validate_input("Enter instructor ID to delete: ", type_func=int)
-        instructor = get_instructor_by_id(session, instructor_id)
-        if instructor:
-            confirm = input(f"Are you sure you want to delete instructor '{instructor.name}' and all their associated data? (yes/no): ").lower()
-            if confirm == 'yes':
-                try:
-                    session.delete(instructor)
-                    session.commit()
-                    print(f"Instructor '{instructor.name}' and associated data deleted successfully.")
-                except Exception as e:
-                    session.rollback()
-                    print(f"An error occurred while deleting instructor: {e}")
-            else:
-                print("Deletion cancelled.")
-        else:
-            print(f"Instructor with ID {instructor_id} not found.")
+    instructor_id = validate_input("Enter instructor ID to delete: ", type_func=int)
+    instructor = get_instructor(instructor_id)
+    if not instructor:
+        print(f"Instructor with ID {instructor_id} not found.")
+        return
+    confirm = input(f"Are you sure you want to delete instructor '{instructor.name}'? Their courses and enrollments will be kept without an instructor. (yes/no): ").lower()
+    if confirm != 'yes':
+        print("Deletion cancelled.")
+        return
+    try:
+        affected = delete_instructor(instructor_id)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    except Exception as e:
+        print(f"An error occurred while deleting instructor: {e}")
+        return
+    print(f"Instructor '{instructor.name}' deleted successfully.")
+    print_affected(affected)
 
 def add_course_cli():
-    with get_session() as session:
-        title = validate_input("Enter course title: ")
-        duration = validate_input("Enter course duration (e.g., 30): ", type_func=int)
-        instructor_id_str = input("Enter instructor ID for this course (optional, leave blank if none): ").strip()
-        instructor_id = int(instructor_id_str) if instructor_id_str else None
+    title = validate_input("Enter course title: ")
+    duration = validate_input("Enter course duration (e.g., 30): ", type_func=int)
+    instructor_id_str = input("Enter instructor ID for this course (optional, leave blank if none): ").strip()
+    instructor_id = int(instructor_id_str) if instructor_id_str else None
+    capacity_str = input("Enter seat capacity (optional, leave blank for unlimited): ").strip()
+    capacity = int(capacity_str) if capacity_str else None
 
-        try:
-            instructor = None
-            if instructor_id:
-                instructor = get_instructor_by_id(session, instructor_id)
-                if not instructor:
-                    print(f"Error: Instructor with ID {instructor_id} not found. Course will be added without an instructor.")
-                    instructor_id = None
+    try:
+        course = add_course(title, duration, instructor_id, capacity)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return
+    if instructor_id and course.instructor_id is None:
+        print(f"Warning: Instructor with ID {instructor_id} not found. The course was added without an instructor.")
+    if course.instructor_name:
+        print(f"Course '{title}' added successfully with ID: {course.id} and assigned to '{course.instructor_name}'.")
+    else:
+        print(f"Course '{title}' added successfully with ID: {course.id}")
 
-            course = Course(title=title, duration=duration, instructor_id=instructor_id)
-            session.add(course)
-            session.commit()
-            if instructor:
-                print(f"Course '{title}' added successfully with ID: {course.id} and assigned to '{instructor.name}'.")
-            else:
-                print(f"Course '{title}' added successfully with ID: {course.id}")
-        except IntegrityError:
-            session.rollback()
-            print(f"Error: A course with the title '{title}' already exists.")
-        except Exception as e:
-            session.rollback()
-            print(f"An unexpected error occurred: {e}")
+def print_course_summary(crs):
+    instructor_name = crs.instructor.name if crs.instructor else "N/A (No Instructor)"
+    print(f"ID: {crs.id}, Title: {crs.title}, Duration: {crs.duration}, Instructor: {instructor_name}")
+    if crs.enrollments:
+        print("  Enrolled Students:")
+        for enroll in crs.enrollments:
+            enrollment_date_str = enroll.enrollment_date.strftime('%Y-%m-%d') if enroll.enrollment_date else 'N/A'
+            print(f"    - {enroll.student_name} (Enrolled: {enrollment_date_str})")
+    print("-" * 20)
 
 def list_courses_cli():
-    with get_session() as session:
-        courses = session.query(Course).all()
-        if courses:
-            print("\n--- All Courses ---")
-            for crs in courses:
-                instructor_name = crs.instructor.name if crs.instructor else "N/A (No Instructor)"
-                print(f"ID: {crs.id}, Title: {crs.title}, Duration: {crs.duration}, Instructor: {instructor_name}")
-                if crs.enrollments:
-                    print("  Enrolled Students:")
-                    for enroll in crs.enrollments:
-                        enrollment_date_str = enroll.enrollment_date.strftime('%Y-%m-%d') if enroll.enrollment_date else 'N/A'
-                        print(f"    - {enroll.student_name} (Enrolled: {enrollment_date_str})")
-                print("-" * 20)
-            print("-------------------")
-        else:
-            print("No courses found.")
+    shown = paginate(get_courses_page, stream_courses, print_course_summary, "\n--- All Courses ---")
+    if shown:
+        print("-------------------")
+    else:
+        print("No courses found.")
 
 def find_course_cli():
-    with get_session() as session:
-        course_id = validate_input("Enter course ID: ", type_func=int)
-        course = get_course_by_id(session, course_id)
-        if course:
-            instructor_name = course.instructor.name if course.instructor else "N/A (No Instructor)"
-            print(f"\n--- Course Details (ID: {course_id}) ---")
-            print(f"Title: {course.title}")
-            print(f"Duration: {course.duration}")
-            print(f"Instructor: {instructor_name}")
-            if course.enrollments:
-                print("Enrolled Students:")
-                for enroll in course.enrollments:
-                    enrollment_date_str = enroll.enrollment_date.strftime('%Y-%m-%d') if enroll.enrollment_date else 'N/A'
-                    print(f"  - {enroll.student_name} (Enrolled: {enrollment_date_str})")
-        else:
+    from lib.analytics import also_took
+    course_id = validate_input("Enter course ID: ", type_func=int)
+    with get_read_session() as session:
+        course = get_course_details_by_id(session, course_id)
+        if not course:
             print(f"Course with ID {course_id} not found.")
+            return
+        instructor_name = course.instructor.name if course.instructor else "N/A (No Instructor)"
+        print(f"\n--- Course Details (ID: {course_id}) ---")
+        print(f"Title: {course.title}")
+        print(f"Duration: {course.duration}")
+        print(f"Instructor: {instructor_name}")
+        print(f"Enrollments: {course.enrollment_count}" + (f" of {course.capacity} seats" if course.capacity is not None else ""))
+        if course.enrollments:
+            print("Enrolled Students:")
+            for enroll in course.enrollments:
+                enrollment_date_str = enroll.enrollment_date.strftime('%Y-%m-%d') if enroll.enrollment_date else 'N/A'
+                print(f"  - {enroll.student_name} (Enrolled: {enrollment_date_str})")
+    # After the session closes: the co-enrollment index may first build or
+    # catch up on the change log over its own connection.
+    neighbours = also_took(course_id)
+    if neighbours:
+        print("Students who took this course also took:")
+        for neighbour in neighbours:
+            print(f"  - {neighbour.title} ({neighbour.shared} shared students)")
 
 def delete_course_cli():
-    with get_session() as session:
-        course_id = validate_input("Enter course ID to delete: ", type_func=int)
-        course = get_course_by_id(session, course_id) 
-        if course:
-            confirm = input(f"Are you sure you want to delete course '{course.title}'? (yes/no): ").lower()
-            if confirm == 'yes':
-                try:
-                    session.delete(course)
-                    session.commit()
-                    print(f"Course '{course.title}' deleted successfully.")
-                except Exception as e:
-                    session.rollback()
-                    print(f"An error occurred while deleting course: {e}")
-            else:
-                print("Deletion cancelled.")
-        else:
-            print(f"Course with ID {course_id} not found.")
+    course_id = validate_input("Enter course ID to delete: ", type_func=int)
+    course = get_course(course_id)
+    if not course:
+        print(f"Course with ID {course_id} not found.")
+        return
+    confirm = input(f"Are you sure you want to delete course '{course.title}' and its {course.enrollment_count} enrollments? (yes/no): ").lower()
+    if confirm != 'yes':
+        print("Deletion cancelled.")
+        return
+    try:
+        affected = delete_course(course_id)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    except Exception as e:
+        print(f"An error occurred while deleting course: {e}")
+        return
+    print(f"Course '{course.title}' deleted successfully.")
+    print_affected(affected)
 
 def assign_course_cli():
-    with get_session() as session:
-        course_id = validate_input("Enter course ID to assign: ", type_func=int)
-        instructor_id = validate_input("Enter instructor ID to assign to: ", type_func=int)
-        course = get_course_by_id(session, course_id)
-        instructor = get_instructor_by_id(session, instructor_id)
-
-        if not course:
-            print(f"Error: Course with ID {course_id} not found.")
-            return
-        if not instructor:
-            print(f"Error: Instructor with ID {instructor_id} not found.")
-            return
-
-        try:
-            course.instructor = instructor
-            session.commit() 
-            print(f"Course '{course.title}' successfully assigned to instructor '{instructor.name}'.")
-        except Exception as e:
-            session.rollback()
-            print(f"An error occurred while assigning course: {e}")
+    course_id = validate_input("Enter course ID to assign: ", type_func=int)
+    instructor_id = validate_input("Enter instructor ID to assign to: ", type_func=int)
+    try:
+        course = assign_course(course_id, instructor_id)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    except Exception as e:
+        print(f"An error occurred while assigning course: {e}")
+        return
+    print(f"Course '{course.title}' successfully assigned to instructor '{course.instructor_name}'.")
 
 def add_enrollment_cli():
-    with get_session() as session:
-        student_name = validate_input("Enter student name: ")
-        student_email = validate_input("Enter student email: ")
-        course_id = validate_input("Enter course ID for enrollment: ", type_func=int)
+    student_name = validate_input("Enter student name: ")
+    student_email = validate_input("Enter student email: ")
+    course_id = validate_input("Enter course ID for enrollment: ", type_func=int)
 
-        instructor_id_str = input("Enter instructor ID for this enrollment (optional, leave blank if not specific): ").strip()
-        instructor_id = int(instructor_id_str) if instructor_id_str else None
+    instructor_id_str = input("Enter instructor ID for this enrollment (optional, leave blank if not specific): ").strip()
+    instructor_id = int(instructor_id_str) if instructor_id_str else None
 
-        enrollment_date_str = input("Enter enrollment date (YYYY-MM-DD, default today if blank): ").strip()
-
-        enrollment_date_obj = None
-        if not enrollment_date_str:
-            enrollment_date_obj = datetime.now()
-        else:
-            try:
-                enrollment_date_obj = datetime.strptime(enrollment_date_str, "%Y-%m-%d")
-            except ValueError:
-                print("Invalid date format. Using today's date.")
-                enrollment_date_obj = datetime.now()
+    enrollment_date_str = input("Enter enrollment date (YYYY-MM-DD, default today if blank): ").strip()
 
+    enrollment_date_obj = None
+    if not enrollment_date_str:
+        enrollment_date_obj = datetime.now()
+    else:
         try:
-            course = get_course_by_id(session, course_id)
-            if not course:
-                print(f"Error: Course with ID {course_id} not found.")
-                return
+            enrollment_date_obj = datetime.strptime(enrollment_date_str, "%Y-%m-%d")
+        except ValueError:
+            print("Invalid date format. Using today's date.")
+            enrollment_date_obj = datetime.now()
 
-            final_instructor_id_for_enrollment = None
-            if instructor_id:
-                instructor_obj = get_instructor_by_id(session, instructor_id)
-                if not instructor_obj:
-                    print(f"Warning: Instructor with ID {instructor_id} not found. Enrollment will proceed without linking to a specific instructor from user input.")
-                else:
-                    final_instructor_id_for_enrollment = instructor_obj.id
-            elif course.instructor_id:
-                final_instructor_id_for_enrollment = course.instructor_id
+    try:
+        enrollment = enroll_student(student_name, student_email, course_id, instructor_id, enrollment_date_obj)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    except Exception as e:
+        print(f"An unexpected error occurred during enrollment: {e}")
+        return
+    if instructor_id and enrollment.instructor_id is None:
+        print(f"Warning: Instructor with ID {instructor_id} not found. The enrollment is not linked to a specific instructor.")
+    print(f"Student '{student_name}' enrolled in course '{enrollment.course_title}' (Enrollment ID: {enrollment.id}).")
 
-            enrollment = Enrollment(
-                student_name=student_name,
-                student_email=student_email,
-                course_id=course_id,
-                instructor_id=final_instructor_id_for_enrollment,
-                enrollment_date=enrollment_date_obj 
-            )
-            session.add(enrollment)
-            session.commit()
-            print(f"Student '{student_name}' enrolled in course '{course.title}' (Enrollment ID: {enrollment.id}).")
-        except Exception as e:
-            session.rollback()
-            print(f"An unexpected error occurred during enrollment: {e}")
+def print_enrollment_summary(enroll):
+    course_title = enroll.course.title if enroll.course else "N/A (Course Deleted)"
+    instructor_name = enroll.instructor.name if enroll.instructor else "N/A (No Instructor)"
+    enrollment_date_str = enroll.enrollment_date.strftime('%Y-%m-%d') if enroll.enrollment_date else 'N/A'
+    print(f"ID: {enroll.id}, Student: {enroll.student_name}, Email: {enroll.student_email}, Course: {course_title}, Instructor: {instructor_name}, Date: {enrollment_date_str}")
 
 def list_enrollments_cli():
-    with get_session() as session:
-        enrollments = session.query(Enrollment).all()
-        if enrollments:
-            print("\n--- All Enrollments ---")
-            for enroll in enrollments:
-                course_title = enroll.course.title if enroll.course else "N/A (Course Deleted)"
-                instructor_name = enroll.instructor.name if enroll.instructor else "N/A (No Instructor)"
-                enrollment_date_str = enroll.enrollment_date.strftime('%Y-%m-%d') if enroll.enrollment_date else 'N/A'
-                print(f"ID: {enroll.id}, Student: {enroll.student_name}, Email: {enroll.student_email}, Course: {course_title}, Instructor: {instructor_name}, Date: {enrollment_date_str}")
-            print("-----------------------")
-        else:
-            print("No enrollments found.")
+    shown = paginate(get_enrollments_page, stream_enrollments, print_enrollment_summary, "\n--- All Enrollments ---")
+    if shown:
+        print("-----------------------")
+    else:
+        print("No enrollments found.")
 
 def find_enrollment_cli():
-    with get_session() as session:
-        enrollment_id = validate_input("Enter enrollment ID: ", type_func=int)
-        enrollment = get_enrollment_by_id(session, enrollment_id)
+    enrollment_id = validate_input("Enter enrollment ID: ", type_func=int)
+    with get_read_session() as session:
+        enrollment = get_enrollment_details_by_id(session, enrollment_id)
         if enrollment:
             course_title = enrollment.course.title if enrollment.course else "N/A (Course Deleted)"
             instructor_name = enrollment.instructor.name if enrollment.instructor else "N/A (No Instructor)"
@@ -324,20 +348,89 @@ def find_enrollment_cli():
             print(f"Enrollment with ID {enrollment_id} not found.")
 
 def delete_enrollment_cli():
-    with get_session() as session:
-        enrollment_id = validate_input("Enter enrollment ID to delete: ", type_func=int)
-        enrollment = get_enrollment_by_id(session, enrollment_id)
-        if enrollment:
-            confirm = input(f"Are you sure you want to delete enrollment ID {enrollment.id} for student '{enrollment.student_name}' in course '{enrollment.course.title if enrollment.course else 'N/A'}'? (yes/no): ").lower()
-            if confirm == 'yes':
-                try:
-                    session.delete(enrollment)
-                    session.commit()
-                    print(f"Enrollment ID {enrollment.id} deleted successfully.")
-                except Exception as e:
-                    session.rollback()
-                    print(f"An error occurred while deleting enrollment: {e}")
-            else:
-                print("Deletion cancelled.")
-        else:
-            print(f"Enrollment with ID {enrollment_id} not found.")
\ No newline at end of file
+    enrollment_id = validate_input("Enter enrollment ID to delete: ", type_func=int)
+    enrollment = get_enrollment(enrollment_id)
+    if not enrollment:
+        print(f"Enrollment with ID {enrollment_id} not found.")
+        return
+    confirm = input(f"Are you sure you want to delete enrollment ID {enrollment.id} for student '{enrollment.student_name}' in course '{enrollment.course_title or 'N/A'}'? (yes/no): ").lower()
+    if confirm != 'yes':
+        print("Deletion cancelled.")
+        return
+    try:
+        delete_enrollment(enrollment_id)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    except Exception as e:
+        print(f"An error occurred while deleting enrollment: {e}")
+        return
+    print(f"Enrollment ID {enrollment.id} deleted successfully.")
+
+def bulk_delete_enrollments_cli():
+    mode = validate_input("Delete enrollments (1) dated before a cutoff or (2) for a course? ")
+    if mode == '1':
+        cutoff = validate_input("Delete enrollments dated before (YYYY-MM-DD): ")
+        confirm = input(f"Are you sure you want to delete every enrollment dated before {cutoff}? (yes/no): ").lower()
+        operation, argument = delete_enrollments_before, cutoff
+    elif mode == '2':
+        course_id = validate_input("Enter course ID: ", type_func=int)
+        confirm = input(f"Are you sure you want to delete every enrollment in course {course_id}? (yes/no): ").lower()
+        operation, argument = delete_enrollments_for_course, course_id
+    else:
+        print("Invalid option.")
+        return
+    if confirm != 'yes':
+        print("Deletion cancelled.")
+        return
+    try:
+        affected = operation(argument)
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    print_affected(affected)
+
+def course_summary_cli():
+    summary = course_summary()
+    print("\n--- Course Enrollment Summary ---")
+    print(f"Courses: {summary['courses']}, Enrollments: {summary['enrollments']}")
+    if summary['top']:
+        print("Most enrolled courses:")
+        for course_id, title, count in summary['top']:
+            print(f"  - [{course_id}] {title}: {count}")
+    print("---------------------------------")
+
+def instructor_summary_cli():
+    summary = instructor_summary()
+    print("\n--- Instructor Summary ---")
+    print(f"Instructors: {summary['instructors']}, Linked enrollments: {summary['enrollments']}")
+    if summary['top']:
+        print("Instructors with most students:")
+        for instructor_id, name, count in summary['top']:
+            print(f"  - [{instructor_id}] {name}: {count}")
+    print("--------------------------")
+
+def search_cli():
+    term = validate_input("Search for (name, email or title; partial words allowed): ")
+    try:
+        instructors = search_instructors(term)
+        courses = search_courses(term)
+        students = search_students(term)
+    except Exception as e:
+        print(f"An error occurred during search: {e}")
+        return
+    if not (instructors or courses or students):
+        print(f"No matches for '{term}'.")
+        return
+    if instructors:
+        print("\n--- Instructors ---")
+        for instructor_id, name, email, expertise in instructors:
+            print(f"ID: {instructor_id}, Name: {name}, Email: {email}, Expertise: {expertise}")
+    if courses:
+        print("\n--- Courses ---")
+        for course_id, title, instructor_name in courses:
+            print(f"ID: {course_id}, Title: {title}, Instructor: {instructor_name or 'N/A (No Instructor)'}")
+    if students:
+        print("\n--- Students ---")
+        for student_name, student_email, count in students:
+            print(f"Student: {student_name}, Email: {student_email}, Enrollments: {count}")
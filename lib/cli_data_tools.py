@@ -0,0 +1,128 @@
+import os
+from lib.database import describe_engine
+from lib.helpers import validate_input
+from lib.importer import IMPORTERS
+from lib.exporter import EXPORT_QUERIES, FORMATS as EXPORT_FORMATS, export_table, export_all
+from lib.archive import archive_enrollments, archive_status
+from lib.students import backfill_students
+from lib.cache import cache_stats
+from lib.migrations import migration_status
+from lib.advisor import explain_cli_queries
+from lib.operations import OperationError
+
+# Data Tools menu commands, loaded when that menu is first opened.
+
+def import_data_cli():
+    kind = validate_input("Import which data (instructors/courses/enrollments)? ").lower()
+    importer = IMPORTERS.get(kind)
+    if not importer:
+        print(f"Unknown data type '{kind}'.")
+        return
+    path = validate_input("Enter path to CSV or JSONL file: ")
+    if not os.path.exists(path):
+        print(f"File not found: {path}")
+        return
+    try:
+        result = importer(path)
+    except Exception as e:
+        print(f"An error occurred during import: {e}")
+        return
+    print(f"Imported {result.inserted} {kind} in {result.seconds:.2f}s ({result.rows_per_sec:,.0f} rows/sec).")
+    if result.rejected:
+        print(f"{result.rejected} rows rejected; see {result.rejects_path}")
+
+def export_data_cli():
+    kind = validate_input("Export which data (instructors/courses/enrollments/all)? ").lower()
+    try:
+        if kind == 'all':
+            directory = validate_input("Enter output directory: ")
+            fmt = validate_input("Enter format (csv/jsonl): ").lower()
+            compress = input("Compress with gzip? (yes/no): ").strip().lower() == 'yes'
+            if fmt not in EXPORT_FORMATS:
+                print(f"Unsupported export format '{fmt}'.")
+                return
+            results = export_all(directory, fmt, compress)
+        elif kind in EXPORT_QUERIES:
+            path = validate_input("Enter output file (.csv or .jsonl, optionally ending in .gz): ")
+            results = [export_table(kind, path)]
+        else:
+            print(f"Unknown data type '{kind}'.")
+            return
+    except Exception as e:
+        print(f"An error occurred during export: {e}")
+        return
+    for result in results:
+        print(f"Exported {result.rows} {result.kind} to {result.path} in {result.seconds:.2f}s ({result.rows_per_sec:,.0f} rows/sec).")
+
+def archive_enrollments_cli():
+    status = archive_status()
+    print("\n--- Enrollment Archive ---")
+    for label, row in status.items():
+        oldest = row['oldest'].strftime('%Y-%m-%d') if row['oldest'] else 'N/A'
+        newest = row['newest'].strftime('%Y-%m-%d') if row['newest'] else 'N/A'
+        print(f"{label.capitalize()}: {row['enrollments']} enrollments ({oldest} to {newest})")
+    cutoff = validate_input("Archive enrollments dated before (YYYY-MM-DD, blank to cancel): ")
+    if not cutoff:
+        print("Archiving cancelled.")
+        return
+    confirm = input(f"Move every enrollment dated before {cutoff} to the archive? (yes/no): ").lower()
+    if confirm != 'yes':
+        print("Archiving cancelled.")
+        return
+    try:
+        result = archive_enrollments(cutoff, progress=lambda archived: print(f"  {archived} archived..."))
+    except OperationError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Archived {result.archived} enrollments in {result.chunks} chunks ({result.seconds:.2f}s).")
+
+def backfill_students_cli():
+    try:
+        result = backfill_students(progress=lambda linked: print(f"  {linked} linked..."))
+    except Exception as e:
+        print(f"An error occurred during the student backfill: {e}")
+        return
+    print(f"Linked {result.enrollments} enrollments to students in {result.batches} batches ({result.seconds:.2f}s).")
+    if result.pending:
+        print(f"{result.pending} enrollments are still unlinked; run the backfill again.")
+
+def show_db_settings_cli():
+    try:
+        settings = describe_engine()
+    except Exception as e:
+        print(f"An error occurred while reading database settings: {e}")
+        return
+    print("\n--- Database Settings ---")
+    for name, value in settings.items():
+        print(f"{name}: {value}")
+    print("-------------------------")
+
+def show_cache_stats_cli():
+    print("\n--- Lookup Cache Statistics ---")
+    for name, value in cache_stats().items():
+        print(f"{name}: {value}")
+    print("-------------------------------")
+
+def show_schema_version_cli():
+    try:
+        applied, latest = migration_status()
+    except Exception as e:
+        print(f"An error occurred while reading the schema version: {e}")
+        return
+    print(f"Schema version: {applied} (latest available: {latest})")
+
+def run_index_advisor_cli():
+    try:
+        reports = explain_cli_queries()
+    except Exception as e:
+        print(f"An error occurred while running the index advisor: {e}")
+        return
+    print("\n--- Index Advisor ---")
+    for report in reports:
+        status = "SCAN" if report["scans"] else "OK"
+        print(f"[{status}] {report['query']}")
+        for detail in report["plan"]:
+            print(f"    {detail}")
+    flagged = sum(1 for report in reports if report["scans"])
+    print(f"{flagged} of {len(reports)} queries scan a table or index.")
+    print("---------------------")
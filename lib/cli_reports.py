@@ -0,0 +1,44 @@
+from lib.database import get_session
+from lib.counters import rebuild_counters
+from lib.reports import enrollments_per_course, enrollments_per_instructor, enrollments_per_month
+from lib.cli import ask_include_history
+
+# Reports menu commands, loaded when that menu is first opened.
+
+def report_enrollments_per_course_cli():
+    rows = enrollments_per_course(include_history=ask_include_history())
+    if not rows:
+        print("No courses found.")
+        return
+    print("\n--- Enrollments per Course ---")
+    for course_id, title, count in rows:
+        print(f"ID: {course_id}, Title: {title}, Enrollments: {count}")
+    print("------------------------------")
+
+def report_enrollments_per_instructor_cli():
+    rows = enrollments_per_instructor(include_history=ask_include_history())
+    if not rows:
+        print("No instructors found.")
+        return
+    print("\n--- Enrollments per Instructor ---")
+    for instructor_id, name, count, students in rows:
+        print(f"ID: {instructor_id}, Name: {name}, Enrollments: {count}, Distinct Students: {students}")
+    print("----------------------------------")
+
+def report_enrollments_per_month_cli():
+    rows = enrollments_per_month(include_history=ask_include_history())
+    if not rows:
+        print("No dated enrollments found.")
+        return
+    print("\n--- Enrollments per Month ---")
+    for month, count in rows:
+        print(f"{month}: {count}")
+    print("-----------------------------")
+
+def rebuild_counters_cli():
+    try:
+        with get_session() as session:
+            rebuild_counters(session)
+        print("Enrollment counters rebuilt.")
+    except Exception as e:
+        print(f"An error occurred while rebuilding counters: {e}")
@@ -0,0 +1,339 @@
+import json
+import sys
+import time
+import click
+from sqlalchemy.exc import IntegrityError
+from lib.database import run_transaction, get_read_session, create_db_tables, describe_engine, read_your_writes
+from lib.importer import IMPORTERS, read_records
+from lib.exporter import EXPORT_QUERIES, export_table
+from lib.instrumentation import command, startup
+from lib.migrations import migration_status
+from lib.advisor import explain_cli_queries
+from lib.search import search_instructors, search_courses, search_students
+from lib.cache import CACHE_ENABLED, cache_stats
+from lib.students import BACKFILL_BATCH_SIZE, backfill_students
+from lib.archive import ARCHIVE_CHUNK_SIZE, archive_enrollments, archive_status
+from lib.changes import CHANGE_BATCH_SIZE, iter_changes, compact_changes
+from lib.operations import OperationError, BATCH_SIZE, run_operations, add_instructor, add_course, assign_course, set_course_capacity, enroll_student, delete_instructor, delete_course, delete_enrollment, delete_enrollments_before, delete_enrollments_for_course
+
+def _echo_affected(affected: dict):
+    click.echo(" ".join(f"{label}={count}" for label, count in affected.items()))
+
+def _apply(operation, *args, **kwargs):
+    """
+    Runs a single operation in its own transaction (retried while the
+    database is busy) and exits non-zero with the error message if it fails.
+    """
+    def work(session):
+        result = operation(session, *args, **kwargs)
+        # Added rows are reported by ID, read before the session closes.
+        return result.id if hasattr(result, "id") else result
+    try:
+        return run_transaction(work)
+    except (OperationError, IntegrityError, ValueError) as e:
+        click.echo(f"Error: {str(e).splitlines()[0]}", err=True)
+        sys.exit(1)
+
+@click.group(name="virtulearn")
+@click.pass_context
+def virtulearn(ctx):
+    """VirtuLearn scriptable command surface."""
+    if ctx.invoked_subcommand:
+        ctx.with_resource(command(ctx.invoked_subcommand))
+        ctx.with_resource(read_your_writes())
+    try:
+        create_db_tables(verbose=False)
+    except Exception as e:
+        raise click.ClickException(f"Failed to initialize database: {e}")
+    startup.mark("schema check")
+    startup.ready()
+
+@virtulearn.command("add-instructor")
+@click.option("--name", required=True)
+@click.option("--email", required=True)
+@click.option("--expertise")
+def add_instructor_command(name, email, expertise):
+    """Add an instructor and print its ID."""
+    click.echo(_apply(add_instructor, name, email, expertise))
+
+@virtulearn.command("add-course")
+@click.option("--title", required=True)
+@click.option("--duration", type=int)
+@click.option("--instructor-id", type=int)
+@click.option("--capacity", type=int, help="Seat limit; unlimited if omitted.")
+def add_course_command(title, duration, instructor_id, capacity):
+    """Add a course and print its ID."""
+    click.echo(_apply(add_course, title, duration, instructor_id, capacity))
+
+@virtulearn.command("assign-course")
+@click.option("--course-id", type=int, required=True)
+@click.option("--instructor-id", type=int, required=True)
+def assign_course_command(course_id, instructor_id):
+    """Assign a course to an instructor."""
+    _apply(assign_course, course_id, instructor_id)
+
+@virtulearn.command("set-capacity")
+@click.argument("course_id", type=int)
+@click.argument("capacity", type=int, required=False)
+def set_capacity_command(course_id, capacity):
+    """Set a course's seat limit; omit CAPACITY for unlimited."""
+    _apply(set_course_capacity, course_id, capacity)
+
+@virtulearn.command("enroll")
+@click.option("--name", "student_name", required=True)
+@click.option("--email", "student_email", required=True)
+@click.option("--course-id", type=int, required=True)
+@click.option("--instructor-id", type=int)
+@click.option("--date", "enrollment_date", help="YYYY-MM-DD, defaults to today.")
+def enroll_command(student_name, student_email, course_id, instructor_id, enrollment_date):
+    """Enroll a student in a course and print the enrollment ID."""
+    click.echo(_apply(enroll_student, student_name, student_email, course_id, instructor_id, enrollment_date))
+
+@virtulearn.command("delete-instructor")
+@click.argument("instructor_id", type=int)
+def delete_instructor_command(instructor_id):
+    """Delete an instructor, keeping their courses and enrollments unassigned."""
+    _echo_affected(_apply(delete_instructor, instructor_id))
+
+@virtulearn.command("delete-course")
+@click.argument("course_id", type=int)
+def delete_course_command(course_id):
+    """Delete a course and its enrollments."""
+    _echo_affected(_apply(delete_course, course_id))
+
+@virtulearn.command("delete-enrollment")
+@click.argument("enrollment_id", type=int)
+def delete_enrollment_command(enrollment_id):
+    """Delete an enrollment."""
+    _echo_affected(_apply(delete_enrollment, enrollment_id))
+
+@virtulearn.command("delete-enrollments")
+@click.option("--before", help="Delete enrollments dated before this date (YYYY-MM-DD).")
+@click.option("--course-id", type=int, help="Delete every enrollment in this course.")
+def delete_enrollments_command(before, course_id):
+    """Delete enrollments in bulk, by date cutoff or by course, and print how many."""
+    if (before is None) == (course_id is None):
+        raise click.UsageError("Give exactly one of --before or --course-id.")
+    if before is not None:
+        _echo_affected(_apply(delete_enrollments_before, before))
+    else:
+        _echo_affected(_apply(delete_enrollments_for_course, course_id))
+
+@virtulearn.command("run")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", type=int, default=BATCH_SIZE, show_default=True, help="Operations per transaction.")
+@click.option("--stop-on-error", is_flag=True, help="Stop at the first failing operation.")
+def run_command(path, batch_size, stop_on_error):
+    """
+    Apply operations from a JSONL (or CSV) file. Each record names an "op"
+    (add_instructor, add_course, assign_course, enroll, delete_instructor,
+    delete_course, delete_enrollment, delete_enrollments_before,
+    delete_enrollments_for_course) plus that operation's arguments.
+    """
+    result = run_operations(read_records(path), batch_size, stop_on_error)
+    for line_no, message in result.failures:
+        click.echo(f"Line {line_no}: {message}", err=True)
+    click.echo(f"Applied {result.applied} operations ({len(result.failures)} failed) in {result.seconds:.2f}s ({result.ops_per_sec:,.0f} ops/sec).")
+    if CACHE_ENABLED:
+        stats = cache_stats()
+        click.echo(f"Lookup cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_ratio']:.1%}).")
+    if result.failures:
+        sys.exit(1)
+
+@virtulearn.command("import")
+@click.argument("kind", type=click.Choice(list(IMPORTERS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_command(kind, path):
+    """Bulk-import instructors, courses or enrollments from CSV/JSONL."""
+    result = IMPORTERS[kind](path)
+    click.echo(f"Imported {result.inserted} {kind} in {result.seconds:.2f}s ({result.rows_per_sec:,.0f} rows/sec).")
+    if result.rejected:
+        click.echo(f"{result.rejected} rows rejected; see {result.rejects_path}", err=True)
+
+@virtulearn.command("export")
+@click.argument("kind", type=click.Choice(list(EXPORT_QUERIES)))
+@click.argument("path")
+def export_command(kind, path):
+    """Export a table to .csv or .jsonl, optionally gzip-compressed (.gz)."""
+    result = export_table(kind, path)
+    click.echo(f"Exported {result.rows} {kind} to {result.path} in {result.seconds:.2f}s ({result.rows_per_sec:,.0f} rows/sec).")
+
+@virtulearn.command("archive")
+@click.option("--before", help="Archive enrollments dated before this date (YYYY-MM-DD).")
+@click.option("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE, show_default=True, help="Enrollments moved per transaction.")
+def archive_command(before, chunk_size):
+    """Move old enrollments to the archive table, or show archive status."""
+    if before is None:
+        for label, row in archive_status().items():
+            click.echo(f"{label}\t{row['enrollments']}\t{row['oldest'] or ''}\t{row['newest'] or ''}")
+        return
+    try:
+        result = archive_enrollments(before, chunk_size)
+    except OperationError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"Archived {result.archived} enrollments in {result.chunks} chunks ({result.seconds:.2f}s).")
+
+@virtulearn.command("backfill-students")
+@click.option("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, show_default=True, help="Enrollments linked per transaction.")
+def backfill_students_command(batch_size):
+    """Link existing enrollments to students; safe to interrupt and rerun."""
+    result = backfill_students(batch_size)
+    click.echo(f"Linked {result.enrollments} enrollments to students in {result.batches} batches ({result.seconds:.2f}s).")
+    if result.pending:
+        click.echo(f"{result.pending} enrollments are still unlinked; run the backfill again.", err=True)
+        sys.exit(1)
+
+@virtulearn.command("changes")
+@click.option("--since", type=int, default=0, show_default=True, help="Cursor from the previous sync; 0 replays the whole log.")
+@click.option("--batch-size", type=int, default=CHANGE_BATCH_SIZE, show_default=True, help="Changes read per query.")
+@click.option("--follow", is_flag=True, help="Keep polling for new changes until interrupted.")
+@click.option("--interval", type=float, default=1.0, show_default=True, help="Seconds between polls with --follow.")
+def changes_command(since, batch_size, follow, interval):
+    """
+    Stream changes after cursor --since as JSON lines, each with the row's
+    current values, then print the next cursor to stderr.
+    """
+    cursor = since
+    try:
+        while True:
+            for batch in iter_changes(cursor, batch_size):
+                for change in batch.changes:
+                    click.echo(json.dumps(change, separators=(",", ":")))
+                cursor = batch.cursor
+            if not follow:
+                break
+            time.sleep(interval)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+    click.echo(f"Next cursor: {cursor}", err=True)
+
+@virtulearn.command("compact-changes")
+@click.option("--before", type=int, help="Only compact entries below this cursor.")
+def compact_changes_command(before):
+    """Drop change log entries superseded by a newer change to the same row."""
+    result = compact_changes(before)
+    click.echo(f"Removed {result.removed} superseded changes, {result.remaining} left ({result.seconds:.2f}s).")
+
+@virtulearn.command("snapshot")
+@click.option("--path", default=None, help="Defaults to VIRTULEARN_SNAPSHOT_PATH (virtulearn-catalog.snap).")
+@click.option("--check", is_flag=True, help="Only report whether the snapshot is fresh; exit 1 if not.")
+def snapshot_command(path, check):
+    """Write a memory-mapped read-only catalog snapshot, or check its freshness."""
+    from lib.snapshot import SNAPSHOT_PATH, CatalogSnapshot, SnapshotError, write_snapshot
+    path = path or SNAPSHOT_PATH
+    if check:
+        try:
+            with CatalogSnapshot(path) as snapshot:
+                fresh = snapshot.is_fresh()
+                click.echo(f"{path}: {'fresh' if fresh else 'stale'} (change cursor {snapshot.change_cursor}, taken {snapshot.header['created_at']}).")
+        except (OSError, SnapshotError) as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        if not fresh:
+            sys.exit(1)
+        return
+    result = write_snapshot(path)
+    rows = ", ".join(f"{count} {table}" for table, count in result.rows.items())
+    click.echo(f"Wrote {rows} to {result.path} ({result.bytes / 1e6:.1f} MB) in {result.seconds:.2f}s at change cursor {result.change_cursor}.")
+
+@virtulearn.command("dbinfo")
+def dbinfo_command():
+    """Print the effective database engine settings."""
+    for name, value in describe_engine().items():
+        click.echo(f"{name}: {value}")
+
+@virtulearn.command("migrate")
+def migrate_command():
+    """Apply pending schema migrations and print the schema version."""
+    applied, latest = migration_status()
+    click.echo(f"Schema version: {applied} (latest available: {latest})")
+
+@virtulearn.command("advise")
+def advise_command():
+    """Run EXPLAIN QUERY PLAN over the CLI's queries and flag table scans."""
+    reports = explain_cli_queries()
+    for report in reports:
+        click.echo(f"[{'SCAN' if report['scans'] else 'OK'}] {report['query']}")
+        for detail in report["plan"]:
+            click.echo(f"    {detail}")
+    if any(report["scans"] for report in reports):
+        sys.exit(1)
+
+@virtulearn.command("search")
+@click.argument("term")
+@click.option("--limit", type=int, default=20, show_default=True)
+def search_command(term, limit):
+    """Prefix search over instructors, courses and students."""
+    for instructor_id, name, email, expertise in search_instructors(term, limit):
+        click.echo(f"instructor\t{instructor_id}\t{name}\t{email}\t{expertise or ''}")
+    for course_id, title, instructor_name in search_courses(term, limit):
+        click.echo(f"course\t{course_id}\t{title}\t{instructor_name or ''}")
+    for student_name, student_email, count in search_students(term, limit):
+        click.echo(f"student\t{student_email}\t{student_name}\t{count}")
+
+@virtulearn.command("recommend")
+@click.option("--course-id", type=int, help="Courses most often taken with this one.")
+@click.option("--email", help="Courses most often taken with this student's courses.")
+@click.option("--limit", type=int, default=5, show_default=True)
+def recommend_command(course_id, email, limit):
+    """Print co-enrolled courses: ID, title, shared students, similarity."""
+    from lib.analytics import also_took, recommend_courses
+    from lib.helpers import get_enrollments_by_student_email
+    if (course_id is None) == (email is None):
+        raise click.UsageError("Give exactly one of --course-id or --email.")
+    if course_id is not None:
+        neighbours = also_took(course_id, limit)
+    else:
+        with get_read_session() as session:
+            course_ids = {enrollment.course_id for enrollment in get_enrollments_by_student_email(session, email) if enrollment.course_id is not None}
+        neighbours = recommend_courses(course_ids, limit)
+    for neighbour in neighbours:
+        click.echo(f"{neighbour.course_id}\t{neighbour.title}\t{neighbour.shared}\t{neighbour.similarity:.3f}")
+
+@virtulearn.command("generate")
+@click.option("--instructors", type=int, default=100, show_default=True)
+@click.option("--courses", type=int, default=500, show_default=True)
+@click.option("--enrollments", type=int, default=100000, show_default=True)
+@click.option("--seed", type=int, default=42, show_default=True)
+def generate_command(instructors, courses, enrollments, seed):
+    """Add deterministic synthetic instructors, courses and enrollments."""
+    from lib.datagen import generate
+    result = generate(instructors, courses, enrollments, seed)
+    click.echo(f"Generated {result.instructors} instructors, {result.courses} courses and {result.enrollments} enrollments for {result.students} students in {result.seconds:.2f}s.")
+
+@virtulearn.command("serve")
+@click.option("--host", default=None, help="Defaults to VIRTULEARN_HTTP_HOST (127.0.0.1).")
+@click.option("--port", type=int, default=None, help="Defaults to VIRTULEARN_HTTP_PORT (8080).")
+@click.option("--access-log", is_flag=True, help="Log every request to stderr.")
+def serve_command(host, port, access_log):
+    """Serve the JSON HTTP API until interrupted."""
+    from lib.server import HTTP_HOST, HTTP_PORT, make_server
+    server = make_server(host or HTTP_HOST, port if port is not None else HTTP_PORT, quiet=not access_log)
+    bound_host, bound_port = server.server_address[:2]
+    click.echo(f"Serving VirtuLearn on http://{bound_host}:{bound_port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+@virtulearn.command("replicate")
+@click.option("--interval", type=float, default=1.0, show_default=True, help="Seconds between copies.")
+@click.option("--once", is_flag=True, help="Copy once and exit.")
+def replicate_command(interval, once):
+    """Keep SQLite read replicas in sync with the primary (local stand-in)."""
+    from lib.replica import replicate
+    def report(result):
+        click.echo(f"Copied {result.pages} pages to {result.replicas} replicas ({result.seconds:.2f}s).")
+    try:
+        replicate(interval, 1 if once else None, report)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
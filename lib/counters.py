@@ -0,0 +1,156 @@
+from collections import Counter
+from sqlalchemy import event, update, bindparam, select, func, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.cache import invalidate_on_commit
+
+# Denormalized counters kept in step with the enrollments table:
+#   Course.enrollment_count     enrollments in the course
+#   Instructor.student_count    enrollments linked to the instructor
+# ORM writes are handled by the flush hooks below; Core/bulk writers must
+# call apply_deltas() or subtract_enrollments() in the same transaction as
+# their change. subtract_enrollments() and rebuild_counters() run in a
+# session so the cached counters are dropped when it commits, not before.
+
+courses = Course.__table__
+instructors = Instructor.__table__
+enrollments = Enrollment.__table__
+
+_course_update = (
+    update(courses)
+    .where(courses.c.id == bindparam("target_id"))
+    .values(enrollment_count=courses.c.enrollment_count + bindparam("delta"))
+)
+_instructor_update = (
+    update(instructors)
+    .where(instructors.c.id == bindparam("target_id"))
+    .values(student_count=instructors.c.student_count + bindparam("delta"))
+)
+
+def apply_deltas(conn, course_deltas: Counter, instructor_deltas: Counter):
+    """
+    Adds the given per-course and per-instructor enrollment deltas to the
+    counters, one executemany per table.
+    """
+    course_params = [{"target_id": key, "delta": delta} for key, delta in course_deltas.items() if key is not None and delta]
+    instructor_params = [{"target_id": key, "delta": delta} for key, delta in instructor_deltas.items() if key is not None and delta]
+    if course_params:
+        conn.execute(_course_update, course_params)
+    if instructor_params:
+        conn.execute(_instructor_update, instructor_params)
+
+def count_rows(rows) -> tuple[Counter, Counter]:
+    """
+    Returns (course deltas, instructor deltas) for inserting rows, given as
+    dicts with course_id and instructor_id keys.
+    """
+    course_deltas = Counter()
+    instructor_deltas = Counter()
+    for row in rows:
+        course_deltas[row["course_id"]] += 1
+        instructor_deltas[row["instructor_id"]] += 1
+    return course_deltas, instructor_deltas
+
+def subtract_enrollments(session: Session, *criteria) -> int:
+    """
+    Takes the enrollments matching criteria off the counters, ahead of a
+    set-based delete with the same criteria in session's transaction.
+    Returns how many match.
+    """
+    conn = session.connection()
+    course_deltas = Counter()
+    instructor_deltas = Counter()
+    for column, deltas in ((enrollments.c.course_id, course_deltas), (enrollments.c.instructor_id, instructor_deltas)):
+        for key, count in conn.execute(select(column, func.count()).where(*criteria).group_by(column)):
+            deltas[key] -= count
+    apply_deltas(conn, course_deltas, instructor_deltas)
+    invalidate_on_commit(session, Course.__name__)
+    invalidate_on_commit(session, Instructor.__name__)
+    return -sum(course_deltas.values())
+
+def expire_counters(session: Session):
+    """
+    Expires the counter attributes of every Course and Instructor loaded in
+    session, after counters were changed behind the ORM's back.
+    """
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Course):
+            session.expire(obj, ["enrollment_count"])
+        elif isinstance(obj, Instructor):
+            session.expire(obj, ["student_count"])
+
+def rebuild_counters(session: Session):
+    """
+    Recomputes every counter from the enrollments table, in session's
+    transaction.
+    """
+    conn = session.connection()
+    conn.execute(update(courses).values(
+        enrollment_count=select(func.count()).where(enrollments.c.course_id == courses.c.id).scalar_subquery()
+    ))
+    conn.execute(update(instructors).values(
+        student_count=select(func.count()).where(enrollments.c.instructor_id == instructors.c.id).scalar_subquery()
+    ))
+    invalidate_on_commit(session, Course.__name__)
+    invalidate_on_commit(session, Instructor.__name__)
+
+def _committed(obj, attribute: str):
+    history = inspect(obj).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attribute)
+
+@event.listens_for(Session, "before_flush")
+def _count_cascaded_enrollments(session, flush_context, instances):
+    # Enrollments of a deleted course are removed by ON DELETE CASCADE
+    # without being loaded, so count them per instructor before the flush.
+    # Loaded ones are flushed individually and handled after the flush.
+    session.info.pop("cascaded_instructor_deltas", None)
+    course_ids = [obj.id for obj in session.deleted if isinstance(obj, Course)]
+    if not course_ids:
+        return
+    criteria = [enrollments.c.course_id.in_(course_ids)]
+    flushed = [obj.id for obj in session.deleted if isinstance(obj, Enrollment)]
+    if flushed:
+        criteria.append(enrollments.c.id.not_in(flushed))
+    rows = session.connection().execute(
+        select(enrollments.c.instructor_id, func.count()).where(*criteria).group_by(enrollments.c.instructor_id)
+    )
+    session.info["cascaded_instructor_deltas"] = Counter({key: -count for key, count in rows})
+
+@event.listens_for(Session, "after_flush")
+def _track_enrollment_counts(session, flush_context):
+    course_deltas = Counter()
+    instructor_deltas = Counter(session.info.pop("cascaded_instructor_deltas", {}))
+    for obj in session.new:
+        if isinstance(obj, Enrollment):
+            course_deltas[obj.course_id] += 1
+            instructor_deltas[obj.instructor_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Enrollment):
+            course_deltas[_committed(obj, "course_id")] -= 1
+            instructor_deltas[_committed(obj, "instructor_id")] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Enrollment):
+            for attribute, deltas in (("course_id", course_deltas), ("instructor_id", instructor_deltas)):
+                history = inspect(obj).attrs[attribute].history
+                if history.has_changes():
+                    for old in history.deleted:
+                        deltas[old] -= 1
+                    for new in history.added:
+                        deltas[new] += 1
+    if not course_deltas and not instructor_deltas:
+        return
+    apply_deltas(session.connection(), course_deltas, instructor_deltas)
+    # Loaded instances and cached snapshots now hold stale counts.
+    for model, deltas, attribute in ((Course, course_deltas, "enrollment_count"), (Instructor, instructor_deltas, "student_count")):
+        for key, delta in deltas.items():
+            if key is None or not delta:
+                continue
+            invalidate_on_commit(session, model.__name__, key)
+            obj = session.identity_map.get(identity_key(model, key))
+            if obj is not None:
+                session.expire(obj, [attribute])
@@ -1,22 +1,211 @@
 import os
-from sqlalchemy import create_engine
+import itertools
+import random
+import time
+from contextvars import ContextVar
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError, OperationalError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from contextlib import contextmanager
+from lib import instrumentation
 
 Base = declarative_base()
 
 from lib.models.instructor import Instructor
 from lib.models.course import Course
 from lib.models.enrollment import Enrollment
+from lib.models.student import Student
+from lib.models.archived_enrollment import ArchivedEnrollment
+from lib.models.change import Change
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///virtulearn.db")
-engine = create_engine(DATABASE_URL)
+DB_PROFILE = os.environ.get("VIRTULEARN_DB_PROFILE", "default")
+BUSY_RETRIES = int(os.environ.get("VIRTULEARN_BUSY_RETRIES", "8"))
+BUSY_BACKOFF_MS = float(os.environ.get("VIRTULEARN_BUSY_BACKOFF_MS", "5"))
+DATABASE_READ_URLS = [
+    url.strip()
+    for url in (os.environ.get("DATABASE_READ_URLS") or os.environ.get("DATABASE_READ_URL", "")).split(",")
+    if url.strip()
+]
+
+# Engine profiles. SQLite PRAGMAs are applied to every new connection; pool
+# options are only used for server databases. Any value can be overridden
+# with VIRTULEARN_SQLITE_<PRAGMA> or VIRTULEARN_<POOL_OPTION> (upper-cased).
+ENGINE_PROFILES = {
+    "default": {
+        "sqlite_pragmas": {
+            "foreign_keys": "ON",
+            "busy_timeout": 5000,
+        },
+        "pool": {
+            "pool_pre_ping": False,
+        },
+    },
+    "production": {
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": 268435456,
+            "cache_size": -65536,
+            "temp_store": "MEMORY",
+            "busy_timeout": 5000,
+            "foreign_keys": "ON",
+        },
+        "pool": {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True,
+        },
+    },
+}
+
+def _env_override(name: str, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    return value
+
+def resolve_profile(name: str = DB_PROFILE) -> dict:
+    """
+    Returns the named engine profile with environment overrides applied.
+    """
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown database profile '{name}'. Choose from: {', '.join(ENGINE_PROFILES)}.")
+    profile = ENGINE_PROFILES[name]
+    return {
+        "name": name,
+        "sqlite_pragmas": {
+            pragma: _env_override(f"VIRTULEARN_SQLITE_{pragma.upper()}", value)
+            for pragma, value in profile["sqlite_pragmas"].items()
+        },
+        "pool": {
+            option: _env_override(f"VIRTULEARN_{option.upper()}", value)
+            for option, value in profile["pool"].items()
+        },
+    }
+
+def build_engine(url: str, profile_name: str = DB_PROFILE):
+    """
+    Creates an engine for url configured according to the given profile.
+    """
+    profile = resolve_profile(profile_name)
+    if url.startswith("sqlite"):
+        new_engine = create_engine(url)
+        _configure_sqlite(new_engine, profile["sqlite_pragmas"])
+    else:
+        new_engine = create_engine(url, **profile["pool"])
+    new_engine.virtulearn_profile = profile
+    instrumentation.attach(new_engine)
+    return new_engine
+
+def _configure_sqlite(sqlite_engine, pragmas: dict):
+    @event.listens_for(sqlite_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # pysqlite defers BEGIN until the first DML statement, which breaks
+        # SAVEPOINT nesting. Disable its transaction handling and emit BEGIN
+        # ourselves so nested transactions behave as documented.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+    @event.listens_for(sqlite_engine, "begin")
+    def _emit_begin(conn):
+        if conn.get_execution_options().get("virtulearn_begin_immediate"):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conn.exec_driver_sql("BEGIN")
+
+def describe_engine(target_engine=None) -> dict:
+    """
+    Returns the effective engine settings: the profile in use, pool
+    configuration and, for SQLite, the PRAGMA values reported by a live
+    connection.
+    """
+    target_engine = target_engine or engine
+    pool = target_engine.pool
+    settings = {
+        "url": target_engine.url.render_as_string(hide_password=True),
+        "dialect": target_engine.dialect.name,
+        "profile": target_engine.virtulearn_profile["name"],
+        "pool_class": type(pool).__name__,
+    }
+    if target_engine is engine and read_engines:
+        settings["read_urls"] = ", ".join(replica.url.render_as_string(hide_password=True) for replica in read_engines)
+    for attribute, label in (("size", "pool_size"), ("_max_overflow", "max_overflow"), ("_timeout", "pool_timeout"), ("_recycle", "pool_recycle"), ("_pre_ping", "pool_pre_ping")):
+        value = getattr(pool, attribute, None)
+        if value is not None:
+            settings[label] = value() if callable(value) else value
+    if target_engine.dialect.name == "sqlite":
+        with target_engine.connect() as conn:
+            for pragma in target_engine.virtulearn_profile["sqlite_pragmas"]:
+                settings[f"sqlite.{pragma}"] = conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+    return settings
+
+engine = build_engine(DATABASE_URL)
 Session = sessionmaker(bind=engine)
 
+# Read/write routing. With DATABASE_READ_URL (or a comma-separated
+# DATABASE_READ_URLS) set, read-only paths take their connections from the
+# replicas in turn, through get_read_session() and read_engine(); writes,
+# migrations and anything else use the primary `engine`. Once the primary
+# commits inside a read_your_writes() scope (one menu action, CLI command or
+# HTTP request), the rest of that scope reads from the primary as well, so a
+# command always sees its own writes however far the replicas lag.
+read_engines = [build_engine(url) for url in DATABASE_READ_URLS]
+_next_read_engine = itertools.cycle(read_engines).__next__
+_primary_pinned = ContextVar("virtulearn_primary_pinned", default=False)
+
+def _pin_primary(conn):
+    _primary_pinned.set(True)
+
+if read_engines:
+    event.listen(engine, "commit", _pin_primary)
+
 @contextmanager
-def get_session():
-    session = Session()
+def read_your_writes():
+    """
+    Scope (one command or request) whose reads go to the primary once it
+    has committed a write.
+    """
+    token = _primary_pinned.set(False)
+    try:
+        yield
+    finally:
+        _primary_pinned.reset(token)
+
+def read_engine():
+    """
+    Returns the engine for a read-only query: the next replica, or the
+    primary if there are no replicas or the current scope has written.
+    """
+    if not read_engines or _primary_pinned.get():
+        return engine
+    return _next_read_engine()
+
+def reads_replica(session) -> bool:
+    """
+    True if session is bound to a replica. Its rows may be older than what
+    this process has committed, so they must not go into caches that
+    primary sessions read from.
+    """
+    return session.bind is not None and session.bind in read_engines
+
+# Session hooks that keep the lookup cache and denormalized counters in step
+# with ORM writes.
+import lib.counters
+
+@contextmanager
+def get_session(bind=None):
+    session = Session(bind=bind or engine)
     try:
         yield session
         session.commit()
@@ -26,16 +215,70 @@ def get_session():
     finally:
         session.close()
 
-def create_db_tables():
+def is_busy_error(error: Exception) -> bool:
+    """
+    True if error means a concurrent transaction got in the way and the
+    transaction can simply be run again: SQLite's "database is locked",
+    or a serialization failure or deadlock on server databases.
+    """
+    if not isinstance(error, DBAPIError):
+        return False
+    if getattr(error.orig, "pgcode", None) in ("40001", "40P01"):
+        return True
+    return isinstance(error, OperationalError) and "database is locked" in str(error.orig)
+
+# Transactions run by run_transaction() are meant to write. On SQLite they
+# start with BEGIN IMMEDIATE and take the write lock up front, so concurrent
+# writers wait their turn (busy_timeout) instead of failing when a read lock
+# cannot be upgraded; other databases ignore the option.
+_write_engine = engine.execution_options(virtulearn_begin_immediate=True)
+
+def run_transaction(work, *args, retries: int = BUSY_RETRIES, **kwargs):
+    """
+    Runs work(session, *args, **kwargs) in its own transaction and returns
+    its result, which should not need the session any more (e.g. an ID).
+    When the database is busy the whole transaction is run again, up to
+    retries times, after a random exponential backoff.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with get_session(bind=_write_engine) as session:
+                return work(session, *args, **kwargs)
+        except DBAPIError as e:
+            if attempt == retries or not is_busy_error(e):
+                raise
+        time.sleep(random.uniform(0, BUSY_BACKOFF_MS * 2 ** attempt) / 1000)
+
+@contextmanager
+def get_read_session():
+    """
+    Session for read-only work, bound to read_engine(). It is never
+    committed, so nothing written through it is kept.
+    """
+    session = Session(bind=read_engine())
     try:
-        Base.metadata.create_all(engine)
+        yield session
+    finally:
+        session.close()
+
+def create_db_tables(verbose=True):
+    """
+    Creates the schema or applies pending migrations. A failed migration is
+    rolled back and raised, so callers can refuse to start.
+    """
+    from lib.migrations import migrate
+    for version, description in migrate():
+        print(f"Applied migration {version}: {description}")
+    if verbose:
         print("Database tables created/checked.")
-    except Exception as e:
-        print(f"Error creating database tables: {e}")
 
 def drop_db_tables():
+    import lib.migrations  # registers schema_version so it is dropped too
+    from lib.search import drop_search_index
     try:
-        Base.metadata.drop_all(engine)
+        with engine.begin() as conn:
+            drop_search_index(conn)
+            Base.metadata.drop_all(conn)
         print("Database tables dropped.")
     except Exception as e:
         print(f"Error dropping database tables: {e}")
\ No newline at end of file
@@ -0,0 +1,166 @@
+import bisect
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select, func
+from lib.database import engine, get_session
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.counters import rebuild_counters
+from lib.search import deferred_indexing
+from lib.changes import deferred_change_log
+from lib.students import resolve_student_ids
+
+# Deterministic synthetic data for benchmarks and demos. The same arguments
+# and seed always produce the same rows. Popularity is skewed the way real
+# catalogues are: a few instructors teach many courses, a few courses take
+# most enrollments (Zipf-like weights), most students take one or two
+# courses, and enrollments peak at the start of each term.
+
+FIRST_NAMES = (
+    "Ada", "Alan", "Amara", "Ben", "Chen", "Dana", "Elif", "Emeka", "Farah", "Grace",
+    "Hana", "Ivan", "Jomo", "Kofi", "Lena", "Luis", "Maya", "Nia", "Omar", "Priya",
+    "Quinn", "Ravi", "Sara", "Tariq", "Uma", "Victor", "Wanjiru", "Xin", "Yusuf", "Zara",
+)
+LAST_NAMES = (
+    "Abara", "Baker", "Costa", "Dube", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jensen",
+    "Kamau", "Lopez", "Mensah", "Novak", "Otieno", "Patel", "Quist", "Rossi", "Singh", "Tanaka",
+    "Usman", "Vega", "Wang", "Xu", "Young", "Zulu",
+)
+SUBJECTS = (
+    "Python", "Databases", "Statistics", "Design", "Marketing", "Finance", "Writing",
+    "Networks", "Algebra", "Biology", "History", "Photography", "Security", "Cloud",
+)
+LEVELS = ("Foundations", "Essentials", "Intermediate", "Advanced", "Masterclass")
+# Relative enrollment volume by month: peaks in January and September.
+MONTH_WEIGHTS = (14, 8, 6, 5, 5, 4, 4, 9, 16, 10, 8, 5)
+
+CHUNK_SIZE = 10000
+HISTORY_DAYS = 3 * 365
+MAX_COURSES_PER_STUDENT = 12
+
+@dataclass
+class GenerateResult:
+    instructors: int
+    courses: int
+    enrollments: int
+    students: int
+    seconds: float
+
+def zipf_weights(count: int, exponent: float, rng: random.Random) -> list[float]:
+    """
+    Returns cumulative Zipf weights for count items in random order, for use
+    with rng.choices(..., cum_weights=...).
+    """
+    weights = [1 / (rank + 1) ** exponent for rank in range(count)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+def _person(rng: random.Random) -> tuple[str, str]:
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+def _next_id(conn, model) -> int:
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+def _insert(conn, model, rows: list[dict]):
+    with deferred_indexing(conn, model.__tablename__), deferred_change_log(conn, model.__tablename__):
+        conn.execute(insert(model), rows)
+
+def _enrollment_dates(rng: random.Random, end: datetime):
+    # Days of the history window weighted by month, sampled by bisection.
+    days = [end - timedelta(days=offset) for offset in range(HISTORY_DAYS)]
+    cumulative = list(itertools.accumulate(MONTH_WEIGHTS[day.month - 1] for day in days))
+    total = cumulative[-1]
+    while True:
+        day = days[bisect.bisect(cumulative, rng.random() * total)]
+        yield day.replace(hour=rng.randrange(8, 22), minute=rng.randrange(60))
+
+def generate(instructors: int, courses: int, enrollments: int, seed: int = 42, chunk_size: int = CHUNK_SIZE) -> GenerateResult:
+    """
+    Appends the requested number of synthetic instructors, courses and
+    enrollments, then rebuilds the enrollment counters. Students are created
+    as needed; each takes one or more distinct courses.
+    """
+    if instructors < 1 or courses < 1:
+        raise ValueError("At least one instructor and one course are required.")
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    end = datetime(2025, 6, 30)
+
+    with engine.begin() as conn:
+        first_instructor = _next_id(conn, Instructor)
+        instructor_rows = []
+        for offset in range(instructors):
+            first, last = _person(rng)
+            instructor_id = first_instructor + offset
+            instructor_rows.append({
+                "id": instructor_id,
+                "name": f"{first} {last}",
+                "email": f"{first}.{last}.{instructor_id}@faculty.example.com".lower(),
+                "expertise": rng.choice(SUBJECTS),
+            })
+        _insert(conn, Instructor, instructor_rows)
+
+        first_course = _next_id(conn, Course)
+        instructor_weights = zipf_weights(instructors, 1.1, rng)
+        instructor_ids = [row["id"] for row in instructor_rows]
+        course_instructors = rng.choices(instructor_ids, cum_weights=instructor_weights, k=courses)
+        course_rows = []
+        for offset, instructor_id in enumerate(course_instructors):
+            course_id = first_course + offset
+            course_rows.append({
+                "id": course_id,
+                "title": f"{rng.choice(SUBJECTS)} {rng.choice(LEVELS)} {course_id}",
+                "duration": rng.choice((10, 15, 20, 30, 45, 60, 90)),
+                # A few courses have not been assigned an instructor yet.
+                "instructor_id": instructor_id if rng.random() >= 0.05 else None,
+            })
+        _insert(conn, Course, course_rows)
+
+    course_ids = [row["id"] for row in course_rows]
+    course_instructor = {row["id"]: row["instructor_id"] for row in course_rows}
+    course_weights = zipf_weights(courses, 1.0, rng)
+    max_per_student = max(1, min(MAX_COURSES_PER_STUDENT, courses // 2))
+    dates = _enrollment_dates(rng, end)
+    with engine.connect() as conn:
+        next_id = _next_id(conn, Enrollment)
+    student = 0
+    rows = []
+    remaining = enrollments
+    while remaining:
+        # Course load per student: 1 + exponential with mean 1.5, capped.
+        load = min(1 + int(rng.expovariate(1 / 1.5)), max_per_student, remaining)
+        first, last = _person(rng)
+        # Keyed by the student's first enrollment id, so emails stay unique
+        # when generating into a database that already has students.
+        email = f"{first}.{last}.{next_id}@students.example.com".lower()
+        chosen = set()
+        while len(chosen) < load:
+            course_id = rng.choices(course_ids, cum_weights=course_weights)[0]
+            chosen.add(course_id if course_id not in chosen else rng.choice(course_ids))
+        for course_id in sorted(chosen):
+            rows.append({
+                "id": next_id,
+                "student_name": f"{first} {last}",
+                "student_email": email,
+                "course_id": course_id,
+                "instructor_id": course_instructor[course_id],
+                "enrollment_date": next(dates),
+            })
+            next_id += 1
+        student += 1
+        remaining -= load
+        if len(rows) >= chunk_size or not remaining:
+            with engine.begin() as conn:
+                student_ids = resolve_student_ids(conn, ((row["student_name"], row["student_email"]) for row in rows))
+                for row in rows:
+                    row["student_id"] = student_ids[row["student_email"]]
+                _insert(conn, Enrollment, rows)
+            rows = []
+
+    with get_session() as session:
+        rebuild_counters(session)
+    return GenerateResult(instructors, courses, enrollments, student, time.perf_counter() - started)
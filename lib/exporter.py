@@ -0,0 +1,133 @@
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+from sqlalchemy import select
+from lib.database import read_engine
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+
+CHUNK_SIZE = int(os.environ.get("VIRTULEARN_EXPORT_CHUNK_SIZE", "10000"))
+WRITE_BUFFER_SIZE = 1 << 20
+
+FORMATS = ("csv", "jsonl")
+
+@dataclass
+class ExportResult:
+    kind: str
+    path: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else float(self.rows)
+
+def instructors_query():
+    return select(Instructor.id, Instructor.name, Instructor.expertise, Instructor.email).order_by(Instructor.id)
+
+def courses_query():
+    return (
+        select(
+            Course.id,
+            Course.title,
+            Course.duration,
+            Course.instructor_id,
+            Instructor.name.label("instructor_name"),
+            Course.capacity,
+        )
+        .outerjoin(Instructor, Course.instructor_id == Instructor.id)
+        .order_by(Course.id)
+    )
+
+def enrollments_query():
+    return (
+        select(
+            Enrollment.id,
+            Enrollment.student_name,
+            Enrollment.student_email,
+            Enrollment.course_id,
+            Course.title.label("course_title"),
+            Enrollment.instructor_id,
+            Instructor.name.label("instructor_name"),
+            Enrollment.enrollment_date,
+        )
+        .outerjoin(Course, Enrollment.course_id == Course.id)
+        .outerjoin(Instructor, Enrollment.instructor_id == Instructor.id)
+        .order_by(Enrollment.id)
+    )
+
+EXPORT_QUERIES = {
+    "instructors": instructors_query,
+    "courses": courses_query,
+    "enrollments": enrollments_query,
+}
+
+def detect_format(path: str) -> tuple[str, bool]:
+    """
+    Returns (format, compressed) for an output path such as
+    'enrollments.csv' or 'enrollments.jsonl.gz'.
+    """
+    name = path.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    fmt = name.rsplit(".", 1)[-1]
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Use .csv or .jsonl, optionally with .gz.")
+    return fmt, compressed
+
+def _open_output(path: str, compressed: bool):
+    if compressed:
+        # Level 6 keeps gzip from becoming the bottleneck on large dumps.
+        raw = gzip.open(path, "wb", compresslevel=6)
+        return io.TextIOWrapper(io.BufferedWriter(raw, WRITE_BUFFER_SIZE), encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER_SIZE)
+
+def _write_csv(out, columns, partitions) -> int:
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    rows = 0
+    for chunk in partitions:
+        writer.writerows(chunk)
+        rows += len(chunk)
+    return rows
+
+def _write_jsonl(out, columns, partitions) -> int:
+    encode = json.JSONEncoder(default=str).encode
+    rows = 0
+    for chunk in partitions:
+        out.write("".join(encode(dict(zip(columns, row))) + "\n" for row in chunk))
+        rows += len(chunk)
+    return rows
+
+def export_table(kind: str, path: str, chunk_size: int = CHUNK_SIZE) -> ExportResult:
+    """
+    Streams one table to path as CSV or JSONL (gzip-compressed if the path
+    ends in .gz). Rows are fetched chunk_size at a time from a server-side
+    cursor as plain tuples, so memory use does not grow with the table.
+    """
+    if kind not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown data type '{kind}'.")
+    fmt, compressed = detect_format(path)
+    write = _write_csv if fmt == "csv" else _write_jsonl
+    started = time.perf_counter()
+    with read_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(EXPORT_QUERIES[kind]())
+        columns = list(result.keys())
+        with _open_output(path, compressed) as out:
+            rows = write(out, columns, result.partitions())
+    return ExportResult(kind, path, rows, time.perf_counter() - started)
+
+def export_all(directory: str, fmt: str = "csv", compressed: bool = False, chunk_size: int = CHUNK_SIZE) -> list[ExportResult]:
+    """
+    Exports instructors, courses and enrollments into directory as
+    <table>.<fmt>[.gz] files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    suffix = f".{fmt}.gz" if compressed else f".{fmt}"
+    return [export_table(kind, os.path.join(directory, kind + suffix), chunk_size) for kind in EXPORT_QUERIES]
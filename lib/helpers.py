@@ -1,17 +1,17 @@
-import functools
-from sqlalchemy.orm import Session
+import os
+from sqlalchemy import select, or_, and_
+from sqlalchemy.orm import Session, selectinload, joinedload
 from lib.models.instructor import Instructor
 from lib.models.course import Course
 from lib.models.enrollment import Enrollment
+from lib.models.archived_enrollment import ArchivedEnrollment
+from lib.models.student import Student
+from lib.students import normalize_email
+from lib.cache import cached_get
+from lib.instrumentation import timed_helper
 
-def log_query(func):
-    @functools.wraps(func)
-    def wrapper(session: Session, *args, **kwargs):
-        print(f"Queried {func.__name__} with args {args}, kwargs {kwargs}")
-        result = func(session, *args, **kwargs)
-        print(f"Result: {result}")
-        return result
-    return wrapper
+PAGE_SIZE = int(os.environ.get("VIRTULEARN_PAGE_SIZE", "50"))
+STREAM_BATCH_SIZE = int(os.environ.get("VIRTULEARN_STREAM_BATCH_SIZE", "1000"))
 
 def validate_input(prompt: str, type_func=str):
     """
@@ -27,23 +27,63 @@ def validate_input(prompt: str, type_func=str):
         except ValueError:
             print(f"Invalid input. Please enter a valid {type_func.__name__}.")
 
-@log_query
+def prompt_next_page() -> str:
+    """
+    Asks the user how to continue a paginated listing.
+    Returns 'next', 'all' or 'quit'.
+    """
+    while True:
+        choice = input("[Enter] next page, [a] show all remaining, [q] back to menu: ").strip().lower()
+        if choice in ('', 'n'):
+            return 'next'
+        if choice == 'a':
+            return 'all'
+        if choice == 'q':
+            return 'quit'
+        print("Invalid option. Please try again.")
+
+# Eager-loading strategies for the listing/detail views. Collections use
+# selectinload (one extra IN query per relationship), many-to-one references
+# use joinedload so each view issues a fixed number of statements.
+INSTRUCTOR_DETAIL_OPTIONS = (
+    selectinload(Instructor.courses),
+    selectinload(Instructor.enrollments).joinedload(Enrollment.course),
+)
+
+COURSE_DETAIL_OPTIONS = (
+    joinedload(Course.instructor),
+    selectinload(Course.enrollments),
+)
+
+ENROLLMENT_DETAIL_OPTIONS = (
+    joinedload(Enrollment.course),
+    joinedload(Enrollment.instructor),
+)
+
+ARCHIVED_ENROLLMENT_DETAIL_OPTIONS = (
+    joinedload(ArchivedEnrollment.course),
+    joinedload(ArchivedEnrollment.instructor),
+)
+
+@timed_helper
 def get_instructor_by_id(session: Session, instructor_id: int) -> Instructor | None:
     """
     Retrieves an Instructor object by its ID.
+    Served from the process cache when VIRTULEARN_CACHE is enabled.
     Returns Instructor ORM object or None if not found.
     """
-    return session.query(Instructor).get(instructor_id)
+    return cached_get(session, Instructor, "id", instructor_id, lambda: session.query(Instructor).get(instructor_id))
 
-@log_query
+@timed_helper
 def get_course_by_id(session: Session, course_id: int) -> Course | None:
     """
     Retrieves a Course object by its ID.
+    Served from the process cache when VIRTULEARN_CACHE is enabled.
     Returns Course ORM object or None if not found.
     """
-    return session.query(Course).get(course_id)
+    return cached_get(session, Course, "id", course_id, lambda: session.query(Course).get(course_id))
 
-@log_query
+@timed_helper
 def get_enrollment_by_id(session: Session, enrollment_id: int) -> Enrollment | None:
     """
     Retrieves an Enrollment object by its ID.
@@ -51,18 +91,169 @@ def get_enrollment_by_id(session: Session, enrollment_id: int) -> Enrollment | N
     """
     return session.query(Enrollment).get(enrollment_id)
 
-@log_query
+@timed_helper
 def get_instructor_by_email(session: Session, email: str) -> Instructor | None:
     """
     Retrieves an Instructor object by its email.
+    Served from the process cache when VIRTULEARN_CACHE is enabled.
     Returns Instructor ORM object or None if not found.
     """
-    return session.query(Instructor).filter(Instructor.email == email).first()
+    return cached_get(session, Instructor, "email", email, lambda: session.query(Instructor).filter(Instructor.email == email).first())
+
+@timed_helper
+def get_student_by_email(session: Session, email: str) -> Student | None:
+    """
+    Retrieves a Student by email (compared normalized).
+    Returns Student ORM object or None if not found.
+    """
+    return session.query(Student).filter(Student.email == normalize_email(email)).first()
+
+def _student_enrollments(session: Session, model, options, email: str) -> list:
+    student_id = select(Student.id).where(Student.email == normalize_email(email)).scalar_subquery()
+    return (
+        session.query(model)
+        .options(*options)
+        .filter(or_(
+            model.student_id == student_id,
+            # Rows the student backfill has not linked yet; none once it has run.
+            and_(model.student_id.is_(None), model.student_email == email),
+        ))
+        .order_by(model.id)
+        .all()
+    )
+
+@timed_helper
+def get_enrollments_by_student_email(session: Session, email: str, include_history: bool = False) -> list[Enrollment | ArchivedEnrollment]:
+    """
+    Retrieves all Enrollment objects for a student by their email, resolved
+    through the students table. With include_history, archived enrollments
+    (ArchivedEnrollment objects, which have the same attributes) are
+    included too.
+    Returns a list ordered by ID (empty list if none found).
+    """
+    enrollments = _student_enrollments(session, Enrollment, ENROLLMENT_DETAIL_OPTIONS, email)
+    if not include_history:
+        return enrollments
+    archived = _student_enrollments(session, ArchivedEnrollment, ARCHIVED_ENROLLMENT_DETAIL_OPTIONS, email)
+    return sorted(enrollments + archived, key=lambda enrollment: enrollment.id)
+
+def list_instructors_with_details(session: Session) -> list[Instructor]:
+    """
+    Retrieves all instructors with their courses and enrollments (and each
+    enrollment's course) eagerly loaded.
+    """
+    return session.query(Instructor).options(*INSTRUCTOR_DETAIL_OPTIONS).order_by(Instructor.id).all()
+
+def list_courses_with_details(session: Session) -> list[Course]:
+    """
+    Retrieves all courses with their instructor and enrollments eagerly loaded.
+    """
+    return session.query(Course).options(*COURSE_DETAIL_OPTIONS).order_by(Course.id).all()
+
+def list_enrollments_with_details(session: Session) -> list[Enrollment]:
+    """
+    Retrieves all enrollments with their course and instructor eagerly loaded.
+    """
+    return session.query(Enrollment).options(*ENROLLMENT_DETAIL_OPTIONS).order_by(Enrollment.id).all()
+
+@timed_helper
+def get_instructor_details_by_id(session: Session, instructor_id: int) -> Instructor | None:
+    """
+    Retrieves an Instructor by ID with courses and enrollments eagerly loaded.
+    Returns Instructor ORM object or None if not found.
+    """
+    return session.query(Instructor).options(*INSTRUCTOR_DETAIL_OPTIONS).filter(Instructor.id == instructor_id).first()
+
+@timed_helper
+def get_instructor_details_by_email(session: Session, email: str) -> Instructor | None:
+    """
+    Retrieves an Instructor by email with courses and enrollments eagerly loaded.
+    Returns Instructor ORM object or None if not found.
+    """
+    return session.query(Instructor).options(*INSTRUCTOR_DETAIL_OPTIONS).filter(Instructor.email == email).first()
+
+@timed_helper
+def get_course_details_by_id(session: Session, course_id: int) -> Course | None:
+    """
+    Retrieves a Course by ID with its instructor and enrollments eagerly loaded.
+    Returns Course ORM object or None if not found.
+    """
+    return session.query(Course).options(*COURSE_DETAIL_OPTIONS).filter(Course.id == course_id).first()
+
+@timed_helper
+def get_enrollment_details_by_id(session: Session, enrollment_id: int) -> Enrollment | None:
+    """
+    Retrieves an Enrollment by ID with its course and instructor eagerly loaded.
+    Returns Enrollment ORM object or None if not found.
+    """
+    return session.query(Enrollment).options(*ENROLLMENT_DETAIL_OPTIONS).filter(Enrollment.id == enrollment_id).first()
+
+# Keyset pagination: pages are ordered by primary key and continue from the
+# last id seen, so fetching page N never scans the N-1 pages before it.
+def get_instructors_page(session: Session, after_id: int = 0, page_size: int = PAGE_SIZE) -> list[Instructor]:
+    """
+    Retrieves up to page_size instructors with id greater than after_id.
+    """
+    return (
+        session.query(Instructor)
+        .filter(Instructor.id > after_id)
+        .order_by(Instructor.id)
+        .limit(page_size)
+        .all()
+    )
+
+def get_courses_page(session: Session, after_id: int = 0, page_size: int = PAGE_SIZE) -> list[Course]:
+    """
+    Retrieves up to page_size courses with id greater than after_id, with
+    their instructor and enrollments eagerly loaded.
+    """
+    return (
+        session.query(Course)
+        .options(*COURSE_DETAIL_OPTIONS)
+        .filter(Course.id > after_id)
+        .order_by(Course.id)
+        .limit(page_size)
+        .all()
+    )
+
+def get_enrollments_page(session: Session, after_id: int = 0, page_size: int = PAGE_SIZE) -> list[Enrollment]:
+    """
+    Retrieves up to page_size enrollments with id greater than after_id, with
+    their course and instructor eagerly loaded.
+    """
+    return (
+        session.query(Enrollment)
+        .options(*ENROLLMENT_DETAIL_OPTIONS)
+        .filter(Enrollment.id > after_id)
+        .order_by(Enrollment.id)
+        .limit(page_size)
+        .all()
+    )
+
+def stream_courses(session: Session, after_id: int = 0, batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Iterates over all courses with id greater than after_id, fetching
+    batch_size courses (and their enrollments) per keyset page. selectinload
+    cannot be combined with yield_per, so courses are not streamed from a
+    server-side cursor.
+    """
+    while True:
+        page = get_courses_page(session, after_id, batch_size)
+        yield from page
+        if len(page) < batch_size:
+            return
+        after_id = page[-1].id
 
-@log_query
-def get_enrollments_by_student_email(session: Session, email: str) -> list[Enrollment]:
+def stream_enrollments(session: Session, after_id: int = 0, batch_size: int = STREAM_BATCH_SIZE):
     """
-    Retrieves all Enrollment objects for a student by their email.
-    Returns a list of Enrollment ORM objects (empty list if none found).
+    Iterates over all enrollments with id greater than after_id, fetching
+    batch_size rows at a time from a server-side cursor.
     """
-    return session.query(Enrollment).filter(Enrollment.student_email == email).all()
\ No newline at end of file
+    stmt = (
+        select(Enrollment)
+        .options(*ENROLLMENT_DETAIL_OPTIONS)
+        .where(Enrollment.id > after_id)
+        .order_by(Enrollment.id)
+        .execution_options(yield_per=batch_size)
+    )
+    return session.scalars(stmt)
@@ -0,0 +1,328 @@
+import csv
+import functools
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import Table, MetaData, Column, Integer, String, insert, select, delete, exists, func
+from lib.database import engine
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.counters import apply_deltas, count_rows
+from lib.cache import entity_cache
+from lib.search import deferred_indexing
+from lib.changes import deferred_change_log
+from lib.models.student import Student
+from lib.students import normalize_email
+
+CHUNK_SIZE = int(os.environ.get("VIRTULEARN_IMPORT_CHUNK_SIZE", "5000"))
+
+@dataclass
+class ImportResult:
+    kind: str
+    inserted: int
+    rejected: int
+    seconds: float
+    rejects_path: str | None
+
+    @property
+    def rows_per_sec(self) -> float:
+        total = self.inserted + self.rejected
+        return total / self.seconds if self.seconds else float(total)
+
+class RejectWriter:
+    """
+    Writes rejected rows to a JSONL sidecar file next to the input, opening
+    it only once the first row is rejected.
+    """
+    def __init__(self, source_path: str):
+        self.path = f"{source_path}.rejects.jsonl"
+        self.count = 0
+        self._file = None
+
+    def write(self, line_no: int, reason: str, record: dict | str):
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"line": line_no, "reason": reason, "record": record}, default=str) + "\n")
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+@dataclass
+class MalformedRecord:
+    """
+    Stands in for a JSONL line that is not a JSON object, so readers can
+    reject it like any other bad row.
+    """
+    text: str
+    reason: str
+
+    def __str__(self):
+        return self.reason
+
+def _json_record(line: str):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return MalformedRecord(line, f"invalid JSON: {e}")
+    if not isinstance(record, dict):
+        return MalformedRecord(line, "line is not a JSON object")
+    return record
+
+def read_records(path: str):
+    """
+    Yields (line number, record dict) pairs from a .csv or .jsonl file.
+    A JSONL line that is not a JSON object yields a MalformedRecord instead.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            for line_no, row in enumerate(reader, start=2):
+                if row:
+                    yield line_no, dict(zip(header, row))
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if line:
+                    yield line_no, _json_record(line)
+
+def _text(record: dict, field: str) -> str | None:
+    value = record.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = str(value)
+    return value.strip() or None
+
+def _int(record: dict, field: str) -> int | None:
+    value = record.get(field)
+    if value is None or value == "":
+        return None
+    return int(value)
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date(value: str) -> datetime:
+    # Bulk files repeat the same few dates, so parse each distinct string once.
+    return datetime.fromisoformat(value.strip())
+
+def _date(record: dict, field: str, default: datetime) -> datetime:
+    value = record.get(field)
+    # JSONL values may be numbers; those fail to parse and reject the row.
+    return _parse_date(str(value)) if value else default
+
+def _insert_chunk(table, stmt, rows: list[dict], before_insert, after_insert) -> dict[int, str]:
+    # Returns {row index: reason} for the rows before_insert rejected.
+    with engine.begin() as conn:
+        rejected = (before_insert(conn, rows) if before_insert is not None else None) or {}
+        if rejected:
+            rows = [row for index, row in enumerate(rows) if index not in rejected]
+        if rows:
+            with deferred_indexing(conn, table.name), deferred_change_log(conn, table.name):
+                conn.execute(stmt, rows)
+            if after_insert is not None:
+                after_insert(conn, rows)
+    return rejected
+
+def _update_counters(conn, rows: list[dict]):
+    apply_deltas(conn, *count_rows(rows))
+
+# Each enrollment chunk is staged in a temporary table, so creating its new
+# students and finding its students' existing enrollments are a couple of
+# set-based statements instead of one lookup per few hundred emails.
+_staged = Table(
+    "import_staged_enrollments", MetaData(),
+    Column("row_index", Integer, primary_key=True),
+    Column("email", String, nullable=False),
+    Column("name", String),
+    Column("course_id", Integer),
+    prefixes=["TEMPORARY"],
+)
+
+def _link_students(conn, rows: list[dict]) -> dict[int, str]:
+    """
+    Sets student_id on every row, adding the students that do not exist
+    yet, then rejects rows that would enroll a student in a course twice or
+    take a course past its capacity.
+    """
+    _staged.create(conn, checkfirst=True)
+    conn.execute(insert(_staged), [
+        {"row_index": index, "email": row["student_email"], "name": row["student_name"], "course_id": row["course_id"]}
+        for index, row in enumerate(rows)
+    ])
+    students = Student.__table__
+    enrollments = Enrollment.__table__
+    # A new student takes the name on their first row in the chunk.
+    first_rows = select(func.min(_staged.c.row_index)).group_by(_staged.c.email)
+    conn.execute(insert(students).from_select(
+        ["email", "name"],
+        select(_staged.c.email, _staged.c.name)
+        .where(_staged.c.row_index.in_(first_rows), ~exists().where(students.c.email == _staged.c.email)),
+    ))
+    enrolled = exists().where(enrollments.c.student_id == students.c.id, enrollments.c.course_id == _staged.c.course_id)
+    linked = conn.execute(
+        select(_staged.c.row_index, students.c.id, enrolled).join(students, students.c.email == _staged.c.email)
+    ).all()
+    conn.execute(delete(_staged))
+    taken = set()
+    for index, student_id, already in linked:
+        rows[index]["student_id"] = student_id
+        if already:
+            taken.add((student_id, rows[index]["course_id"]))
+    courses = Course.__table__
+    seats = dict(conn.execute(
+        select(courses.c.id, courses.c.capacity - courses.c.enrollment_count)
+        .where(courses.c.id.in_({row["course_id"] for row in rows}), courses.c.capacity.is_not(None))
+    ).all())
+    rejected = {}
+    for index, row in enumerate(rows):
+        key = (row["student_id"], row["course_id"])
+        if key in taken:
+            rejected[index] = f"{row['student_email']} is already enrolled in course {row['course_id']}"
+        elif row["course_id"] in seats and seats[row["course_id"]] <= 0:
+            rejected[index] = f"course {row['course_id']} is full"
+        else:
+            taken.add(key)
+            if row["course_id"] in seats:
+                seats[row["course_id"]] -= 1
+    return rejected
+
+def _run_import(kind: str, path: str, table, convert, chunk_size: int, before_insert=None, after_insert=None) -> ImportResult:
+    """
+    Converts each record with convert(record) -> row dict, raising ValueError
+    to reject it, and inserts accepted rows with one executemany per chunk,
+    each chunk in its own transaction. before_insert(conn, rows) and
+    after_insert(conn, rows), if given, run in that same transaction;
+    before_insert may return {row index: reason} to reject rows of the chunk.
+    """
+    rejects = RejectWriter(path)
+    inserted = 0
+    chunk = []
+    sources = []
+    stmt = insert(table)
+    started = time.perf_counter()
+
+    def flush():
+        rejected = _insert_chunk(table, stmt, chunk, before_insert, after_insert)
+        for index, reason in rejected.items():
+            line_no, record = sources[index]
+            rejects.write(line_no, reason, record)
+        return len(chunk) - len(rejected)
+
+    try:
+        for line_no, record in read_records(path):
+            if isinstance(record, MalformedRecord):
+                rejects.write(line_no, record.reason, record.text)
+                continue
+            try:
+                chunk.append(convert(record))
+            except (ValueError, TypeError) as e:
+                rejects.write(line_no, str(e), record)
+                continue
+            sources.append((line_no, record))
+            if len(chunk) >= chunk_size:
+                inserted += flush()
+                chunk = []
+                sources = []
+        if chunk:
+            inserted += flush()
+    finally:
+        rejects.close()
+    elapsed = time.perf_counter() - started
+    return ImportResult(kind, inserted, rejects.count, elapsed, rejects.path if rejects.count else None)
+
+def import_instructors(path: str, chunk_size: int = CHUNK_SIZE) -> ImportResult:
+    """
+    Bulk-imports instructors (name, expertise, email) from CSV/JSONL.
+    Rows with a missing name/email or a duplicate email are rejected.
+    """
+    with engine.connect() as conn:
+        emails = set(conn.scalars(select(Instructor.email)))
+
+    def convert(record):
+        name = _text(record, "name")
+        email = _text(record, "email")
+        if not name or not email:
+            raise ValueError("name and email are required")
+        if email in emails:
+            raise ValueError(f"instructor with email '{email}' already exists")
+        emails.add(email)
+        return {"name": name, "expertise": _text(record, "expertise"), "email": email}
+
+    return _run_import("instructors", path, Instructor.__table__, convert, chunk_size)
+
+def import_courses(path: str, chunk_size: int = CHUNK_SIZE) -> ImportResult:
+    """
+    Bulk-imports courses (title, duration, instructor_id, capacity) from CSV/JSONL.
+    Rows with a missing or duplicate title, or an unknown instructor, are rejected.
+    """
+    with engine.connect() as conn:
+        titles = set(conn.scalars(select(Course.title)))
+        instructor_ids = set(conn.scalars(select(Instructor.id)))
+
+    def convert(record):
+        title = _text(record, "title")
+        if not title:
+            raise ValueError("title is required")
+        if title in titles:
+            raise ValueError(f"course with title '{title}' already exists")
+        instructor_id = _int(record, "instructor_id")
+        if instructor_id is not None and instructor_id not in instructor_ids:
+            raise ValueError(f"instructor {instructor_id} not found")
+        capacity = _int(record, "capacity")
+        if capacity is not None and capacity < 0:
+            raise ValueError("capacity cannot be negative")
+        titles.add(title)
+        return {"title": title, "duration": _int(record, "duration"), "instructor_id": instructor_id, "capacity": capacity}
+
+    return _run_import("courses", path, Course.__table__, convert, chunk_size)
+
+def import_enrollments(path: str, chunk_size: int = CHUNK_SIZE) -> ImportResult:
+    """
+    Bulk-imports enrollments (student_name, student_email, course_id,
+    instructor_id, enrollment_date) from CSV/JSONL.
+    Instructor resolution matches add_enrollment_cli: an unknown instructor_id
+    leaves the enrollment unlinked, and a blank one falls back to the course's
+    instructor. Rows with an unknown course, for a student already enrolled
+    in the course, or for a course with no seats left are rejected.
+    """
+    with engine.connect() as conn:
+        course_instructors = dict(conn.execute(select(Course.id, Course.instructor_id)).all())
+        instructor_ids = set(conn.scalars(select(Instructor.id)))
+    now = datetime.now()
+
+    def convert(record):
+        student_name = _text(record, "student_name")
+        student_email = _text(record, "student_email")
+        if not student_name or not student_email:
+            raise ValueError("student_name and student_email are required")
+        course_id = _int(record, "course_id")
+        if course_id not in course_instructors:
+            raise ValueError(f"course {course_id} not found")
+        instructor_id = _int(record, "instructor_id")
+        if instructor_id is None:
+            instructor_id = course_instructors[course_id]
+        elif instructor_id not in instructor_ids:
+            instructor_id = None
+        return {
+            "student_name": student_name,
+            "student_email": normalize_email(student_email),
+            "course_id": course_id,
+            "instructor_id": instructor_id,
+            "enrollment_date": _date(record, "enrollment_date", now),
+        }
+
+    result = _run_import("enrollments", path, Enrollment.__table__, convert, chunk_size, before_insert=_link_students, after_insert=_update_counters)
+    entity_cache.clear()
+    return result
+
+IMPORTERS = {
+    "instructors": import_instructors,
+    "courses": import_courses,
+    "enrollments": import_enrollments,
+}
@@ -0,0 +1,260 @@
+import atexit
+import builtins
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager, nullcontext
+from sqlalchemy import event
+
+PROFILE_ENABLED = os.environ.get("VIRTULEARN_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+STARTUP_REPORT_ENABLED = os.environ.get("VIRTULEARN_STARTUP_REPORT", "").strip().lower() in ("1", "true", "yes", "on")
+SLOW_QUERY_MS = float(os.environ.get("VIRTULEARN_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.environ.get("VIRTULEARN_SLOW_QUERY_LOG", "virtulearn-slow-queries.log")
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+SAVEPOINT_NAME = re.compile(r"sa_savepoint_\d+")
+
+slow_query_logger = logging.getLogger("virtulearn.slow_queries")
+
+class Timing:
+    """
+    Aggregated count/latency/row statistics for one statement, helper or
+    command.
+    """
+    __slots__ = ("count", "total_ms", "max_ms", "rows", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.statements = 0
+
+    def add(self, elapsed_ms: float, rows: int = 0, statements: int = 0):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.rows += rows
+        self.statements += statements
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statement_count = 0
+        self.statements = {}
+        self.helpers = {}
+        self.commands = {}
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def reset(self):
+        with self.lock:
+            self.statement_count = 0
+            self.statements.clear()
+            self.helpers.clear()
+            self.commands.clear()
+            self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+stats = Stats()
+
+def _record(table: dict, key: str, elapsed_ms: float, rows: int = 0, statements: int = 0):
+    with stats.lock:
+        timing = table.get(key)
+        if timing is None:
+            timing = table[key] = Timing()
+        timing.add(elapsed_ms, rows, statements)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("virtulearn_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["virtulearn_query_start"].pop()) * 1000
+    rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+    with stats.lock:
+        stats.statement_count += 1
+        stats.histogram[bisect_right(HISTOGRAM_BUCKETS_MS, elapsed_ms)] += 1
+    key = SAVEPOINT_NAME.sub("sa_savepoint_N", statement) if "sa_savepoint_" in statement else statement
+    _record(stats.statements, key, elapsed_ms, rows)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        slow_query_logger.warning("%.1f ms | %s | %r", elapsed_ms, " ".join(statement.split()), parameters)
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("virtulearn_query_start"):
+        conn.info["virtulearn_query_start"].pop()
+
+def attach(target_engine):
+    """
+    Starts recording every statement executed through target_engine.
+    Nothing is attached unless profiling is enabled, so a disabled profiler
+    adds no per-statement cost.
+    """
+    if not PROFILE_ENABLED or event.contains(target_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(target_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target_engine, "handle_error", _handle_error)
+
+def timed_helper(func):
+    """
+    Records call latency for a lookup helper. Returns func unchanged when
+    profiling is disabled.
+    """
+    if not PROFILE_ENABLED:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record(stats.helpers, func.__name__, (time.perf_counter() - started) * 1000)
+    return wrapper
+
+@contextmanager
+def _command_timer(name: str):
+    # Time spent waiting at input() prompts is the user's, not the command's,
+    # so it is taken off the recorded latency.
+    prompt = builtins.input
+    waited = 0.0
+
+    def timed_prompt(*args):
+        nonlocal waited
+        prompted = time.perf_counter()
+        try:
+            return prompt(*args)
+        finally:
+            waited += time.perf_counter() - prompted
+
+    builtins.input = timed_prompt
+    started = time.perf_counter()
+    statements_before = stats.statement_count
+    try:
+        yield
+    finally:
+        builtins.input = prompt
+        elapsed_ms = (time.perf_counter() - started - waited) * 1000
+        _record(stats.commands, name, elapsed_ms, statements=stats.statement_count - statements_before)
+
+def command(name: str):
+    """
+    Context manager recording latency and statement count for one CLI
+    command, not counting time spent at its prompts. A no-op when
+    profiling is disabled.
+    """
+    return _command_timer(name) if PROFILE_ENABLED else nullcontext()
+
+def _process_age_ms() -> float | None:
+    # Time since the process was created, from /proc (Linux only).
+    try:
+        with open("/proc/self/stat") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return (uptime - started_ticks / os.sysconf("SC_CLK_TCK")) * 1000
+
+class StartupTimer:
+    """
+    Splits program startup into named phases. main.py calls begin() first
+    thing, mark() after each phase and ready() once input is accepted; the
+    report is printed to stderr when VIRTULEARN_STARTUP_REPORT is set.
+    """
+    def __init__(self):
+        self.phases = []
+        self.started = None
+        self.last = None
+        self.before_main_ms = None
+
+    def begin(self, started: float):
+        self.started = self.last = started
+        age_ms = _process_age_ms()
+        if age_ms is not None:
+            self.before_main_ms = max(0.0, age_ms - (time.perf_counter() - started) * 1000)
+
+    def mark(self, phase: str):
+        if self.last is None:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self) -> str:
+        lines = ["", "=== VirtuLearn startup ==="]
+        total = 0.0
+        if self.before_main_ms is not None:
+            # Clock-tick resolution (usually 10 ms).
+            lines.append(f"  {self.before_main_ms:>8.1f} ms  interpreter start-up (approx.)")
+            total += self.before_main_ms
+        for phase, elapsed_ms in self.phases:
+            lines.append(f"  {elapsed_ms:>8.1f} ms  {phase}")
+            total += elapsed_ms
+        lines.append(f"  {total:>8.1f} ms  total")
+        return "\n".join(lines)
+
+    def ready(self):
+        if STARTUP_REPORT_ENABLED and self.last is not None:
+            print(self.report(), file=sys.stderr)
+        self.last = None
+
+startup = StartupTimer()
+
+def _format_table(title: str, table: dict, with_statements: bool = False, limit: int = 15) -> list[str]:
+    lines = [title]
+    rows = sorted(table.items(), key=lambda item: item[1].total_ms, reverse=True)[:limit]
+    for key, timing in rows:
+        label = " ".join(key.split())
+        if len(label) > 70:
+            label = label[:67] + "..."
+        line = f"  {timing.count:>7} calls  {timing.total_ms:>10.1f} ms total  {timing.mean_ms:>8.2f} ms mean  {timing.max_ms:>8.2f} ms max"
+        if with_statements:
+            line += f"  {timing.statements / timing.count:>6.1f} stmts/call"
+        elif timing.rows:
+            line += f"  {timing.rows:>8} rows"
+        lines.append(f"{line}  {label}")
+    return lines
+
+def summary() -> str:
+    """
+    Returns a text report: statement latency histogram plus the most
+    expensive statements, helpers and commands.
+    """
+    with stats.lock:
+        lines = ["", "=== VirtuLearn query profile ===", f"Statements executed: {stats.statement_count}", "Latency histogram:"]
+        lower = 0
+        for bound, count in zip((*HISTOGRAM_BUCKETS_MS, None), stats.histogram):
+            label = f"{lower}-{bound} ms" if bound is not None else f">= {lower} ms"
+            lines.append(f"  {label:>14}: {count}")
+            lower = bound
+        if stats.commands:
+            lines += _format_table("Commands:", stats.commands, with_statements=True)
+        if stats.helpers:
+            lines += _format_table("Helpers:", stats.helpers)
+        if stats.statements:
+            lines += _format_table("Top statements by total time:", stats.statements)
+    return "\n".join(lines)
+
+def _print_summary():
+    if stats.statement_count or stats.commands:
+        print(summary(), file=sys.stderr)
+
+if PROFILE_ENABLED:
+    _handler = logging.FileHandler(SLOW_QUERY_LOG)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.propagate = False
+    atexit.register(_print_summary)
@@ -0,0 +1,316 @@
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, String, DateTime, inspect, select, insert, func
+from sqlalchemy.exc import DBAPIError
+from lib.database import Base, engine
+from lib.search import fts_statements, install_search_index
+from lib.changes import LOG_CHANGE_FUNCTION, change_log_statements, install_change_log
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Migrations bring databases created by older releases up to the current
+# models. Each entry is (version, description, function(conn)); functions
+# must only use SQL frozen at the time they were written, never the live
+# models, because later migrations may change those models again. Brand-new
+# databases are created from the models directly and stamped with the latest
+# version without running any migration.
+
+def _index_foreign_keys(conn):
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_course_id ON enrollments (course_id)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_instructor_id ON enrollments (instructor_id)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_enrollment_date ON enrollments (enrollment_date)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_student_email_course_id ON enrollments (student_email, course_id)",
+        "CREATE INDEX IF NOT EXISTS ix_courses_instructor_id ON courses (instructor_id)",
+        # Covered by the leading column of ix_enrollments_student_email_course_id.
+        "DROP INDEX IF EXISTS ix_enrollments_student_email",
+    ):
+        conn.exec_driver_sql(statement)
+
+def _add_enrollment_counters(conn):
+    for statement in (
+        "ALTER TABLE courses ADD COLUMN enrollment_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE instructors ADD COLUMN student_count INTEGER NOT NULL DEFAULT 0",
+        "UPDATE courses SET enrollment_count = (SELECT count(*) FROM enrollments WHERE enrollments.course_id = courses.id)",
+        "UPDATE instructors SET student_count = (SELECT count(*) FROM enrollments WHERE enrollments.instructor_id = instructors.id)",
+    ):
+        conn.exec_driver_sql(statement)
+
+def _add_search_index(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    for table, columns in (
+        ("instructors", ("name", "email", "expertise")),
+        ("courses", ("title",)),
+        ("enrollments", ("student_name", "student_email")),
+    ):
+        for statement in fts_statements(table, columns):
+            conn.exec_driver_sql(statement)
+
+# SQLite cannot alter a foreign key, so the tables are rebuilt following the
+# procedure in https://www.sqlite.org/lang_altertable.html (foreign keys are
+# switched off around the upgrade by migrate()). Dropping a table drops its
+# indexes and search triggers, so both are recreated.
+_CASCADE_REBUILD_SQLITE = (
+    """CREATE TABLE courses_new (
+        id INTEGER NOT NULL,
+        title VARCHAR NOT NULL,
+        duration INTEGER,
+        instructor_id INTEGER,
+        enrollment_count INTEGER DEFAULT '0' NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (title),
+        FOREIGN KEY(instructor_id) REFERENCES instructors (id) ON DELETE SET NULL
+    )""",
+    "INSERT INTO courses_new (id, title, duration, instructor_id, enrollment_count) "
+    "SELECT id, title, duration, instructor_id, enrollment_count FROM courses",
+    "DROP TABLE courses",
+    "ALTER TABLE courses_new RENAME TO courses",
+    "CREATE INDEX ix_courses_instructor_id ON courses (instructor_id)",
+    """CREATE TABLE enrollments_new (
+        id INTEGER NOT NULL,
+        student_name VARCHAR,
+        course_id INTEGER,
+        instructor_id INTEGER,
+        enrollment_date DATETIME,
+        student_email VARCHAR,
+        PRIMARY KEY (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE,
+        FOREIGN KEY(instructor_id) REFERENCES instructors (id) ON DELETE SET NULL
+    )""",
+    "INSERT INTO enrollments_new (id, student_name, course_id, instructor_id, enrollment_date, student_email) "
+    "SELECT id, student_name, course_id, instructor_id, enrollment_date, student_email FROM enrollments",
+    "DROP TABLE enrollments",
+    "ALTER TABLE enrollments_new RENAME TO enrollments",
+    "CREATE INDEX ix_enrollments_id ON enrollments (id)",
+    "CREATE INDEX ix_enrollments_student_name ON enrollments (student_name)",
+    "CREATE INDEX ix_enrollments_course_id ON enrollments (course_id)",
+    "CREATE INDEX ix_enrollments_instructor_id ON enrollments (instructor_id)",
+    "CREATE INDEX ix_enrollments_enrollment_date ON enrollments (enrollment_date)",
+    "CREATE INDEX ix_enrollments_student_email_course_id ON enrollments (student_email, course_id)",
+)
+
+_CASCADE_ALTER = (
+    "ALTER TABLE courses DROP CONSTRAINT IF EXISTS courses_instructor_id_fkey",
+    "ALTER TABLE courses ADD CONSTRAINT courses_instructor_id_fkey "
+    "FOREIGN KEY (instructor_id) REFERENCES instructors (id) ON DELETE SET NULL",
+    "ALTER TABLE enrollments DROP CONSTRAINT IF EXISTS enrollments_course_id_fkey",
+    "ALTER TABLE enrollments ADD CONSTRAINT enrollments_course_id_fkey "
+    "FOREIGN KEY (course_id) REFERENCES courses (id) ON DELETE CASCADE",
+    "ALTER TABLE enrollments DROP CONSTRAINT IF EXISTS enrollments_instructor_id_fkey",
+    "ALTER TABLE enrollments ADD CONSTRAINT enrollments_instructor_id_fkey "
+    "FOREIGN KEY (instructor_id) REFERENCES instructors (id) ON DELETE SET NULL",
+)
+
+def _cascade_foreign_keys(conn):
+    if conn.dialect.name != "sqlite":
+        for statement in _CASCADE_ALTER:
+            conn.exec_driver_sql(statement)
+        return
+    for statement in _CASCADE_REBUILD_SQLITE:
+        conn.exec_driver_sql(statement)
+    if conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE name = 'enrollments_fts'").first():
+        for table, columns in (("courses", ("title",)), ("enrollments", ("student_name", "student_email"))):
+            # Triggers only: the index content is unchanged.
+            for statement in fts_statements(table, columns)[1:4]:
+                conn.exec_driver_sql(statement)
+    violations = conn.exec_driver_sql("PRAGMA foreign_key_check").all()
+    if violations:
+        tables = sorted({row[0] for row in violations})
+        raise RuntimeError(f"{len(violations)} rows reference missing parents in {', '.join(tables)}; fix them and run the migration again.")
+
+def _add_enrollment_archive(conn):
+    for statement in (
+        """CREATE TABLE IF NOT EXISTS enrollments_archive (
+            id INTEGER NOT NULL,
+            student_name VARCHAR,
+            course_id INTEGER,
+            instructor_id INTEGER,
+            enrollment_date DATETIME,
+            student_email VARCHAR,
+            archived_at DATETIME NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE,
+            FOREIGN KEY(instructor_id) REFERENCES instructors (id) ON DELETE SET NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_archive_student_email ON enrollments_archive (student_email)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_archive_course_id ON enrollments_archive (course_id)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_archive_instructor_id ON enrollments_archive (instructor_id)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_archive_enrollment_date ON enrollments_archive (enrollment_date)",
+    ):
+        conn.exec_driver_sql(statement)
+
+# Expand step only: existing enrollments are linked to students afterwards by
+# lib.students.backfill_students(), in batches, while the application runs.
+def _add_students(conn):
+    for statement in (
+        """CREATE TABLE IF NOT EXISTS students (
+            id INTEGER NOT NULL,
+            email VARCHAR NOT NULL,
+            name VARCHAR,
+            PRIMARY KEY (id),
+            UNIQUE (email)
+        )""",
+        "ALTER TABLE enrollments ADD COLUMN student_id INTEGER REFERENCES students (id)",
+        "ALTER TABLE enrollments_archive ADD COLUMN student_id INTEGER REFERENCES students (id)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_student_id_course_id ON enrollments (student_id, course_id)",
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_archive_student_id ON enrollments_archive (student_id)",
+    ):
+        conn.exec_driver_sql(statement)
+
+# The unique index would reject existing duplicates, so every linked
+# enrollment after a student's first one in the same course is moved to the
+# archive first and the counters are recomputed.
+_DUPLICATE_ENROLLMENT = (
+    "student_id IS NOT NULL AND id > (SELECT min(first.id) FROM enrollments AS first "
+    "WHERE first.student_id = enrollments.student_id AND first.course_id = enrollments.course_id)"
+)
+
+def _add_capacity_and_unique_enrollments(conn):
+    for statement in (
+        "ALTER TABLE courses ADD COLUMN capacity INTEGER",
+        "INSERT INTO enrollments_archive "
+        "(id, student_name, student_email, student_id, course_id, instructor_id, enrollment_date, archived_at) "
+        "SELECT id, student_name, student_email, student_id, course_id, instructor_id, enrollment_date, CURRENT_TIMESTAMP "
+        f"FROM enrollments WHERE {_DUPLICATE_ENROLLMENT}",
+        f"DELETE FROM enrollments WHERE {_DUPLICATE_ENROLLMENT}",
+        "UPDATE courses SET enrollment_count = (SELECT count(*) FROM enrollments WHERE enrollments.course_id = courses.id)",
+        "UPDATE instructors SET student_count = (SELECT count(*) FROM enrollments WHERE enrollments.instructor_id = instructors.id)",
+        "DROP INDEX IF EXISTS ix_enrollments_student_id_course_id",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_enrollments_student_id_course_id ON enrollments (student_id, course_id)",
+    ):
+        conn.exec_driver_sql(statement)
+
+# The log starts with an insert for every existing row, so a consumer syncing
+# from cursor 0 gets a full copy before the later changes.
+_CHANGE_LOG_SQLITE = """CREATE TABLE IF NOT EXISTS change_log (
+    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    table_name VARCHAR NOT NULL,
+    row_id INTEGER NOT NULL,
+    operation VARCHAR NOT NULL,
+    changed_at DATETIME NOT NULL
+)"""
+
+_CHANGE_LOG = """CREATE TABLE IF NOT EXISTS change_log (
+    id SERIAL PRIMARY KEY,
+    table_name VARCHAR NOT NULL,
+    row_id INTEGER NOT NULL,
+    operation VARCHAR NOT NULL,
+    changed_at TIMESTAMP NOT NULL
+)"""
+
+def _add_change_log(conn):
+    dialect = conn.dialect.name
+    conn.exec_driver_sql(_CHANGE_LOG_SQLITE if dialect == "sqlite" else _CHANGE_LOG)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_change_log_table_name_row_id ON change_log (table_name, row_id)")
+    for table in ("instructors", "courses", "enrollments"):
+        conn.exec_driver_sql(
+            "INSERT INTO change_log (table_name, row_id, operation, changed_at) "
+            f"SELECT '{table}', id, 'insert', CURRENT_TIMESTAMP FROM {table} ORDER BY id"
+        )
+    if dialect != "sqlite":
+        conn.exec_driver_sql(LOG_CHANGE_FUNCTION)
+    for table, columns in (
+        ("instructors", ("name", "email", "expertise")),
+        ("courses", ("title", "duration", "instructor_id", "capacity")),
+        ("enrollments", ("student_name", "student_email", "student_id", "course_id", "instructor_id", "enrollment_date")),
+    ):
+        for statement in change_log_statements(dialect, table, columns):
+            conn.exec_driver_sql(statement)
+
+MIGRATIONS = [
+    (1, "Index enrollment and course foreign keys", _index_foreign_keys),
+    (2, "Add denormalized enrollment counters", _add_enrollment_counters),
+    (3, "Add full-text search index", _add_search_index),
+    (4, "Cascade course deletes and nullify instructor references in the database", _cascade_foreign_keys),
+    (5, "Add enrollment archive table", _add_enrollment_archive),
+    (6, "Add students table; run 'python main.py backfill-students' to link existing enrollments", _add_students),
+    (7, "Add course capacity; allow one enrollment per student and course", _add_capacity_and_unique_enrollments),
+    (8, "Add change log for incremental sync", _add_change_log),
+]
+
+HEAD_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn) -> int | None:
+    """
+    Returns the applied schema version, 0 for a database created before
+    versioning was introduced, or None for an empty database.
+    """
+    tables = set(inspect(conn).get_table_names())
+    if "instructors" not in tables:
+        return None
+    if "schema_version" in tables:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    return 0
+
+def _stamp(conn, version: int, description: str):
+    conn.execute(insert(schema_version).values(version=version, description=description, applied_at=datetime.now()))
+
+def upgrade(conn) -> list[tuple[int, str]]:
+    """
+    Creates a fresh schema or applies every pending migration in order, all
+    within the caller's transaction. Returns the migrations applied.
+    """
+    version = current_version(conn)
+    if version is None:
+        schema_version.drop(conn, checkfirst=True)
+        Base.metadata.create_all(conn)
+        install_search_index(conn)
+        install_change_log(conn)
+        _stamp(conn, HEAD_VERSION, "Initial schema")
+        return []
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number > version:
+            migrate(conn)
+            applied.append((number, description))
+    # Tables added to the models since the database was created.
+    Base.metadata.create_all(conn)
+    for number, description in applied:
+        _stamp(conn, number, description)
+    return applied
+
+@contextmanager
+def _foreign_keys_disabled(conn):
+    # SQLite ignores PRAGMA foreign_keys inside a transaction, so it is set
+    # on the raw connection before the upgrade transaction begins.
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    dbapi_connection = conn.connection.driver_connection
+    enabled = dbapi_connection.execute("PRAGMA foreign_keys").fetchone()[0]
+    dbapi_connection.execute("PRAGMA foreign_keys=OFF")
+    try:
+        yield
+    finally:
+        dbapi_connection.execute(f"PRAGMA foreign_keys={enabled}")
+
+def _is_current(conn) -> bool:
+    # Fast path for every start after the first: one indexed read of the
+    # recorded version instead of reflecting each table. Any error (e.g. no
+    # schema_version table yet) falls through to the full check.
+    try:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() == HEAD_VERSION
+    except DBAPIError:
+        conn.rollback()
+        return False
+
+def migrate() -> list[tuple[int, str]]:
+    with engine.connect() as conn:
+        if _is_current(conn):
+            return []
+    with engine.connect() as conn, _foreign_keys_disabled(conn), conn.begin():
+        return upgrade(conn)
+
+def migration_status() -> tuple[int | None, int]:
+    """
+    Returns (applied version, latest available version).
+    """
+    with engine.connect() as conn:
+        return current_version(conn), HEAD_VERSION
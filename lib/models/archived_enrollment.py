@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from lib.database import Base
+
+class ArchivedEnrollment(Base):
+    """
+    An enrollment moved out of the enrollments table by lib.archive. Keeps
+    the original ID and columns, so it can be listed alongside Enrollment.
+    """
+    __tablename__ = "enrollments_archive"
+    __table_args__ = (
+        Index("ix_enrollments_archive_student_email", "student_email"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    student_name = Column(String)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), index=True)
+    instructor_id = Column(Integer, ForeignKey("instructors.id", ondelete="SET NULL"), index=True)
+    enrollment_date = Column(DateTime, index=True)
+    student_email = Column(String)
+    student_id = Column(Integer, ForeignKey("students.id"), index=True)
+    archived_at = Column(DateTime, nullable=False)
+
+    course = relationship("Course", viewonly=True)
+    instructor = relationship("Instructor", viewonly=True)
+    student = relationship("Student", viewonly=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from lib.database import Base
+
+class Change(Base):
+    """
+    One entry in the change log: a row of table_name was inserted, updated
+    or deleted. Written by database triggers (see lib.changes) in the same
+    transaction as the change itself; id is the sync cursor.
+    """
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_table_name_row_id", "table_name", "row_id"),
+        # AUTOINCREMENT: IDs are never reused after compaction deletes the
+        # newest entries, so a cursor never skips a change.
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    operation = Column(String, nullable=False)  # insert, update or delete
+    changed_at = Column(DateTime, nullable=False)
@@ -8,10 +8,13 @@ class Course(Base):
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False, unique=True)
     duration = Column(Integer)
-    instructor_id = Column(Integer, ForeignKey('instructors.id'))
+    instructor_id = Column(Integer, ForeignKey('instructors.id', ondelete='SET NULL'), index=True)
+    enrollment_count = Column(Integer, nullable=False, default=0, server_default='0')
+    # Seat limit; None means unlimited.
+    capacity = Column(Integer)
 
     instructor = relationship('Instructor', back_populates='courses')
-    enrollments = relationship('Enrollment', back_populates='course', cascade='all, delete-orphan')
+    enrollments = relationship('Enrollment', back_populates='course', cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f"<Course(id={self.id}, title='{self.title}', duration='{self.duration}', instructor={self.instructor.name if self.instructor else self.instructor_id})>"
\ No newline at end of file
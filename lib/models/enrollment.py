@@ -1,16 +1,23 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from lib.database import Base
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        # A student takes a course at most once. Unlinked rows (no student_id
+        # yet) are not covered until backfill_students() links them.
+        Index("uq_enrollments_student_id_course_id", "student_id", "course_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    student_name = Column(String, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"))
-    instructor_id = Column(Integer, ForeignKey("instructors.id"))
-    enrollment_date = Column(DateTime)
-    student_email = Column(String, index=True) 
+    student_name = Column(String)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), index=True)
+    instructor_id = Column(Integer, ForeignKey("instructors.id", ondelete="SET NULL"), index=True)
+    enrollment_date = Column(DateTime, index=True)
+    student_email = Column(String)
+    student_id = Column(Integer, ForeignKey("students.id"))
 
     course = relationship("Course", back_populates="enrollments")
-    instructor = relationship("Instructor", back_populates="enrollments")
\ No newline at end of file
+    instructor = relationship("Instructor", back_populates="enrollments")
+    student = relationship("Student", back_populates="enrollments")
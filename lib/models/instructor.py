@@ -9,6 +9,7 @@ class Instructor(Base):
     name = Column(String, index=True)
     expertise = Column(String)
     email = Column(String, unique=True, index=True)
+    student_count = Column(Integer, nullable=False, default=0, server_default="0")
 
-    courses = relationship("Course", back_populates="instructor")
-    enrollments = relationship("Enrollment", back_populates="instructor")
\ No newline at end of file
+    courses = relationship("Course", back_populates="instructor", passive_deletes=True)
+    enrollments = relationship("Enrollment", back_populates="instructor", passive_deletes=True)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import relationship
+from lib.database import Base
+
+class Student(Base):
+    __tablename__ = "students"
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False, unique=True)  # normalized: see lib.students.normalize_email
+    name = Column(String)
+
+    enrollments = relationship("Enrollment", back_populates="student", passive_deletes=True)
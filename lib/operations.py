@@ -0,0 +1,302 @@
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from collections import Counter
+from sqlalchemy import delete, select, insert, update, func, or_, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from lib.database import Session as SessionFactory
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.instrumentation import command
+from lib.cache import invalidate_on_commit
+from lib.counters import apply_deltas, subtract_enrollments, expire_counters
+from lib.students import get_or_create_student, normalize_email
+from lib.helpers import get_instructor_by_id, get_course_by_id, get_enrollment_by_id, get_instructor_by_email
+
+BATCH_SIZE = int(os.environ.get("VIRTULEARN_BATCH_SIZE", "1000"))
+
+class OperationError(Exception):
+    """
+    Raised when an operation cannot be applied, e.g. because a referenced
+    row does not exist or a unique value is already taken.
+    """
+
+class NotFoundError(OperationError):
+    """
+    Raised when a row an operation refers to by ID does not exist.
+    """
+
+class CourseFullError(OperationError):
+    """
+    Raised when a course has no seats left.
+    """
+
+class AlreadyEnrolledError(OperationError):
+    """
+    Raised when the student is already enrolled in the course.
+    """
+
+def _optional_int(value) -> int | None:
+    if value is None or value == "":
+        return None
+    return int(value)
+
+def _parse_date(value) -> datetime:
+    if value is None or value == "":
+        return datetime.now()
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
+
+def parse_cutoff(before) -> datetime:
+    """
+    Parses a required cutoff date (YYYY-MM-DD or ISO datetime), raising
+    OperationError if it is blank or invalid.
+    """
+    if before is None or str(before).strip() == "":
+        raise OperationError("A cutoff date is required.")
+    if isinstance(before, datetime):
+        return before
+    try:
+        return datetime.fromisoformat(str(before).strip())
+    except ValueError:
+        raise OperationError(f"Invalid date '{before}'. Use YYYY-MM-DD.")
+
+# Each operation works inside the caller's session and only flushes, so
+# callers decide how many operations share one transaction. Semantics match
+# the corresponding interactive *_cli commands.
+
+def add_instructor(session: Session, name: str, email: str, expertise: str | None = None) -> Instructor:
+    if get_instructor_by_email(session, email):
+        raise OperationError(f"An instructor with email '{email}' already exists.")
+    instructor = Instructor(name=name, expertise=expertise, email=email)
+    session.add(instructor)
+    session.flush()
+    return instructor
+
+def _capacity(value) -> int | None:
+    capacity = _optional_int(value)
+    if capacity is not None and capacity < 0:
+        raise OperationError("Capacity cannot be negative.")
+    return capacity
+
+def add_course(session: Session, title: str, duration=None, instructor_id=None, capacity=None) -> Course:
+    """
+    Adds a course. As in add_course_cli, an unknown instructor_id leaves the
+    course without an instructor. No capacity means unlimited seats.
+    """
+    instructor_id = _optional_int(instructor_id)
+    if instructor_id and not get_instructor_by_id(session, instructor_id):
+        instructor_id = None
+    course = Course(title=title, duration=_optional_int(duration), instructor_id=instructor_id, capacity=_capacity(capacity))
+    session.add(course)
+    session.flush()
+    return course
+
+def assign_course(session: Session, course_id, instructor_id) -> Course:
+    course = get_course_by_id(session, int(course_id))
+    if not course:
+        raise NotFoundError(f"Course with ID {course_id} not found.")
+    instructor = get_instructor_by_id(session, int(instructor_id))
+    if not instructor:
+        raise NotFoundError(f"Instructor with ID {instructor_id} not found.")
+    course.instructor = instructor
+    session.flush()
+    return course
+
+def set_course_capacity(session: Session, course_id, capacity=None) -> Course:
+    """
+    Sets a course's seat limit (None for unlimited). Seats already taken are
+    kept even if they exceed the new limit.
+    """
+    course = get_course_by_id(session, int(course_id))
+    if not course:
+        raise NotFoundError(f"Course with ID {course_id} not found.")
+    course.capacity = _capacity(capacity)
+    session.flush()
+    return course
+
+# Enrolling takes a seat with one conditional UPDATE of the course's
+# enrollment_count, which only matches while the course has room. The
+# database applies it atomically: concurrent enrollments queue on the
+# course row (or, in SQLite, on the write lock), so a course can never be
+# oversubscribed and no application-side locking is needed. The enrollment
+# row is then inserted in the same transaction; the unique index on
+# (student_id, course_id) rejects a second enrollment that raced past the
+# duplicate check, rolling the seat back with it. Run under
+# run_transaction() to retry when the database is busy.
+
+def _take_seat(session: Session, course_id: int) -> bool:
+    return session.execute(
+        update(Course.__table__)
+        .where(Course.id == course_id, or_(Course.capacity.is_(None), Course.enrollment_count < Course.capacity))
+        .values(enrollment_count=Course.enrollment_count + 1)
+    ).rowcount == 1
+
+def enroll_student(session: Session, student_name: str, student_email: str, course_id, instructor_id=None, enrollment_date=None) -> Enrollment:
+    """
+    Enrolls a student if the course has a free seat. As in
+    add_enrollment_cli, an unknown instructor_id leaves the enrollment
+    unlinked and a blank one falls back to the course's instructor.
+    """
+    course = get_course_by_id(session, int(course_id))
+    if not course:
+        raise NotFoundError(f"Course with ID {course_id} not found.")
+    course_id = course.id
+    instructor_id = _optional_int(instructor_id)
+    if instructor_id:
+        instructor = get_instructor_by_id(session, instructor_id)
+        instructor_id = instructor.id if instructor else None
+    else:
+        instructor_id = course.instructor_id
+    student = get_or_create_student(session, student_name, student_email)
+    if session.scalar(select(Enrollment.id).where(Enrollment.student_id == student.id, Enrollment.course_id == course_id)):
+        raise AlreadyEnrolledError(f"{student.email} is already enrolled in course {course_id}.")
+    if not _take_seat(session, course_id):
+        raise CourseFullError(f"Course {course_id} is full (capacity {course.capacity}).")
+    enrollment_id = session.execute(insert(Enrollment.__table__).values(
+        student_name=student_name,
+        student_email=normalize_email(student_email),
+        student_id=student.id,
+        course_id=course_id,
+        instructor_id=instructor_id,
+        enrollment_date=_parse_date(enrollment_date),
+    )).inserted_primary_key[0]
+    # Written behind the ORM's back, so the flush hooks in lib.counters do
+    # not see it: the course was counted by _take_seat, the instructor here.
+    apply_deltas(session.connection(), Counter(), Counter({instructor_id: 1}))
+    for model, key in ((Course, course_id), (Instructor, instructor_id)):
+        if key is not None:
+            invalidate_on_commit(session, model.__name__, key)
+    expire_counters(session)
+    return session.get(Enrollment, enrollment_id)
+
+# Deletes are set-based: the database cascades a course delete to its
+# enrollments and unlinks a deleted instructor's courses and enrollments
+# (ON DELETE CASCADE / SET NULL), so children are never loaded. Each returns
+# the number of affected rows per kind.
+
+def delete_instructor(session: Session, instructor_id) -> dict:
+    instructor = get_instructor_by_id(session, int(instructor_id))
+    if not instructor:
+        raise NotFoundError(f"Instructor with ID {instructor_id} not found.")
+    instructor_id = instructor.id
+    session.flush()
+    courses = session.scalar(select(func.count()).select_from(Course).where(Course.instructor_id == instructor_id))
+    enrollments = session.scalar(select(func.count()).select_from(Enrollment).where(Enrollment.instructor_id == instructor_id))
+    session.execute(delete(Instructor).where(Instructor.id == instructor_id))
+    # Loaded rows still hold the old reference, and cached courses too.
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, (Course, Enrollment)) and inspect(obj).dict.get("instructor_id") == instructor_id:
+            session.expire(obj, ["instructor_id", "instructor"])
+    invalidate_on_commit(session, Course.__name__)
+    return {"instructors": 1, "courses_unassigned": courses, "enrollments_unlinked": enrollments}
+
+def delete_course(session: Session, course_id) -> dict:
+    course = get_course_by_id(session, int(course_id))
+    if not course:
+        raise NotFoundError(f"Course with ID {course_id} not found.")
+    course_id = course.id
+    session.flush()
+    enrollments = subtract_enrollments(session, Enrollment.course_id == course_id)
+    session.execute(delete(Course).where(Course.id == course_id))
+    expire_counters(session)
+    return {"courses": 1, "enrollments": enrollments}
+
+def delete_enrollment(session: Session, enrollment_id) -> dict:
+    enrollment = get_enrollment_by_id(session, int(enrollment_id))
+    if not enrollment:
+        raise NotFoundError(f"Enrollment with ID {enrollment_id} not found.")
+    session.delete(enrollment)
+    session.flush()
+    return {"enrollments": 1}
+
+def _delete_enrollments_where(session: Session, *criteria) -> dict:
+    session.flush()
+    subtract_enrollments(session, *criteria)
+    deleted = session.execute(delete(Enrollment).where(*criteria)).rowcount
+    expire_counters(session)
+    return {"enrollments": deleted}
+
+def delete_enrollments_before(session: Session, before) -> dict:
+    """
+    Deletes every enrollment dated before the given date (YYYY-MM-DD or
+    ISO datetime) in one statement.
+    """
+    return _delete_enrollments_where(session, Enrollment.enrollment_date < parse_cutoff(before))
+
+def delete_enrollments_for_course(session: Session, course_id) -> dict:
+    """
+    Deletes every enrollment in a course, keeping the course.
+    """
+    course = get_course_by_id(session, int(course_id))
+    if not course:
+        raise NotFoundError(f"Course with ID {course_id} not found.")
+    return _delete_enrollments_where(session, Enrollment.course_id == course.id)
+
+OPERATIONS = {
+    "add_instructor": add_instructor,
+    "add_course": add_course,
+    "assign_course": assign_course,
+    "set_capacity": set_course_capacity,
+    "enroll": enroll_student,
+    "delete_instructor": delete_instructor,
+    "delete_course": delete_course,
+    "delete_enrollment": delete_enrollment,
+    "delete_enrollments_before": delete_enrollments_before,
+    "delete_enrollments_for_course": delete_enrollments_for_course,
+}
+
+@dataclass
+class RunResult:
+    applied: int = 0
+    failures: list[tuple[int, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ops_per_sec(self) -> float:
+        total = self.applied + len(self.failures)
+        return total / self.seconds if self.seconds else float(total)
+
+def run_operations(records, batch_size: int = BATCH_SIZE, stop_on_error: bool = False) -> RunResult:
+    """
+    Applies (line number, {"op": name, **arguments}) records in one session,
+    committing every batch_size operations. Each operation runs in a
+    SAVEPOINT, so a failing one is recorded and skipped without discarding
+    the rest of its batch.
+    """
+    result = RunResult()
+    started = time.perf_counter()
+    pending = 0
+    with SessionFactory() as session:
+        for line_no, record in records:
+            if not isinstance(record, dict):
+                # A line read_records could not parse (lib.importer.MalformedRecord).
+                result.failures.append((line_no, str(record)))
+                if stop_on_error:
+                    break
+                continue
+            arguments = dict(record)
+            name = arguments.pop("op", None)
+            operation = OPERATIONS.get(name)
+            if operation is None:
+                result.failures.append((line_no, f"Unknown operation '{name}'."))
+            else:
+                try:
+                    with command(f"run:{name}"), session.begin_nested():
+                        operation(session, **arguments)
+                    result.applied += 1
+                    pending += 1
+                except (OperationError, IntegrityError, TypeError, ValueError) as e:
+                    result.failures.append((line_no, str(e).splitlines()[0]))
+            if result.failures and stop_on_error:
+                break
+            if pending >= batch_size:
+                session.commit()
+                pending = 0
+        session.commit()
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,60 @@
+import sqlite3
+import time
+from dataclasses import dataclass
+from lib.database import engine, read_engines
+
+# Stand-in replication for trying read/write routing locally. Real replicas
+# are kept in sync by the database server; with SQLite files, replicate()
+# copies the primary onto every replica file with SQLite's online backup
+# API, which takes a consistent snapshot while the primary is in use.
+# Between copies the replicas lag behind, as real ones would.
+
+REPLICATE_INTERVAL = 1.0
+
+@dataclass
+class ReplicationResult:
+    replicas: int
+    pages: int
+    seconds: float
+
+def sqlite_path(target_engine) -> str:
+    url = target_engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise ValueError(f"Replication stand-in needs SQLite database files, not '{url.render_as_string(hide_password=True)}'.")
+    return url.database
+
+def replicate_once() -> ReplicationResult:
+    """
+    Copies the primary database onto every replica in DATABASE_READ_URLS.
+    """
+    if not read_engines:
+        raise ValueError("No read replicas configured; set DATABASE_READ_URL or DATABASE_READ_URLS.")
+    started = time.perf_counter()
+    pages = 0
+    source = sqlite3.connect(sqlite_path(engine))
+    try:
+        for replica in read_engines:
+            target = sqlite3.connect(sqlite_path(replica), timeout=30)
+            try:
+                source.backup(target)
+                pages += target.execute("PRAGMA page_count").fetchone()[0]
+            finally:
+                target.close()
+    finally:
+        source.close()
+    return ReplicationResult(len(read_engines), pages, time.perf_counter() - started)
+
+def replicate(interval: float = REPLICATE_INTERVAL, iterations: int | None = None, progress=None):
+    """
+    Copies the primary onto the replicas every interval seconds, iterations
+    times or until interrupted. progress, if given, is called with each
+    ReplicationResult.
+    """
+    done = 0
+    while iterations is None or done < iterations:
+        result = replicate_once()
+        done += 1
+        if progress:
+            progress(result)
+        if iterations is None or done < iterations:
+            time.sleep(interval)
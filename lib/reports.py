@@ -0,0 +1,91 @@
+from sqlalchemy import select, func
+from lib.database import engine, read_engine
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.archive import enrollment_rows
+
+# GROUP BY reports computed in the database, plus constant-time summaries
+# read from the denormalized counters maintained by lib.counters. The
+# GROUP BY reports cover active enrollments, or archived ones as well with
+# include_history; the summaries always cover active enrollments only.
+
+def _month(column):
+    if engine.dialect.name == "sqlite":
+        return func.strftime("%Y-%m", column)
+    return func.to_char(func.date_trunc("month", column), "YYYY-MM")
+
+def enrollments_per_course(limit: int | None = None, include_history: bool = False) -> list[tuple]:
+    """
+    Returns (course id, title, enrollments) rows, busiest first.
+    """
+    rows = enrollment_rows(include_history)
+    count = func.count(rows.c.id).label("enrollments")
+    stmt = (
+        select(Course.id, Course.title, count)
+        .outerjoin(rows, rows.c.course_id == Course.id)
+        .group_by(Course.id, Course.title)
+        .order_by(count.desc(), Course.id)
+        .limit(limit)
+    )
+    with read_engine().connect() as conn:
+        return conn.execute(stmt).all()
+
+def enrollments_per_instructor(limit: int | None = None, include_history: bool = False) -> list[tuple]:
+    """
+    Returns (instructor id, name, enrollments, distinct students) rows,
+    busiest first.
+    """
+    rows = enrollment_rows(include_history)
+    count = func.count(rows.c.id).label("enrollments")
+    stmt = (
+        select(Instructor.id, Instructor.name, count, func.count(func.distinct(rows.c.student_email)).label("students"))
+        .outerjoin(rows, rows.c.instructor_id == Instructor.id)
+        .group_by(Instructor.id, Instructor.name)
+        .order_by(count.desc(), Instructor.id)
+        .limit(limit)
+    )
+    with read_engine().connect() as conn:
+        return conn.execute(stmt).all()
+
+def enrollments_per_month(include_history: bool = False) -> list[tuple]:
+    """
+    Returns (YYYY-MM, enrollments) rows in calendar order.
+    """
+    rows = enrollment_rows(include_history)
+    month = _month(rows.c.enrollment_date).label("month")
+    stmt = (
+        select(month, func.count(rows.c.id))
+        .where(rows.c.enrollment_date.is_not(None))
+        .group_by(month)
+        .order_by(month)
+    )
+    with read_engine().connect() as conn:
+        return conn.execute(stmt).all()
+
+def course_summary(limit: int = 10) -> dict:
+    """
+    Dashboard totals from Course.enrollment_count; never touches the
+    enrollments table.
+    """
+    with read_engine().connect() as conn:
+        courses, enrollments = conn.execute(select(func.count(Course.id), func.coalesce(func.sum(Course.enrollment_count), 0))).one()
+        top = conn.execute(
+            select(Course.id, Course.title, Course.enrollment_count)
+            .order_by(Course.enrollment_count.desc(), Course.id)
+            .limit(limit)
+        ).all()
+    return {"courses": courses, "enrollments": enrollments, "top": top}
+
+def instructor_summary(limit: int = 10) -> dict:
+    """
+    Dashboard totals from Instructor.student_count; never touches the
+    enrollments table.
+    """
+    with read_engine().connect() as conn:
+        instructors, enrollments = conn.execute(select(func.count(Instructor.id), func.coalesce(func.sum(Instructor.student_count), 0))).one()
+        top = conn.execute(
+            select(Instructor.id, Instructor.name, Instructor.student_count)
+            .order_by(Instructor.student_count.desc(), Instructor.id)
+            .limit(limit)
+        ).all()
+    return {"instructors": instructors, "enrollments": enrollments, "top": top}
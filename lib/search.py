@@ -0,0 +1,163 @@
+from contextlib import contextmanager
+from sqlalchemy import text, select, func, or_
+from lib.database import engine, read_engine
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.models.student import Student
+
+# Full-text search over SQLite FTS5 shadow tables. Each indexed table gets an
+# external-content FTS table (the text is not stored twice) and triggers that
+# keep it in sync with every INSERT, DELETE and UPDATE, including Core/bulk
+# writes. Other databases fall back to prefix LIKE matching.
+
+SEARCH_LIMIT = 20
+
+# Current index definitions: table -> indexed text columns.
+SEARCH_TABLES = {
+    "instructors": ("name", "email", "expertise"),
+    "courses": ("title",),
+    "enrollments": ("student_name", "student_email"),
+}
+
+def fts_statements(table: str, columns: tuple[str, ...]) -> list[str]:
+    """
+    Returns the DDL creating table_fts and its sync triggers for the given
+    columns. The UPDATE trigger only fires when an indexed column changes,
+    so counter updates do not touch the index.
+    """
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+@contextmanager
+def deferred_indexing(conn, table: str):
+    """
+    For bulk inserts into table within the caller's transaction: suspends the
+    per-row FTS insert trigger, then indexes all new rows with a single
+    INSERT ... SELECT and restores the trigger before the transaction ends.
+    Row-at-a-time FTS writes are several times slower than one bulk insert.
+    """
+    if conn.dialect.name != "sqlite" or table not in SEARCH_TABLES:
+        yield
+        return
+    fts = f"{table}_fts"
+    cols = ", ".join(SEARCH_TABLES[table])
+    last_id = conn.exec_driver_sql(f"SELECT coalesce(max(id), 0) FROM {table}").scalar()
+    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_ai")
+    yield
+    conn.exec_driver_sql(f"INSERT INTO {fts}(rowid, {cols}) SELECT id, {cols} FROM {table} WHERE id > ?", (last_id,))
+    conn.exec_driver_sql(fts_statements(table, SEARCH_TABLES[table])[1])
+
+def install_search_index(conn):
+    """
+    Creates (or rebuilds) every FTS table and trigger. No-op off SQLite.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    for table, columns in SEARCH_TABLES.items():
+        for statement in fts_statements(table, columns):
+            conn.exec_driver_sql(statement)
+
+def drop_search_index(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    for table in SEARCH_TABLES:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table}_fts")
+
+def _use_fts() -> bool:
+    return engine.dialect.name == "sqlite"
+
+def match_query(term: str) -> str:
+    """
+    Turns free text into an FTS5 query where every word must match as a
+    prefix: 'ada love' -> '"ada"* AND "love"*'.
+    """
+    words = [word.replace('"', '""') for word in term.split()]
+    return " AND ".join(f'"{word}"*' for word in words)
+
+def _like_any(columns, term: str):
+    return or_(*(column.ilike(f"{word}%") for column in columns for word in term.split()))
+
+def search_instructors(term: str, limit: int = SEARCH_LIMIT) -> list[tuple]:
+    """
+    Returns (id, name, email, expertise) rows, best match first.
+    """
+    if not term.strip():
+        return []
+    with read_engine().connect() as conn:
+        if _use_fts():
+            return conn.execute(text(
+                "SELECT i.id, i.name, i.email, i.expertise FROM instructors_fts "
+                "JOIN instructors i ON i.id = instructors_fts.rowid "
+                "WHERE instructors_fts MATCH :query ORDER BY rank LIMIT :limit"
+            ), {"query": match_query(term), "limit": limit}).all()
+        return conn.execute(
+            select(Instructor.id, Instructor.name, Instructor.email, Instructor.expertise)
+            .where(_like_any((Instructor.name, Instructor.email, Instructor.expertise), term))
+            .order_by(Instructor.name)
+            .limit(limit)
+        ).all()
+
+def search_courses(term: str, limit: int = SEARCH_LIMIT) -> list[tuple]:
+    """
+    Returns (id, title, instructor name) rows, best match first.
+    """
+    if not term.strip():
+        return []
+    with read_engine().connect() as conn:
+        if _use_fts():
+            return conn.execute(text(
+                "SELECT c.id, c.title, i.name FROM courses_fts "
+                "JOIN courses c ON c.id = courses_fts.rowid "
+                "LEFT JOIN instructors i ON i.id = c.instructor_id "
+                "WHERE courses_fts MATCH :query ORDER BY rank LIMIT :limit"
+            ), {"query": match_query(term), "limit": limit}).all()
+        return conn.execute(
+            select(Course.id, Course.title, Instructor.name)
+            .outerjoin(Instructor, Course.instructor_id == Instructor.id)
+            .where(_like_any((Course.title,), term))
+            .order_by(Course.title)
+            .limit(limit)
+        ).all()
+
+def search_students(term: str, limit: int = SEARCH_LIMIT) -> list[tuple]:
+    """
+    Returns (student name, student email, enrollments) rows, one per
+    student, best match first. Enrollments are grouped by the student they
+    link to; rows not linked yet by backfill_students() by their own email.
+    """
+    if not term.strip():
+        return []
+    with read_engine().connect() as conn:
+        if _use_fts():
+            return conn.execute(text(
+                "SELECT coalesce(min(s.name), min(e.student_name)), coalesce(s.email, e.student_email) AS email, count(*) "
+                "FROM enrollments_fts "
+                "JOIN enrollments e ON e.id = enrollments_fts.rowid "
+                "LEFT JOIN students s ON s.id = e.student_id "
+                "WHERE enrollments_fts MATCH :query "
+                "GROUP BY e.student_id, email ORDER BY min(enrollments_fts.rank) LIMIT :limit"
+            ), {"query": match_query(term), "limit": limit}).all()
+        email = func.coalesce(Student.email, Enrollment.student_email)
+        return conn.execute(
+            select(func.coalesce(func.min(Student.name), func.min(Enrollment.student_name)), email, func.count())
+            .select_from(Enrollment)
+            .outerjoin(Student, Enrollment.student_id == Student.id)
+            .where(_like_any((Enrollment.student_name, Enrollment.student_email), term))
+            .group_by(Enrollment.student_id, email)
+            .order_by(email)
+            .limit(limit)
+        ).all()
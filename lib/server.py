@@ -0,0 +1,396 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from lib.database import run_transaction, get_read_session, read_your_writes, reads_replica
+from lib.cache import LRUCache
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.models.archived_enrollment import ArchivedEnrollment
+from lib.helpers import (
+    PAGE_SIZE,
+    get_instructor_by_id, get_instructor_by_email, get_course_by_id, get_enrollment_details_by_id,
+    get_enrollments_by_student_email, get_instructors_page, get_enrollments_page,
+)
+from lib.operations import (
+    OperationError, NotFoundError, CourseFullError, AlreadyEnrolledError,
+    add_instructor, add_course, assign_course, set_course_capacity, enroll_student,
+    delete_instructor, delete_course, delete_enrollment,
+    delete_enrollments_before, delete_enrollments_for_course,
+)
+from lib.search import search_instructors, search_courses, search_students
+from lib.changes import CHANGE_BATCH_SIZE, changes_since
+
+# Resident JSON service. One process shares the module-level engine and its
+# pool; every request runs in its own short session. GET responses are
+# cached in memory and carry an ETag and Last-Modified header so clients can
+# revalidate with a 304. Any ORM write committed in this process clears the
+# cache; writes made by other processes are picked up once entries expire
+# after VIRTULEARN_HTTP_CACHE_TTL seconds. GETs read from the read replicas
+# when they are configured (see lib.database.read_engine); those responses
+# are not cached.
+
+HTTP_HOST = os.environ.get("VIRTULEARN_HTTP_HOST", "127.0.0.1")
+HTTP_PORT = int(os.environ.get("VIRTULEARN_HTTP_PORT", "8080"))
+HTTP_CACHE_SIZE = int(os.environ.get("VIRTULEARN_HTTP_CACHE_SIZE", "10000"))
+HTTP_CACHE_TTL = float(os.environ.get("VIRTULEARN_HTTP_CACHE_TTL", "5"))
+MAX_PAGE_SIZE = 1000
+
+logger = logging.getLogger("virtulearn.server")
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ResponseCache:
+    """
+    Cached GET bodies keyed by path and query string, plus the time of the
+    last write seen, which is served as Last-Modified.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = LRUCache(maxsize, ttl)
+        self.last_modified = time.time()
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, generation: int, body: bytes, store: bool = True) -> tuple:
+        """
+        Stores body unless store is false or a write committed while it was
+        being built (the generation moved on), and returns its
+        (body, etag, last_modified).
+        """
+        with self._lock:
+            entry = (body, f'"{hashlib.sha1(body).hexdigest()}"', self.last_modified)
+            if store and generation == self.generation:
+                self.entries.put(key, entry)
+            return entry
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self.last_modified = time.time()
+            self.entries.clear()
+
+response_cache = ResponseCache(HTTP_CACHE_SIZE, HTTP_CACHE_TTL)
+
+@event.listens_for(Session, "after_flush")
+def _mark_written(session, flush_context):
+    session.info["virtulearn_written"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_written(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["virtulearn_written"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_responses(session):
+    if session.info.pop("virtulearn_written", False):
+        response_cache.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("virtulearn_written", None)
+
+def instructor_json(instructor: Instructor) -> dict:
+    return {
+        "id": instructor.id,
+        "name": instructor.name,
+        "email": instructor.email,
+        "expertise": instructor.expertise,
+        "student_count": instructor.student_count,
+    }
+
+def course_json(course: Course) -> dict:
+    return {
+        "id": course.id,
+        "title": course.title,
+        "duration": course.duration,
+        "instructor_id": course.instructor_id,
+        "enrollment_count": course.enrollment_count,
+        "capacity": course.capacity,
+    }
+
+def enrollment_json(enrollment: Enrollment) -> dict:
+    return {
+        "id": enrollment.id,
+        "student_name": enrollment.student_name,
+        "student_email": enrollment.student_email,
+        "student_id": enrollment.student_id,
+        "course_id": enrollment.course_id,
+        "course_title": enrollment.course.title if enrollment.course else None,
+        "instructor_id": enrollment.instructor_id,
+        "instructor_name": enrollment.instructor.name if enrollment.instructor else None,
+        "enrollment_date": enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None,
+        "archived": isinstance(enrollment, ArchivedEnrollment),
+    }
+
+def _found(obj, kind: str, key):
+    if obj is None:
+        raise HTTPError(404, f"{kind} {key} not found.")
+    return obj
+
+def _page_args(query: dict) -> tuple[int, int]:
+    after_id = int(query.get("after_id", 0))
+    limit = min(int(query.get("limit", PAGE_SIZE)), MAX_PAGE_SIZE)
+    return after_id, limit
+
+def _page(items: list, serialize) -> dict:
+    return {
+        "items": [serialize(item) for item in items],
+        "next_after_id": items[-1].id if items else None,
+    }
+
+# Read handlers: (session, path match, query parameters) -> payload.
+
+def list_instructors(session, match, query):
+    if "email" in query:
+        instructor = _found(get_instructor_by_email(session, query["email"]), "Instructor", query["email"])
+        return instructor_json(instructor)
+    return _page(get_instructors_page(session, *_page_args(query)), instructor_json)
+
+def show_instructor(session, match, query):
+    instructor_id = int(match["id"])
+    return instructor_json(_found(get_instructor_by_id(session, instructor_id), "Instructor", instructor_id))
+
+def list_courses(session, match, query):
+    after_id, limit = _page_args(query)
+    courses = session.query(Course).filter(Course.id > after_id).order_by(Course.id).limit(limit).all()
+    return _page(courses, course_json)
+
+def show_course(session, match, query):
+    course_id = int(match["id"])
+    return course_json(_found(get_course_by_id(session, course_id), "Course", course_id))
+
+def list_enrollments(session, match, query):
+    if "student_email" in query:
+        include_history = query.get("include_history", "").lower() in ("1", "true", "yes")
+        enrollments = get_enrollments_by_student_email(session, query["student_email"], include_history)
+        return {"items": [enrollment_json(e) for e in enrollments]}
+    return _page(get_enrollments_page(session, *_page_args(query)), enrollment_json)
+
+def show_enrollment(session, match, query):
+    enrollment_id = int(match["id"])
+    return enrollment_json(_found(get_enrollment_details_by_id(session, enrollment_id), "Enrollment", enrollment_id))
+
+def search(session, match, query):
+    term = query.get("q", "")
+    limit = min(int(query.get("limit", 20)), MAX_PAGE_SIZE)
+    return {
+        "instructors": [dict(zip(("id", "name", "email", "expertise"), row)) for row in search_instructors(term, limit)],
+        "courses": [dict(zip(("id", "title", "instructor_name"), row)) for row in search_courses(term, limit)],
+        "students": [dict(zip(("student_name", "student_email", "enrollments"), row)) for row in search_students(term, limit)],
+    }
+
+def list_changes(session, match, query):
+    since = int(query.get("since", 0))
+    limit = min(int(query.get("limit", CHANGE_BATCH_SIZE)), MAX_PAGE_SIZE)
+    batch = changes_since(session.connection(), since, limit)
+    return {"changes": batch.changes, "cursor": batch.cursor, "has_more": batch.has_more}
+
+# Write handlers: (session, path match, JSON body) -> (status, payload).
+
+def _required(body: dict, *names):
+    missing = [name for name in names if body.get(name) in (None, "")]
+    if missing:
+        raise HTTPError(400, f"Missing field(s): {', '.join(missing)}.")
+    return [body[name] for name in names]
+
+def create_instructor(session, match, body):
+    name, email = _required(body, "name", "email")
+    return 201, instructor_json(add_instructor(session, name, email, body.get("expertise")))
+
+def create_course(session, match, body):
+    (title,) = _required(body, "title")
+    return 201, course_json(add_course(session, title, body.get("duration"), body.get("instructor_id"), body.get("capacity")))
+
+def set_course_instructor(session, match, body):
+    (instructor_id,) = _required(body, "instructor_id")
+    return 200, course_json(assign_course(session, int(match["id"]), instructor_id))
+
+def set_capacity(session, match, body):
+    return 200, course_json(set_course_capacity(session, int(match["id"]), body.get("capacity")))
+
+def create_enrollment(session, match, body):
+    student_name, student_email, course_id = _required(body, "student_name", "student_email", "course_id")
+    enrollment = enroll_student(session, student_name, student_email, course_id, body.get("instructor_id"), body.get("enrollment_date"))
+    return 201, enrollment_json(enrollment)
+
+def remove_instructor(session, match, body):
+    return 200, delete_instructor(session, int(match["id"]))
+
+def remove_course(session, match, body):
+    return 200, delete_course(session, int(match["id"]))
+
+def remove_enrollment(session, match, body):
+    return 200, delete_enrollment(session, int(match["id"]))
+
+def bulk_remove_enrollments(session, match, body):
+    if body.get("before") not in (None, ""):
+        return 200, delete_enrollments_before(session, body["before"])
+    if body.get("course_id") not in (None, ""):
+        return 200, delete_enrollments_for_course(session, body["course_id"])
+    raise HTTPError(400, "Give either before or course_id.")
+
+ROUTES = [
+    ("GET", r"/instructors", list_instructors),
+    ("GET", r"/instructors/(?P<id>\d+)", show_instructor),
+    ("GET", r"/courses", list_courses),
+    ("GET", r"/courses/(?P<id>\d+)", show_course),
+    ("GET", r"/enrollments", list_enrollments),
+    ("GET", r"/enrollments/(?P<id>\d+)", show_enrollment),
+    ("GET", r"/search", search),
+    ("GET", r"/changes", list_changes),
+    ("POST", r"/instructors", create_instructor),
+    ("POST", r"/courses", create_course),
+    ("PUT", r"/courses/(?P<id>\d+)/instructor", set_course_instructor),
+    ("PUT", r"/courses/(?P<id>\d+)/capacity", set_capacity),
+    ("POST", r"/enrollments", create_enrollment),
+    ("POST", r"/enrollments/bulk-delete", bulk_remove_enrollments),
+    ("DELETE", r"/instructors/(?P<id>\d+)", remove_instructor),
+    ("DELETE", r"/courses/(?P<id>\d+)", remove_course),
+    ("DELETE", r"/enrollments/(?P<id>\d+)", remove_enrollment),
+]
+_COMPILED_ROUTES = [(method, re.compile(pattern + r"/?"), handler) for method, pattern, handler in ROUTES]
+
+def _route(method: str, path: str):
+    allowed = False
+    for route_method, pattern, handler in _COMPILED_ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            if route_method == method:
+                return handler, match
+            allowed = True
+    raise HTTPError(405 if allowed else 404, f"No route for {method} {path}.")
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+def _not_modified(headers, etag: str, last_modified: float) -> bool:
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "VirtuLearn"
+    # Headers and body go out in separate writes; without TCP_NODELAY each
+    # keep-alive response waits on the client's delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+    quiet = True
+
+    def do_GET(self):
+        self._dispatch(self._read)
+
+    def do_POST(self):
+        self._dispatch(self._write)
+
+    def do_PUT(self):
+        self._dispatch(self._write)
+
+    def do_DELETE(self):
+        self._dispatch(self._write)
+
+    def _dispatch(self, serve):
+        url = urlsplit(self.path)
+        try:
+            handler, match = _route(self.command, url.path)
+            with read_your_writes():
+                serve(handler, match, url)
+        except HTTPError as e:
+            self._send(e.status, _encode({"error": str(e)}))
+        except NotFoundError as e:
+            self._send(404, _encode({"error": str(e)}))
+        except (CourseFullError, AlreadyEnrolledError) as e:
+            self._send(409, _encode({"error": str(e)}))
+        except OperationError as e:
+            self._send(400, _encode({"error": str(e)}))
+        except IntegrityError as e:
+            self._send(409, _encode({"error": str(e.orig)}))
+        except (ValueError, TypeError) as e:
+            self._send(400, _encode({"error": str(e)}))
+        except Exception:
+            # Anything else is a bug or a database failure; keep the details
+            # in the log and give the client a JSON error like the others.
+            logger.exception("%s %s failed", self.command, self.path)
+            self._send(500, _encode({"error": "Internal server error."}))
+
+    def _read(self, handler, match, url):
+        key = url.path.rstrip("/") + "?" + url.query
+        cached = response_cache.get(key)
+        if cached is None:
+            generation = response_cache.generation
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            with get_read_session() as session:
+                body = _encode(handler(session, match, query))
+                # A replica can still hold rows this process has since
+                # written, so its answers are served but not cached.
+                store = not reads_replica(session)
+            cached = response_cache.put(key, generation, body, store)
+        body, etag, last_modified = cached
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if _not_modified(self.headers, etag, last_modified):
+            self._send(304, None, headers)
+        else:
+            self._send(200, body, headers)
+
+    def _write(self, handler, match, url):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except json.JSONDecodeError as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "The request body must be a JSON object.")
+        status, payload = run_transaction(handler, match, body)
+        self._send(status, _encode(payload) if payload is not None else None)
+
+    def _send(self, status: int, body: bytes | None, headers: dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)) if body is not None else "0")
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+def make_server(host: str = HTTP_HOST, port: int = HTTP_PORT, quiet: bool = True) -> ThreadingHTTPServer:
+    """
+    Returns a threaded HTTP server bound to host:port, ready for
+    serve_forever(). Port 0 picks a free port (see server.server_address).
+    """
+    handler = type("VirtuLearnHandler", (RequestHandler,), {"quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from lib.database import run_transaction, get_read_session
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.helpers import get_instructor_by_id, get_course_by_id, get_enrollment_details_by_id
+from lib import operations
+
+# Service layer for interactive front ends. Each function takes plain
+# arguments, runs one short transaction (run_transaction() for writes, a
+# read session for lookups) and returns plain values, so no session,
+# connection or snapshot is held while a user reads a confirmation prompt.
+# A front end looks a row up, asks, then acts by ID; if another writer got
+# there first, the action raises NotFoundError like any other lookup miss.
+# Writes have the semantics of the lib.operations function of the same name
+# and raise OperationError for anything the user should be told about.
+
+@dataclass
+class InstructorInfo:
+    id: int
+    name: str
+    email: str
+    expertise: str | None
+
+@dataclass
+class CourseInfo:
+    id: int
+    title: str
+    duration: int | None
+    instructor_id: int | None
+    instructor_name: str | None
+    capacity: int | None
+    enrollment_count: int
+
+@dataclass
+class EnrollmentInfo:
+    id: int
+    student_name: str
+    student_email: str
+    course_id: int | None
+    course_title: str | None
+    instructor_id: int | None
+    enrollment_date: datetime | None
+
+def _instructor_info(instructor: Instructor) -> InstructorInfo:
+    return InstructorInfo(instructor.id, instructor.name, instructor.email, instructor.expertise)
+
+def _course_info(course: Course) -> CourseInfo:
+    instructor = course.instructor
+    return CourseInfo(
+        course.id, course.title, course.duration, course.instructor_id,
+        instructor.name if instructor else None, course.capacity, course.enrollment_count,
+    )
+
+def _enrollment_info(enrollment: Enrollment) -> EnrollmentInfo:
+    course = enrollment.course
+    return EnrollmentInfo(
+        enrollment.id, enrollment.student_name, enrollment.student_email, enrollment.course_id,
+        course.title if course else None, enrollment.instructor_id, enrollment.enrollment_date,
+    )
+
+def get_instructor(instructor_id: int) -> InstructorInfo | None:
+    with get_read_session() as session:
+        instructor = get_instructor_by_id(session, instructor_id)
+        return _instructor_info(instructor) if instructor else None
+
+def get_course(course_id: int) -> CourseInfo | None:
+    with get_read_session() as session:
+        course = get_course_by_id(session, course_id)
+        return _course_info(course) if course else None
+
+def get_enrollment(enrollment_id: int) -> EnrollmentInfo | None:
+    with get_read_session() as session:
+        enrollment = get_enrollment_details_by_id(session, enrollment_id)
+        return _enrollment_info(enrollment) if enrollment else None
+
+def add_instructor(name: str, email: str, expertise: str | None = None) -> InstructorInfo:
+    try:
+        return run_transaction(lambda session: _instructor_info(operations.add_instructor(session, name, email, expertise)))
+    except IntegrityError:
+        # Another writer added the email between the check and the insert.
+        raise operations.OperationError(f"An instructor with email '{email}' already exists.")
+
+def add_course(title: str, duration=None, instructor_id=None, capacity=None) -> CourseInfo:
+    """
+    Adds a course. An unknown instructor_id leaves it without an instructor,
+    which shows as instructor_id None in the result.
+    """
+    try:
+        return run_transaction(lambda session: _course_info(operations.add_course(session, title, duration, instructor_id, capacity)))
+    except IntegrityError:
+        raise operations.OperationError(f"A course with the title '{title}' already exists.")
+
+def assign_course(course_id, instructor_id) -> CourseInfo:
+    return run_transaction(lambda session: _course_info(operations.assign_course(session, course_id, instructor_id)))
+
+def enroll_student(student_name: str, student_email: str, course_id, instructor_id=None, enrollment_date=None) -> EnrollmentInfo:
+    """
+    Enrolls a student. An unknown instructor_id leaves the enrollment
+    unlinked, which shows as instructor_id None in the result.
+    """
+    return run_transaction(lambda session: _enrollment_info(
+        operations.enroll_student(session, student_name, student_email, course_id, instructor_id, enrollment_date)
+    ))
+
+def delete_instructor(instructor_id) -> dict:
+    return run_transaction(operations.delete_instructor, instructor_id)
+
+def delete_course(course_id) -> dict:
+    return run_transaction(operations.delete_course, course_id)
+
+def delete_enrollment(enrollment_id) -> dict:
+    return run_transaction(operations.delete_enrollment, enrollment_id)
+
+def delete_enrollments_before(before) -> dict:
+    return run_transaction(operations.delete_enrollments_before, before)
+
+def delete_enrollments_for_course(course_id) -> dict:
+    return run_transaction(operations.delete_enrollments_for_course, course_id)
@@ -0,0 +1,436 @@
+import json
+import mmap
+import os
+import sys
+import time
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from lib.database import engine, read_engine
+from lib.models.instructor import Instructor
+from lib.models.course import Course
+from lib.models.enrollment import Enrollment
+from lib.models.student import Student
+from lib.models.change import Change
+from lib.changes import ordered_log
+from lib.migrations import HEAD_VERSION
+from lib.students import normalize_email
+
+SNAPSHOT_PATH = os.environ.get("VIRTULEARN_SNAPSHOT_PATH", "virtulearn-catalog.snap")
+
+# Read-only catalog snapshot for audits and lookup bursts. write_snapshot()
+# dumps instructors, courses, students and active enrollments into one file
+# of flat columns: integers in fixed-width arrays, text as indexes into a
+# table of interned strings, plus precomputed indexes (ID -> row, email ->
+# row by open-addressing hash, course -> enrollments, instructor -> courses,
+# student -> enrollments as offset ranges). CatalogSnapshot memory-maps the
+# file, so opening it costs one header parse and every lookup is O(1) with
+# only the rows asked for ever decoded.
+#
+# A snapshot records the change log cursor (see lib.changes) it was taken at
+# and is fresh while that is still the newest change. open_catalog() checks
+# that with one primary-key read and falls back to SqlCatalog, which answers
+# the same lookups with SQL, when the snapshot is missing or stale. Counters
+# rebuilt by hand outside the application are not logged and so not noticed.
+
+MAGIC = b"VLCAT01\0"
+NULL = -(2 ** 63)  # missing value in integer and date columns
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+class SnapshotError(Exception):
+    pass
+
+@dataclass
+class InstructorRecord:
+    id: int
+    name: str
+    email: str
+    expertise: str | None
+    student_count: int
+
+@dataclass
+class CourseRecord:
+    id: int
+    title: str
+    duration: int | None
+    instructor_id: int | None
+    enrollment_count: int
+    capacity: int | None
+
+@dataclass
+class StudentRecord:
+    id: int
+    email: str
+    name: str | None
+
+@dataclass
+class EnrollmentRecord:
+    id: int
+    student_name: str | None
+    student_email: str | None
+    student_id: int | None
+    course_id: int | None
+    instructor_id: int | None
+    enrollment_date: datetime | None
+
+# Snapshot tables: name -> (model, record type, {column: "int" | "str" | "date"}).
+TABLES = {
+    "instructors": (Instructor, InstructorRecord, {"id": "int", "name": "str", "email": "str", "expertise": "str", "student_count": "int"}),
+    "courses": (Course, CourseRecord, {"id": "int", "title": "str", "duration": "int", "instructor_id": "int", "enrollment_count": "int", "capacity": "int"}),
+    "students": (Student, StudentRecord, {"id": "int", "email": "str", "name": "str"}),
+    "enrollments": (Enrollment, EnrollmentRecord, {
+        "id": "int", "student_name": "str", "student_email": "str", "student_id": "int",
+        "course_id": "int", "instructor_id": "int", "enrollment_date": "date",
+    }),
+}
+
+# Group indexes: name -> (grouped table, group table, grouping column).
+GROUPS = {
+    "course_enrollments": ("enrollments", "courses", "course_id"),
+    "instructor_courses": ("courses", "instructors", "instructor_id"),
+    "student_enrollments": ("enrollments", "students", "student_id"),
+}
+
+# Email indexes: table -> email column. Student emails are stored normalized.
+EMAIL_INDEXES = {"instructors": "email", "students": "email"}
+
+@dataclass
+class SnapshotResult:
+    path: str
+    rows: dict
+    bytes: int
+    change_cursor: int
+    seconds: float
+
+def _hash(text: str) -> int:
+    return zlib.crc32(text.encode())
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+class _Strings:
+    """Interned strings: each distinct value is stored once."""
+    def __init__(self):
+        self.index = {}
+        self.offsets = array("q", [0])
+        self.blob = bytearray()
+
+    def add(self, value: str | None) -> int:
+        if value is None:
+            return -1
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.offsets) - 1
+            self.blob += value.encode()
+            self.offsets.append(len(self.blob))
+        return position
+
+def _encode(kind: str, value, strings: _Strings) -> int:
+    if kind == "str":
+        return strings.add(value)
+    if value is None:
+        return NULL
+    if kind == "date":
+        return (value - EPOCH) // MICROSECOND
+    return value
+
+def _positions(ids: array) -> array:
+    # ID -> row position, -1 for IDs with no row. IDs are dense enough that
+    # a direct table beats hashing.
+    table = array("i", [-1]) * ((max(ids) + 1) if ids else 0)
+    for position, row_id in enumerate(ids):
+        table[row_id] = position
+    return table
+
+def _group(keys: array, by_id: array, groups: int) -> tuple[array, array]:
+    # Counting sort of row positions by group: group g's rows are
+    # members[offsets[g]:offsets[g + 1]], in ID order.
+    group_of = [by_id[key] if 0 <= key < len(by_id) else -1 for key in keys]
+    offsets = array("q", [0]) * (groups + 1)
+    for group in group_of:
+        if group >= 0:
+            offsets[group + 1] += 1
+    for group in range(groups):
+        offsets[group + 1] += offsets[group]
+    members = array("i", [0]) * offsets[groups]
+    fill = offsets[:-1]
+    for position, group in enumerate(group_of):
+        if group >= 0:
+            members[fill[group]] = position
+            fill[group] += 1
+    return offsets, members
+
+def _hash_table(keys: list[str]) -> array:
+    # Open addressing with linear probing, at most half full. Slots hold
+    # row position + 1; 0 is empty.
+    size = 1 << max(3, (2 * len(keys)).bit_length())
+    mask = size - 1
+    slots = array("i", [0]) * size
+    for position, key in enumerate(keys):
+        slot = _hash(key) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = position + 1
+    return slots
+
+def write_snapshot(path: str = SNAPSHOT_PATH) -> SnapshotResult:
+    """
+    Writes a snapshot of the catalog to path, replacing any earlier one
+    atomically, from a single read transaction on the primary.
+    """
+    started = time.perf_counter()
+    strings = _Strings()
+    sections = {}
+    emails = {}
+    with engine.connect() as conn, conn.begin():
+        change_cursor = conn.execute(select(func.coalesce(func.max(Change.id), 0))).scalar()
+        for table, (model, record, columns) in TABLES.items():
+            arrays = {name: array("q") for name in columns}
+            email_column = EMAIL_INDEXES.get(table)
+            if email_column:
+                emails[table] = []
+            result = conn.execute(select(*(getattr(model, name) for name in columns)).order_by(model.id))
+            for row in result:
+                for (name, kind), value in zip(columns.items(), row):
+                    arrays[name].append(_encode(kind, value, strings))
+                if email_column:
+                    emails[table].append(getattr(row, email_column))
+            for name, kind in columns.items():
+                # String indexes fit in 32 bits.
+                sections[f"{table}.{name}"] = array("i", arrays[name]) if kind == "str" else arrays[name]
+            sections[f"{table}.by_id"] = _positions(arrays["id"])
+    for table, keys in emails.items():
+        sections[f"{table}.by_email"] = _hash_table(keys)
+    for name, (table, group_table, column) in GROUPS.items():
+        offsets, members = _group(sections[f"{table}.{column}"], sections[f"{group_table}.by_id"], len(sections[f"{group_table}.id"]))
+        sections[f"{name}.offsets"] = offsets
+        sections[f"{name}.members"] = members
+    sections["strings.offsets"] = strings.offsets
+    sections["strings.blob"] = array("B", strings.blob)
+
+    layout = {}
+    offset = 0
+    for name, values in sections.items():
+        layout[name] = [offset, values.typecode, len(values) * values.itemsize]
+        offset = _align(offset + len(values) * values.itemsize)
+    rows = {table: len(sections[f"{table}.id"]) for table in TABLES}
+    header = json.dumps({
+        "schema_version": HEAD_VERSION,
+        "change_cursor": change_cursor,
+        "created_at": datetime.now().isoformat(),
+        "byteorder": sys.byteorder,
+        "rows": rows,
+        "sections": layout,
+    }).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+        for name, values in sections.items():
+            f.seek(data_start + layout[name][0])
+            values.tofile(f)
+        f.truncate(data_start + offset)
+        size = f.tell()
+    os.replace(temporary, path)
+    return SnapshotResult(path, rows, size, change_cursor, time.perf_counter() - started)
+
+def _decode(kind: str, value: int, strings):
+    if kind == "str":
+        return strings(value)
+    if value == NULL:
+        return None
+    if kind == "date":
+        return EPOCH + value * MICROSECOND
+    return value
+
+class CatalogSnapshot:
+    """
+    A memory-mapped snapshot written by write_snapshot(). Lookups return
+    plain records (InstructorRecord, ...) instead of ORM objects.
+    """
+    source = "snapshot"
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise SnapshotError(f"{path} is not a catalog snapshot.")
+            header_length = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 8], "little")
+            self.header = json.loads(self._map[len(MAGIC) + 8:len(MAGIC) + 8 + header_length])
+            if self.header["byteorder"] != sys.byteorder:
+                raise SnapshotError(f"{path} was written on a {self.header['byteorder']}-endian machine.")
+            data_start = _align(len(MAGIC) + 8 + header_length)
+            view = memoryview(self._map)
+            self._views = [view]
+            self._columns = {}
+            for name, (offset, typecode, length) in self.header["sections"].items():
+                section = view[data_start + offset:data_start + offset + length]
+                self._views.append(section)
+                self._columns[name] = section.cast(typecode) if typecode != "B" else section
+                self._views.append(self._columns[name])
+        except Exception:
+            self.close()
+            raise
+        self.change_cursor = self.header["change_cursor"]
+        self.rows = self.header["rows"]
+        # table -> (record type, [(column, kind)]), resolved once.
+        self._tables = {
+            table: (record, [(self._columns[f"{table}.{name}"], kind) for name, kind in columns.items()])
+            for table, (_, record, columns) in TABLES.items()
+        }
+
+    def close(self):
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def is_fresh(self) -> bool:
+        """
+        True while no change has been logged since the snapshot was taken.
+        Always False where the log can commit out of order (see
+        lib.changes.ordered_log), so lookups there use SQL.
+        """
+        if self.header["schema_version"] != HEAD_VERSION:
+            return False
+        with engine.connect() as conn:
+            if not ordered_log(conn):
+                return False
+            return conn.execute(select(func.coalesce(func.max(Change.id), 0))).scalar() == self.change_cursor
+
+    def _string(self, index: int) -> str | None:
+        if index < 0:
+            return None
+        offsets = self._columns["strings.offsets"]
+        return bytes(self._columns["strings.blob"][offsets[index]:offsets[index + 1]]).decode()
+
+    def _record(self, table: str, position: int):
+        record, columns = self._tables[table]
+        return record(*(_decode(kind, column[position], self._string) for column, kind in columns))
+
+    def _position(self, table: str, row_id: int) -> int | None:
+        by_id = self._columns[f"{table}.by_id"]
+        if 0 <= row_id < len(by_id) and by_id[row_id] >= 0:
+            return by_id[row_id]
+        return None
+
+    def _get(self, table: str, row_id: int):
+        position = self._position(table, row_id)
+        return None if position is None else self._record(table, position)
+
+    def _find_email(self, table: str, email: str) -> int | None:
+        slots = self._columns[f"{table}.by_email"]
+        emails = self._columns[f"{table}.{EMAIL_INDEXES[table]}"]
+        mask = len(slots) - 1
+        slot = _hash(email) & mask
+        while slots[slot]:
+            position = slots[slot] - 1
+            if self._string(emails[position]) == email:
+                return position
+            slot = (slot + 1) & mask
+        return None
+
+    def _members(self, group: str, group_position: int | None) -> list:
+        if group_position is None:
+            return []
+        table = GROUPS[group][0]
+        offsets = self._columns[f"{group}.offsets"]
+        members = self._columns[f"{group}.members"]
+        return [self._record(table, members[i]) for i in range(offsets[group_position], offsets[group_position + 1])]
+
+    def instructor(self, instructor_id: int) -> InstructorRecord | None:
+        return self._get("instructors", instructor_id)
+
+    def instructor_by_email(self, email: str) -> InstructorRecord | None:
+        position = self._find_email("instructors", email)
+        return None if position is None else self._record("instructors", position)
+
+    def course(self, course_id: int) -> CourseRecord | None:
+        return self._get("courses", course_id)
+
+    def enrollment(self, enrollment_id: int) -> EnrollmentRecord | None:
+        return self._get("enrollments", enrollment_id)
+
+    def course_enrollments(self, course_id: int) -> list[EnrollmentRecord]:
+        return self._members("course_enrollments", self._position("courses", course_id))
+
+    def instructor_courses(self, instructor_id: int) -> list[CourseRecord]:
+        return self._members("instructor_courses", self._position("instructors", instructor_id))
+
+    def student_enrollments(self, email: str) -> list[EnrollmentRecord]:
+        return self._members("student_enrollments", self._find_email("students", normalize_email(email)))
+
+class SqlCatalog:
+    """
+    The CatalogSnapshot lookups answered by the database, for when there is
+    no fresh snapshot.
+    """
+    source = "sql"
+
+    def _select(self, table: str, *criteria) -> list:
+        model, record, columns = TABLES[table]
+        with read_engine().connect() as conn:
+            rows = conn.execute(select(*(getattr(model, name) for name in columns)).where(*criteria).order_by(model.id)).all()
+        return [record(*row) for row in rows]
+
+    def _first(self, table: str, *criteria):
+        rows = self._select(table, *criteria)
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def is_fresh(self) -> bool:
+        return True
+
+    def instructor(self, instructor_id: int) -> InstructorRecord | None:
+        return self._first("instructors", Instructor.id == instructor_id)
+
+    def instructor_by_email(self, email: str) -> InstructorRecord | None:
+        return self._first("instructors", Instructor.email == email)
+
+    def course(self, course_id: int) -> CourseRecord | None:
+        return self._first("courses", Course.id == course_id)
+
+    def enrollment(self, enrollment_id: int) -> EnrollmentRecord | None:
+        return self._first("enrollments", Enrollment.id == enrollment_id)
+
+    def course_enrollments(self, course_id: int) -> list[EnrollmentRecord]:
+        return self._select("enrollments", Enrollment.course_id == course_id)
+
+    def instructor_courses(self, instructor_id: int) -> list[CourseRecord]:
+        return self._select("courses", Course.instructor_id == instructor_id)
+
+    def student_enrollments(self, email: str) -> list[EnrollmentRecord]:
+        student_id = select(Student.id).where(Student.email == normalize_email(email)).scalar_subquery()
+        return self._select("enrollments", Enrollment.student_id == student_id)
+
+def open_catalog(path: str = SNAPSHOT_PATH) -> CatalogSnapshot | SqlCatalog:
+    """
+    Returns the snapshot at path if it exists and is fresh, otherwise a
+    SqlCatalog. Either way the caller should close() it (or use with).
+    """
+    try:
+        snapshot = CatalogSnapshot(path)
+    except (OSError, ValueError, KeyError, SnapshotError):
+        return SqlCatalog()
+    if snapshot.is_fresh():
+        return snapshot
+    snapshot.close()
+    return SqlCatalog()
@@ -0,0 +1,154 @@
+import os
+import time
+from dataclasses import dataclass
+from sqlalchemy import select, insert, update, func, bindparam
+from sqlalchemy.orm import Session
+from lib.database import engine, get_session
+from lib.models.student import Student
+from lib.models.enrollment import Enrollment
+from lib.models.archived_enrollment import ArchivedEnrollment
+
+BACKFILL_BATCH_SIZE = int(os.environ.get("VIRTULEARN_BACKFILL_BATCH_SIZE", "5000"))
+LOOKUP_CHUNK_SIZE = 500
+
+# Students are identified by their normalized email. Enrollments keep the
+# name as entered and the normalized email, and link to the student through
+# student_id; per-student lookups go through the unique students.email index
+# and then the unique integer uq_enrollments_student_id_course_id index.
+#
+# Databases created before the students table have their enrollments linked
+# by backfill_students(), in batches of BACKFILL_BATCH_SIZE, each in its own
+# short transaction, so it can run while the application is in use and can
+# be interrupted and resumed. An active enrollment that turns out to repeat
+# one the student already has in the same course is moved to the archive
+# instead, as the unique index requires. Once every enrollment is linked,
+# the indexes on the enrollment name/email strings are dropped.
+
+students = Student.__table__
+BACKFILL_TABLES = (Enrollment.__table__, ArchivedEnrollment.__table__)
+LEGACY_INDEXES = ("ix_enrollments_student_name", "ix_enrollments_student_email_course_id")
+
+@dataclass
+class BackfillResult:
+    enrollments: int
+    batches: int
+    pending: int
+    seconds: float
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+def get_or_create_student(session: Session, name: str, email: str) -> Student:
+    """
+    Returns the student with this email (normalized), adding one named name
+    if there is none.
+    """
+    normalized = normalize_email(email)
+    student = session.query(Student).filter(Student.email == normalized).first()
+    if student is None:
+        student = Student(email=normalized, name=name)
+        session.add(student)
+        session.flush()
+    return student
+
+def resolve_student_ids(conn, people) -> dict[str, int]:
+    """
+    Returns {normalized email: student id} for (name, email) pairs, adding
+    the students that do not exist yet in one executemany. A new student
+    takes the first name given for their email.
+    """
+    names = {}
+    for name, email in people:
+        names.setdefault(normalize_email(email), name)
+
+    def lookup(emails):
+        found = {}
+        for start in range(0, len(emails), LOOKUP_CHUNK_SIZE):
+            chunk = emails[start:start + LOOKUP_CHUNK_SIZE]
+            found.update(conn.execute(select(students.c.email, students.c.id).where(students.c.email.in_(chunk))).all())
+        return found
+
+    ids = lookup(list(names))
+    missing = [email for email in names if email not in ids]
+    if missing:
+        conn.execute(insert(students), [{"email": email, "name": names[email]} for email in missing])
+        ids.update(lookup(missing))
+    return ids
+
+def _unlinked(table):
+    return (table.c.student_id.is_(None), table.c.student_email.is_not(None))
+
+def pending_backfill(conn) -> int:
+    """
+    Returns how many enrollments (active and archived) still have no student.
+    """
+    return sum(conn.execute(select(func.count()).select_from(table).where(*_unlinked(table))).scalar() for table in BACKFILL_TABLES)
+
+def _duplicates(conn, table, rows, ids) -> set[int]:
+    # IDs of rows whose student already has an enrollment in the course,
+    # linked earlier or earlier in this batch.
+    if table is not Enrollment.__table__:
+        return set()
+    student_ids = list({ids[normalize_email(row.student_email)] for row in rows})
+    taken = set()
+    for start in range(0, len(student_ids), LOOKUP_CHUNK_SIZE):
+        chunk = student_ids[start:start + LOOKUP_CHUNK_SIZE]
+        taken.update(conn.execute(select(table.c.student_id, table.c.course_id).where(table.c.student_id.in_(chunk))).all())
+    duplicates = set()
+    for row in rows:
+        key = (ids[normalize_email(row.student_email)], row.course_id)
+        if key in taken:
+            duplicates.add(row.id)
+        taken.add(key)
+    return duplicates
+
+def _link_batch(session: Session, table, after_id: int, batch_size: int) -> tuple[int, int]:
+    # Keyset on id, so each batch starts where the last one stopped instead
+    # of revisiting rows that are already linked.
+    conn = session.connection()
+    rows = conn.execute(
+        select(table.c.id, table.c.student_name, table.c.student_email, table.c.course_id)
+        .where(table.c.id > after_id, *_unlinked(table))
+        .order_by(table.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0, after_id
+    ids = resolve_student_ids(conn, ((row.student_name, row.student_email) for row in rows))
+    duplicates = _duplicates(conn, table, rows, ids)
+    if duplicates:
+        # Imported here: lib.archive depends on lib.operations, which
+        # depends on this module.
+        from lib.archive import move_to_archive
+        move_to_archive(session, table.c.id.in_(duplicates))
+    params = [{"row_id": row.id, "linked_student_id": ids[normalize_email(row.student_email)]} for row in rows if row.id not in duplicates]
+    if params:
+        conn.execute(update(table).where(table.c.id == bindparam("row_id")).values(student_id=bindparam("linked_student_id")), params)
+    return len(params), rows[-1].id
+
+def backfill_students(batch_size: int = BACKFILL_BATCH_SIZE, progress=None) -> BackfillResult:
+    """
+    Creates students from existing enrollments and links the enrollments to
+    them, one batch per transaction. progress, if given, is called with the
+    running total after each batch.
+    """
+    started = time.perf_counter()
+    linked = batches = 0
+    for table in BACKFILL_TABLES:
+        after_id = 0
+        while True:
+            with get_session() as session:
+                count, last_id = _link_batch(session, table, after_id, batch_size)
+            if last_id == after_id:
+                break
+            after_id = last_id
+            linked += count
+            batches += 1
+            if progress:
+                progress(linked)
+    with engine.begin() as conn:
+        pending = pending_backfill(conn)
+        if not pending:
+            for index in LEGACY_INDEXES:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+    return BackfillResult(linked, batches, pending, time.perf_counter() - started)
@@ -1,8 +1,22 @@
-from lib.database import create_db_tables
-from lib.cli import perform_initdb, perform_dropdb, add_instructor_cli, list_instructors_cli, find_instructor_cli, delete_instructor_cli, add_course_cli, list_courses_cli, find_course_cli, delete_course_cli, assign_course_cli, add_enrollment_cli, list_enrollments_cli, find_enrollment_cli, delete_enrollment_cli, find_instructor_by_email_cli, find_enrollments_by_email_cli
+import time
+STARTED = time.perf_counter()
+
 import sys
+from lib.database import create_db_tables, read_your_writes
+from lib.instrumentation import command, startup
+
+startup.begin(STARTED)
+startup.mark("core imports")
+
+# Each menu imports its commands when it is first opened, so starting the
+# program only loads what the main menu needs.
+
+def run_action(action):
+    with command(action.__name__), read_your_writes():
+        action()
 
 def instructor_menu():
+    from lib.cli import add_instructor_cli, list_instructors_cli, find_instructor_cli, find_instructor_by_email_cli, delete_instructor_cli, instructor_summary_cli
     while True:
         print("\n--- Manage Instructors ---")
         print("1. Add Instructor")
@@ -10,7 +24,8 @@ def instructor_menu():
         print("3. Find Instructor by ID")
         print("4. Find Instructor by Email")
         print("5. Delete Instructor")
-        print("6. Back to Main Menu")
+        print("6. Instructor Summary")
+        print("7. Back to Main Menu")
         choice = input("Select an option: ")
         options = {
             '1': add_instructor_cli,
@@ -18,17 +33,19 @@ def instructor_menu():
             '3': find_instructor_cli,
             '4': find_instructor_by_email_cli,
             '5': delete_instructor_cli,
-            '6': lambda: None
+            '6': instructor_summary_cli,
+            '7': lambda: None
         }
         action = options.get(choice)
         if action:
-            action()
-        elif choice != '6':
+            run_action(action)
+        elif choice != '7':
             print("Invalid option. Please try again.")
-        if choice == '6':
+        if choice == '7':
             break
 
 def course_menu():
+    from lib.cli import add_course_cli, list_courses_cli, find_course_cli, delete_course_cli, assign_course_cli, course_summary_cli
     while True:
         print("\n--- Manage Courses ---")
         print("1. Add Course")
@@ -36,7 +53,8 @@ def course_menu():
         print("3. Find Course by ID")
         print("4. Delete Course")
         print("5. Assign Course to Instructor")
-        print("6. Back to Main Menu")
+        print("6. Enrollment Summary")
+        print("7. Back to Main Menu")
         choice = input("Select an option: ")
         options = {
             '1': add_course_cli,
@@ -44,17 +62,19 @@ def course_menu():
             '3': find_course_cli,
             '4': delete_course_cli,
             '5': assign_course_cli,
-            '6': lambda: None
+            '6': course_summary_cli,
+            '7': lambda: None
         }
         action = options.get(choice)
         if action:
-            action()
-        elif choice != '6':
+            run_action(action)
+        elif choice != '7':
             print("Invalid option. Please try again.")
-        if choice == '6':
+        if choice == '7':
             break
 
 def enrollment_menu():
+    from lib.cli import add_enrollment_cli, list_enrollments_cli, find_enrollment_cli, find_enrollments_by_email_cli, delete_enrollment_cli, bulk_delete_enrollments_cli
     while True:
         print("\n--- Manage Enrollments ---")
         print("1. Add Enrollment")
@@ -62,7 +82,8 @@ def enrollment_menu():
         print("3. Find Enrollment by ID")
         print("4. Find Enrollments by Email")
         print("5. Delete Enrollment")
-        print("6. Back to Main Menu")
+        print("6. Bulk Delete Enrollments")
+        print("7. Back to Main Menu")
         choice = input("Select an option: ")
         options = {
             '1': add_enrollment_cli,
@@ -70,39 +91,119 @@ def enrollment_menu():
             '3': find_enrollment_cli,
             '4': find_enrollments_by_email_cli,
             '5': delete_enrollment_cli,
-            '6': lambda: None
+            '6': bulk_delete_enrollments_cli,
+            '7': lambda: None
+        }
+        action = options.get(choice)
+        if action:
+            run_action(action)
+        elif choice != '7':
+            print("Invalid option. Please try again.")
+        if choice == '7':
+            break
+
+def reports_menu():
+    from lib.cli_reports import report_enrollments_per_course_cli, report_enrollments_per_instructor_cli, report_enrollments_per_month_cli, rebuild_counters_cli
+    while True:
+        print("\n--- Reports ---")
+        print("1. Enrollments per Course")
+        print("2. Enrollments per Instructor")
+        print("3. Enrollments per Month")
+        print("4. Rebuild Enrollment Counters")
+        print("5. Back to Main Menu")
+        choice = input("Select an option: ")
+        options = {
+            '1': report_enrollments_per_course_cli,
+            '2': report_enrollments_per_instructor_cli,
+            '3': report_enrollments_per_month_cli,
+            '4': rebuild_counters_cli,
+            '5': lambda: None
+        }
+        action = options.get(choice)
+        if action:
+            run_action(action)
+        elif choice != '5':
+            print("Invalid option. Please try again.")
+        if choice == '5':
+            break
+
+def data_tools_menu():
+    from lib.cli_data_tools import import_data_cli, export_data_cli, show_db_settings_cli, show_cache_stats_cli, show_schema_version_cli, run_index_advisor_cli, archive_enrollments_cli, backfill_students_cli
+    while True:
+        print("\n--- Data Tools ---")
+        print("1. Import Data (CSV/JSONL)")
+        print("2. Export Data (CSV/JSONL/gzip)")
+        print("3. Show Database Settings")
+        print("4. Show Lookup Cache Statistics")
+        print("5. Show Schema Version")
+        print("6. Run Index Advisor")
+        print("7. Archive Old Enrollments")
+        print("8. Backfill Students")
+        print("9. Back to Main Menu")
+        choice = input("Select an option: ")
+        options = {
+            '1': import_data_cli,
+            '2': export_data_cli,
+            '3': show_db_settings_cli,
+            '4': show_cache_stats_cli,
+            '5': show_schema_version_cli,
+            '6': run_index_advisor_cli,
+            '7': archive_enrollments_cli,
+            '8': backfill_students_cli,
+            '9': lambda: None
         }
         action = options.get(choice)
         if action:
-            action()
-        elif choice != '6':
+            run_action(action)
+        elif choice != '9':
             print("Invalid option. Please try again.")
-        if choice == '6':
+        if choice == '9':
             break
 
+def search_menu():
+    from lib.cli import search_cli
+    run_action(search_cli)
+
+def drop_tables_menu():
+    from lib.cli import perform_dropdb
+    perform_dropdb()
+
 def main_menu():
     try:
-        perform_initdb()
+        create_db_tables()
     except Exception as e:
         print(f"Failed to initialize database: {e}")
         sys.exit(1)
+    startup.mark("schema check")
+    startup.ready()
 
     while True:
         print("\n--- Main Menu ---")
         print("1. Manage Instructors")
         print("2. Manage Courses")
         print("3. Manage Enrollments")
-        print("4. Drop All Tables (DANGEROUS)")
-        print("5. Exit")
+        print("4. Search")
+        print("5. Reports")
+        print("6. Data Tools")
+        print("7. Drop All Tables (DANGEROUS)")
+        print("8. Exit")
         choice = input("Select an option: ")
         menu_options = {
             '1': instructor_menu,
             '2': course_menu,
             '3': enrollment_menu,
-            '4': perform_dropdb,
-            '5': lambda: (print("Exiting Virtulearn. Goodbye!"), sys.exit())
+            '4': search_menu,
+            '5': reports_menu,
+            '6': data_tools_menu,
+            '7': drop_tables_menu,
+            '8': lambda: (print("Exiting Virtulearn. Goodbye!"), sys.exit())
         }
         menu_options.get(choice, lambda: print("Invalid option. Please try again."))()
 
 if __name__ == '__main__':
-    main_menu()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        from lib.commands import virtulearn
+        startup.mark("command imports")
+        virtulearn(prog_name="virtulearn")
+    else:
+        main_menu()
\ No newline at end of file